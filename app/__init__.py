@@ -1,23 +1,57 @@
 import os
+import time
+from datetime import datetime
 from flask import Flask
-from flask_cors import CORS
 
+from app.commands import register_commands
 from app.config import Config
-from app.extensions import mongo
 from app.routes.user_routes import user_bp
+from app.utils.admission import init_admission_control
+from app.utils.assets import assets_bp, get_manifest
+from app.utils.db import init_mongo, init_round_trip_report, warm_up_mongo
+from app.utils.email_sender import get_welcome_email_html
+from app.utils.email_transport import get_email_transport
+from app.utils.http_edge import init_http_edge
+from app.utils.indexes import ensure_indexes_in_background
+from app.utils.json_provider import FastJSONProvider
+from app.utils.metrics import init_metrics
+from app.utils.timing import init_timing
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
-    # Inicializar extensiones
-    mongo.init_app(app)
+    # JSON rápido con soporte nativo de ObjectId, datetime y Decimal128
+    app.json = FastJSONProvider(app)
     
-    # Habilitar CORS
-    CORS(app)
+    # Inicializar extensiones (el cliente de MongoDB no conecta hasta el primer uso)
+    init_mongo(app)
+    
+    # Crear los índices declarados sin bloquear el arranque
+    if app.config.get('MONGO_ENSURE_INDEXES'):
+        ensure_indexes_in_background(app)
+    
+    # Habilitar CORS (con preflight cacheado), ETag/304 y compresión
+    init_http_edge(app)
     
     # Registrar blueprints
     app.register_blueprint(user_bp, url_prefix='/api/users')
+    app.register_blueprint(assets_bp)
+    
+    # Reporte de round trips a MongoDB por petición
+    init_round_trip_report(app)
+    
+    # Métricas de Prometheus en /metrics
+    init_metrics(app)
+    
+    # Server-Timing por fases, log de peticiones lentas y perfilado bajo demanda
+    init_timing(app)
+    
+    # Límite de peticiones en curso por clase de rutas (503 + Retry-After al saturarse)
+    init_admission_control(app)
+    
+    # Registrar comandos CLI
+    register_commands(app)
     
     # Ruta de prueba
     @app.route('/')
@@ -27,4 +61,25 @@ def create_app(config_class=Config):
             'status': 'online'
         }
     
-    return app
\ No newline at end of file
+    return app
+
+def warm_up(app):
+    """
+    Preparar un proceso antes de que reciba tráfico: conexiones del pool de
+    MongoDB, manifest de assets y primer render de las plantillas de correo.
+    
+    Args:
+        app (Flask): Aplicación
+        
+    Returns:
+        float: Segundos empleados
+    """
+    start = time.perf_counter()
+    with app.app_context():
+        warm_up_mongo(app)
+        get_manifest()
+        get_welcome_email_html({'name': 'warmup'}, datetime.utcnow().year)
+        if not app.config.get('EMAIL_OUTBOX_ENABLED', True):
+            # Sin outbox, cada registro envía correos desde el worker
+            get_email_transport()
+    return time.perf_counter() - start
\ No newline at end of file
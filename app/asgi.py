@@ -0,0 +1,379 @@
+"""
+Modo de despliegue asíncrono (ASGI), opcional.
+
+POST /api/users/register se atiende con un handler async: Motor para las
+escrituras en MongoDB y los correos de bienvenida y de administradores en
+paralelo (asyncio.gather) por el transporte de EMAIL_TRANSPORT: con 'http'
+un cliente httpx compartido contra EMAIL_HTTP_BASE_URL; con el resto, el
+transporte síncrono en un hilo. Un
+solo proceso puede tener cientos de registros en vuelo en lugar de uno por
+worker síncrono.
+
+El resto de rutas se sirven con la aplicación Flask de siempre a través de
+asgiref (en un pool de hilos), así que el comportamiento no cambia. La
+respuesta del registro async también pasa por los hooks de Flask (CORS,
+capa HTTP, métricas, Server-Timing y control de admisión sin cola).
+
+Requiere las dependencias de requirements-asgi.txt:
+    uvicorn app.asgi:app --workers 2
+"""
+import asyncio
+import io
+import math
+import os
+from datetime import datetime
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.write_concern import WriteConcern
+
+from app import create_app
+from app.config import Config
+from app.models.registration_stats import RegistrationStats
+from app.models.user import User
+from app.utils.admission import ADMISSION_CLASS_ENVIRON, ADMISSION_NOWAIT_ENVIRON
+from app.utils.auth import generate_token
+from app.utils.email_outbox import (
+    REGISTRATION_EMAILS, build_job, build_payload, ensure_dispatcher_started, get_dispatcher
+)
+from app.utils.email_sender import (
+    build_admin_notification_email, build_welcome_email, get_email_breaker, spool_email, transport_send
+)
+from app.utils.email_transport import RESEND_API_URL, raise_for_status
+from app.utils.rate_limit import MemoryBackend, forwarded_ip, get_backend
+from app.utils.timing import span
+
+REGISTER_PATH = '/api/users/register'
+
+
+class AsyncRegistrationApp:
+    """
+    Aplicación ASGI: registro asíncrono y el resto delegado en Flask.
+
+    Args:
+        flask_app (Flask): Aplicación creada con create_app
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.motor = None
+        self.db = None
+        self.http = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif (scope['type'] == 'http' and scope['path'] == REGISTER_PATH
+              and scope['method'] == 'POST' and not has_idempotency_key(scope)):
+            await self.register(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        """Abrir y cerrar los clientes compartidos (Motor y HTTP)"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        config = self.flask_app.config
+        self.motor = AsyncIOMotorClient(config['MONGO_URI'],
+                                        maxPoolSize=config.get('ASGI_MONGO_POOL_SIZE', 100))
+        self.db = self.motor.get_default_database()
+        # Solo el transporte HTTP tiene versión async; 'sdk' y 'capture' usan
+        # el transporte síncrono de siempre (ver send_email)
+        if config.get('EMAIL_TRANSPORT', 'http') == 'http':
+            self.http = httpx.AsyncClient(
+                base_url=config.get('EMAIL_HTTP_BASE_URL') or RESEND_API_URL,
+                headers={'Authorization': f"Bearer {os.getenv('RESEND_API_KEY', '')}"},
+                timeout=httpx.Timeout(config.get('ASGI_EMAIL_TIMEOUT', 10.0),
+                                      connect=config.get('EMAIL_HTTP_CONNECT_TIMEOUT', 3.0)),
+                limits=httpx.Limits(max_connections=config.get('ASGI_EMAIL_MAX_CONNECTIONS', 100)),
+            )
+
+    async def shutdown(self):
+        if self.http is not None:
+            await self.http.aclose()
+        if self.motor is not None:
+            self.motor.close()
+
+    def collection(self, name, operation):
+        """Colección de Motor con el write concern de MONGO_WRITE_CONCERNS"""
+        collection = self.db[name]
+        concern = self.flask_app.config.get('MONGO_WRITE_CONCERNS', {}).get(operation)
+        if concern is not None:
+            collection = collection.with_options(write_concern=WriteConcern(**concern))
+        return collection
+
+    async def register(self, scope, receive, send):
+        """
+        Atender el registro async dentro de un contexto de petición de Flask,
+        para que la respuesta pase por los mismos hooks que el resto de rutas
+        (before_request/after_request/teardown_request).
+        """
+        app = self.flask_app
+        body = await read_body(receive)
+        environ = scope_environ(scope, body)
+        # Límite propio (ADMISSION_LIMITS['register_async']) y sin cola: esperar
+        # un hueco bloquearía el event loop
+        environ[ADMISSION_CLASS_ENVIRON] = 'register_async'
+        environ[ADMISSION_NOWAIT_ENVIRON] = True
+
+        ctx = app.request_context(environ)
+        ctx.push()
+        error = None
+        try:
+            response = app.preprocess_request()
+            if response is None:
+                status, payload, headers = await self.handle_register(scope, body)
+                response = app.json.response(payload)
+                response.status_code = status
+                response.headers.extend(headers)
+            response = app.process_response(app.make_response(response))
+            await self.respond(send, response)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            ctx.pop(error)
+
+    async def handle_register(self, scope, body):
+        """
+        Versión async de user_routes.register: mismas validaciones, mismas
+        respuestas y mismos efectos (usuario, estadísticas y correos)
+
+        Returns:
+            tuple: (status, cuerpo JSON, cabeceras adicionales)
+        """
+        app = self.flask_app
+
+        allowed, retry_after = await self.check_rate_limit(scope)
+        if not allowed:
+            return 429, {'message': 'Demasiadas peticiones. Inténtalo de nuevo más tarde.'}, \
+                [('Retry-After', str(max(1, math.ceil(retry_after))))]
+
+        try:
+            data = app.json.loads(body) if body else None
+        except ValueError:
+            data = None
+        if not data or not isinstance(data, dict):
+            return 400, {'message': 'No se proporcionaron datos'}, []
+
+        with span('validation'):
+            errors = User.validate_user(data)
+        if errors:
+            return 400, {'message': '. '.join(errors)}, []
+
+        data['registrationDate'] = datetime.utcnow()
+        data['isVerified'] = False
+
+        with span('insert_one'):
+            await self.collection('users', 'register').insert_one(data)
+
+        try:
+            day, user_type, country = RegistrationStats.bucket_key(data)
+            with span('stats'):
+                await self.collection(RegistrationStats.COLLECTION, 'register').update_one(
+                    {'day': day, 'userType': user_type, 'country': country},
+                    {'$inc': {'count': 1}},
+                    upsert=True
+                )
+        except Exception as e:
+            app.logger.error(f"Error al actualizar las estadísticas de registro: {str(e)}")
+
+        with span('generate_token'):
+            token = generate_token(str(data['_id']))
+        if app.config.get('EMAIL_OUTBOX_ENABLED', True):
+            with span('enqueue_emails'):
+                await self.enqueue_emails(data)
+        else:
+            with span('send_emails'):
+                await self.send_emails(data)
+
+        return 201, {
+            '_id': data['_id'],
+            'name': data['name'],
+            'email': data['email'],
+            'phone': data.get('phone'),
+            'userType': data['userType'],
+            'country': data['country'],
+            'token': token
+        }, []
+
+    async def check_rate_limit(self, scope):
+        """
+        Aplicar RATE_LIMITS['register'] (por IP) con el mismo backend que la app Flask
+
+        Returns:
+            tuple: (bool, float) - (permitida, segundos hasta poder reintentar)
+        """
+        app = self.flask_app
+        rule = app.config.get('RATE_LIMITS', {}).get('register')
+        if not rule or not app.config.get('RATE_LIMIT_ENABLED', True):
+            return True, 0.0
+
+        trusted_proxies = app.config.get('RATE_LIMIT_TRUSTED_PROXIES', 1) if app.config.get('RATE_LIMIT_TRUST_PROXY') else 0
+        key = f"register:{scope_client_ip(scope, trusted_proxies)}"
+        backend = get_backend(app)
+        try:
+            if isinstance(backend, MemoryBackend):
+                return backend.hit(key, rule['limit'], rule['period'])
+            # El backend de MongoDB es síncrono: no bloquear el event loop
+            return await asyncio.to_thread(backend.hit, key, rule['limit'], rule['period'])
+        except Exception as e:
+            app.logger.error(f"Error en el rate limiter: {str(e)}")
+            return True, 0.0
+
+    async def enqueue_emails(self, user_data):
+        """Encolar los correos de registro en el outbox (un único insert_many)"""
+        app = self.flask_app
+        try:
+            now = datetime.utcnow()
+            payload = build_payload(user_data)
+            max_attempts = app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+            await self.db[app.config.get('EMAIL_OUTBOX_COLLECTION', 'email_outbox')].insert_many(
+                [build_job(kind, payload, now, max_attempts) for kind in REGISTRATION_EMAILS]
+            )
+            # Los workers del outbox son hilos de este mismo proceso
+            ensure_dispatcher_started()
+            dispatcher = get_dispatcher(app)
+            if dispatcher:
+                dispatcher.notify()
+        except Exception as e:
+            app.logger.error(f"Error al encolar correos de registro: {str(e)}")
+
+    async def send_emails(self, user_data):
+        """Enviar la bienvenida y la notificación a administradores a la vez"""
+        year = datetime.utcnow().year
+        messages = (
+            ('bienvenida', build_welcome_email(user_data, year)),
+            ('notificación a administradores', build_admin_notification_email(user_data)),
+        )
+        results = await asyncio.gather(
+            *(self.send_email(params) for _, params in messages),
+            return_exceptions=True
+        )
+        for (kind, params), result in zip(messages, results):
+            if isinstance(result, Exception):
+                self.flask_app.logger.error(f"Error al enviar correo de {kind}: {str(result)}")
+                spool_email('email', params, result)
+
+    async def send_email(self, params):
+        """Envío por el transporte configurado, con el mismo circuit breaker que el modo síncrono"""
+        breaker = get_email_breaker() if self.flask_app.config.get('EMAIL_BREAKER_ENABLED', True) else None
+        if breaker:
+            breaker.before_call()
+        try:
+            if self.http is None:
+                # El hilo hereda el contexto de la petición (contextvars)
+                result = await asyncio.to_thread(transport_send, 'email', params)
+            else:
+                response = await self.http.post('/emails', json=params)
+                raise_for_status(response.status_code, response.text)
+                result = response.json()
+        except Exception as e:
+            if breaker:
+                breaker.record_error(e)
+            raise
+        else:
+            if breaker:
+                breaker.record_success()
+            return result
+        finally:
+            # CancelledError no es Exception: sin esto el circuito quedaría en prueba
+            if breaker:
+                breaker.release_probe()
+
+    async def respond(self, send, response):
+        """Enviar una respuesta de Flask (ya procesada por los hooks) por ASGI"""
+        data = response.get_data()
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                   for name, value in response.headers.to_wsgi_list()
+                   if name.lower() != 'content-length']
+        headers.append((b'content-length', str(len(data)).encode()))
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': data})
+
+
+def has_idempotency_key(scope):
+    """Las peticiones con Idempotency-Key van por la ruta Flask (decorador idempotent)"""
+    return any(name == b'idempotency-key' for name, _ in scope.get('headers', []))
+
+
+def scope_client_ip(scope, trusted_proxies=0):
+    """IP del cliente de una petición ASGI (como rate_limit.client_ip)"""
+    if trusted_proxies:
+        forwarded = ','.join(value.decode('latin-1') for name, value in scope.get('headers', [])
+                             if name == b'x-forwarded-for')
+        ip = forwarded_ip(forwarded, trusted_proxies)
+        if ip:
+            return ip
+    client = scope.get('client')
+    return client[0] if client else 'unknown'
+
+
+def scope_environ(scope, body):
+    """Environ WSGI equivalente a una petición ASGI (para el contexto de petición de Flask)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def read_body(receive):
+    """Leer el cuerpo completo de una petición ASGI"""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def create_asgi_app(config_class=Config):
+    """
+    Crear la aplicación ASGI
+
+    Args:
+        config_class: Clase de configuración (la misma que usa create_app)
+
+    Returns:
+        AsyncRegistrationApp: Aplicación ASGI
+    """
+    return AsyncRegistrationApp(create_app(config_class))
+
+
+app = create_asgi_app()
@@ -0,0 +1,217 @@
+import signal
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.utils.email_sender import EMAIL_TEMPLATES, get_email_spool, replay_spool
+from app.utils.email_spool import SpoolBusyError
+from app.utils.template_engine import template_report
+from app.utils.indexes import ensure_indexes, explain_query_shapes
+from app.utils.assets import build_assets
+from app.models.registration_stats import RegistrationStats
+from app.utils.email_outbox import (
+    OutboxDispatcher, outbox_collection, STATUS_DEAD, STATUS_PENDING
+)
+from app.utils.campaigns import CampaignError, CampaignRunner, campaigns_collection, create_campaign, get_campaign
+
+outbox_cli = AppGroup('outbox', help='Gestión del outbox de correos')
+emails_cli = AppGroup('emails', help='Utilidades de las plantillas de correo y del spool')
+db_cli = AppGroup('db', help='Índices y planes de consulta de MongoDB')
+assets_cli = AppGroup('assets', help='Pipeline de imágenes estáticas')
+stats_cli = AppGroup('stats', help='Contadores de registros para dashboards')
+campaigns_cli = AppGroup('campaigns', help='Campañas de anuncios por correo a segmentos de usuarios')
+
+
+@outbox_cli.command('work')
+@click.option('--workers', type=int, default=None, help='Número de hilos de envío')
+@click.option('--drain-timeout', type=float, default=30, help='Segundos para drenar al detenerse')
+def outbox_work(workers, drain_timeout):
+    """Ejecutar un pool dedicado de envío de correos hasta recibir SIGTERM/SIGINT"""
+    app = current_app._get_current_object()
+    dispatcher = OutboxDispatcher(app, workers=workers)
+    stop_requested = []
+
+    def handle_signal(signum, frame):
+        stop_requested.append(signum)
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    dispatcher.start()
+    click.echo(f"Outbox en ejecución con {dispatcher.workers} workers. Ctrl+C para detener.")
+    while not stop_requested:
+        time.sleep(0.5)
+
+    click.echo("Drenando envíos en curso...")
+    drained = dispatcher.stop(timeout=drain_timeout)
+    click.echo("Outbox detenido" if drained else "Outbox detenido con envíos sin terminar")
+
+
+@outbox_cli.command('stats')
+def outbox_stats():
+    """Mostrar el número de jobs por estado"""
+    counts = outbox_collection().aggregate([
+        {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+    ])
+    for row in counts:
+        click.echo(f"{row['_id']}: {row['count']}")
+
+
+@outbox_cli.command('requeue-dead')
+def outbox_requeue_dead():
+    """Devolver a la cola los jobs en dead-letter"""
+    result = outbox_collection().update_many(
+        {'status': STATUS_DEAD},
+        {'$set': {'status': STATUS_PENDING, 'attempts': 0, 'nextAttemptAt': datetime.utcnow()}}
+    )
+    click.echo(f"{result.modified_count} jobs devueltos a la cola")
+
+
+@emails_cli.command('report')
+@click.option('--iterations', type=int, default=2000, help='Renders por medición')
+def emails_report(iterations):
+    """Comparar bytes por correo y µs por render: plantilla original vs compilada"""
+    click.echo(f"{'plantilla':<26}{'bytes antes':>12}{'bytes ahora':>12}{'ahorro':>8}"
+               f"{'µs antes':>10}{'µs ahora':>10}")
+    for row in template_report(EMAIL_TEMPLATES, iterations=iterations):
+        saved = 1 - row['compiled_bytes'] / row['legacy_bytes']
+        click.echo(f"{row['template']:<26}{row['legacy_bytes']:>12}{row['compiled_bytes']:>12}"
+                   f"{saved:>8.0%}{row['legacy_us']:>10.1f}{row['compiled_us']:>10.1f}")
+
+
+@emails_cli.command('replay-spool')
+@click.option('--limit', type=int, default=None, help='Máximo de correos a reenviar')
+def emails_replay_spool(limit):
+    """Reenviar los correos guardados en el spool local mientras el proveedor falló"""
+    pending = get_email_spool().count()
+    if not pending:
+        click.echo("El spool está vacío")
+        return
+    try:
+        result = replay_spool(limit)
+    except SpoolBusyError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"{result['sent']} de {pending} correos reenviados, {result['requeued']} siguen en el spool")
+    if result['dead']:
+        click.echo(f"{result['dead']} rechazados por el proveedor, movidos a {get_email_spool().path}.dead")
+    if result['error']:
+        click.echo(f"Replay detenido: {result['error']}")
+
+
+@db_cli.command('ensure-indexes')
+def db_ensure_indexes():
+    """Crear los índices declarados que falten y verificar los existentes"""
+    for row in ensure_indexes():
+        click.echo(f"{row['collection']}.{row['index']}: {row['status']}")
+
+
+@db_cli.command('explain')
+def db_explain():
+    """Mostrar el plan de cada forma de consulta; falla si alguna hace COLLSCAN"""
+    regressions = 0
+    for row in explain_query_shapes():
+        flag = 'COLLSCAN' if row['collscan'] else 'ok'
+        click.echo(f"{row['collection']}.{row['query']}: {' <- '.join(row['stages'])} [{flag}]")
+        regressions += row['collscan']
+    if regressions:
+        raise click.ClickException(f"{regressions} consultas sin índice")
+
+
+@assets_cli.command('build')
+@click.option('--width', 'widths', type=int, multiple=True, help='Ancho a generar (repetible)')
+def assets_build(widths):
+    """Generar variantes optimizadas, WebP y con hash de static/images"""
+    try:
+        manifest = build_assets(list(widths) or None)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    for name, entry in manifest.items():
+        click.echo(f"{name} ({entry['source_bytes']} bytes)")
+        for variant in entry['variants']:
+            click.echo(f"  {variant['width']}w: {variant['png']} ({variant['png_bytes']} bytes), "
+                       f"{variant['webp']} ({variant['webp_bytes']} bytes)")
+
+
+@stats_cli.command('rebuild')
+def stats_rebuild():
+    """Recalcular los contadores de registros desde la colección users"""
+    buckets = RegistrationStats.rebuild()
+    click.echo(f"{buckets} buckets recalculados en {RegistrationStats.COLLECTION}")
+
+
+@campaigns_cli.command('create')
+@click.argument('name')
+@click.option('--subject', required=True, help='Asunto del correo')
+@click.option('--message-file', type=click.File(encoding='utf-8'), required=True,
+              help='Texto del anuncio (párrafos separados por una línea en blanco)')
+@click.option('--user-type', default=None, help='Enviar solo a este userType')
+@click.option('--country', default=None, help='Enviar solo a este país')
+def campaigns_create(name, subject, message_file, user_type, country):
+    """Crear una campaña; el segmento son los usuarios registrados hasta ahora"""
+    try:
+        campaign = create_campaign(name, subject, message_file.read(), user_type=user_type, country=country)
+    except CampaignError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Campaña {campaign['_id']} creada. Envíala con `flask campaigns send {campaign['_id']}`")
+
+
+@campaigns_cli.command('send')
+@click.argument('name')
+@click.option('--batch-size', type=int, default=None, help='Correos por llamada (máximo 100)')
+@click.option('--concurrency', type=int, default=None, help='Lotes en vuelo a la vez')
+@click.option('--rate', type=float, default=None, help='Llamadas por segundo al proveedor (0 sin límite)')
+@click.option('--max-batches', type=int, default=None, help='Detenerse tras este número de lotes')
+def campaigns_send(name, batch_size, concurrency, rate, max_batches):
+    """Enviar una campaña o reanudarla desde su checkpoint; Ctrl+C la pausa"""
+    app = current_app._get_current_object()
+
+    def progress(campaign):
+        click.echo(f"\r{campaign['sent']} correos enviados en {campaign['batches']} lotes", nl=False)
+
+    runner = CampaignRunner(app, name, batch_size=batch_size, concurrency=concurrency, rate=rate,
+                            max_batches=max_batches, on_progress=progress)
+
+    def handle_signal(signum, frame):
+        runner.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    try:
+        campaign = runner.run()
+    except CampaignError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"\nCampaña {name}: {campaign['status']}, {campaign['sent']} correos enviados")
+    if campaign['lastError']:
+        click.echo(f"Último error: {campaign['lastError']}. Vuelve a ejecutar el comando para reanudarla.")
+
+
+@campaigns_cli.command('status')
+@click.argument('name', required=False)
+def campaigns_status(name):
+    """Mostrar el estado y el progreso de una campaña (o de todas)"""
+    try:
+        campaigns = [get_campaign(name)] if name else campaigns_collection().find().sort('createdAt', -1)
+    except CampaignError as e:
+        raise click.ClickException(str(e))
+    for campaign in campaigns:
+        filters = ', '.join(f"{key}={value}" for key, value in campaign['filters'].items()
+                            if value and key != 'registered_to') or 'todos'
+        click.echo(f"{campaign['_id']}: {campaign['status']}, {campaign['sent']} enviados "
+                   f"en {campaign['batches']} lotes ({filters})")
+        if campaign.get('lastError'):
+            click.echo(f"  último error: {campaign['lastError']}")
+
+
+def register_commands(app):
+    """Registrar los comandos CLI de la aplicación"""
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(emails_cli)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(campaigns_cli)
@@ -5,13 +5,205 @@ from dotenv import load_dotenv
 # Cargar variables de entorno
 load_dotenv()
 
+# Raíz del repositorio (donde vive static/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/irrelevant-toolkit')
     SECRET_PHRASE = os.environ.get('SECRET_PHRASE', 'soy irrelevant club')
     JWT_EXPIRATION_DAYS = 30
+    # IDs de usuario con acceso a las rutas de administración (separados por comas)
+    ADMIN_USER_IDS = [user_id.strip() for user_id in os.environ.get('ADMIN_USER_IDS', '').split(',') if user_id.strip()]
+    
+    # Caché de tokens JWT ya verificados (token_required)
+    TOKEN_CACHE_ENABLED = True
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+    # Vida máxima de una entrada; nunca supera el 'exp' del propio token
+    TOKEN_CACHE_TTL = 300
+    
+    # Write concern por operación lógica (ver app/utils/db.py)
+    MONGO_WRITE_CONCERNS = {
+        'register': {'w': 1},
+        'register_bulk': {'w': 1},
+        'admin': {'w': 'majority'},
+    }
+    # Crear/verificar los índices en segundo plano al arrancar la aplicación
+    MONGO_ENSURE_INDEXES = os.environ.get('MONGO_ENSURE_INDEXES', 'false').lower() == 'true'
+    # Conexiones que el pool mantiene abiertas y que el warmup abre antes de recibir tráfico
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+    WARMUP_MONGO_CONNECTIONS = int(os.environ.get('WARMUP_MONGO_CONNECTIONS', '4'))
+    WARMUP_TIMEOUT = float(os.environ.get('WARMUP_TIMEOUT', '5'))
+    # Caché por worker de los perfiles que sirve GET /api/users/me. Los cambios
+    # hechos por PATCH /me se invalidan al momento en el worker que los hace; en
+    # el resto, con USER_CACHE_WATCH (change stream, requiere replica set) o al
+    # caducar el TTL
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'true').lower() == 'true'
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_WATCH = os.environ.get('USER_CACHE_WATCH', 'false').lower() == 'true'
+    USER_CACHE_WATCH_RETRY_SECONDS = 5
+    
+    # Group commit de /register: los registros concurrentes que llegan dentro
+    # de la ventana se escriben con un solo insert_many (y un solo upsert de
+    # contadores). Solo agrupa peticiones del mismo proceso, así que requiere
+    # workers con hilos (gunicorn --threads)
+    GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', 'false').lower() == 'true'
+    # Latencia máxima que añade a un registro y documentos que cierran el grupo antes
+    GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', '2'))
+    GROUP_COMMIT_MAX_DOCS = int(os.environ.get('GROUP_COMMIT_MAX_DOCS', '64'))
+    # Añadir la cabecera X-DB-Round-Trips con los comandos de cada petición
+    REPORT_DB_ROUND_TRIPS = os.environ.get('REPORT_DB_ROUND_TRIPS', 'false').lower() == 'true'
+    
+    # Máximo de usuarios por petición en /register/bulk
+    BULK_REGISTER_MAX_ROWS = int(os.environ.get('BULK_REGISTER_MAX_ROWS', 5000))
+    
+    # Listado y exportación de usuarios
+    USERS_PAGE_SIZE = 50
+    USERS_MAX_PAGE_SIZE = 500
+    # Documentos por lote del cursor al exportar (memoria constante)
+    USERS_EXPORT_BATCH_SIZE = 1000
     
     # Configuración de Mailgun
     MAILGUN_API_KEY = os.environ.get('MAILGUN_API_KEY')
     MAILGUN_DOMAIN = os.environ.get('MAILGUN_DOMAIN', 'sandbox8b842af5fbad4b598617e8be8a7e0e8b.mailgun.org')
-    SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'mailgun@sandbox8b842af5fbad4b598617e8be8a7e0e8b.mailgun.org')
\ No newline at end of file
+    SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'mailgun@sandbox8b842af5fbad4b598617e8be8a7e0e8b.mailgun.org')
+    
+    # Outbox de correos (envío asíncrono desde MongoDB)
+    EMAIL_OUTBOX_ENABLED = os.environ.get('EMAIL_OUTBOX_ENABLED', 'true').lower() == 'true'
+    EMAIL_OUTBOX_COLLECTION = 'email_outbox'
+    # Workers en proceso por cada worker de gunicorn (0 = solo `flask outbox work`)
+    EMAIL_OUTBOX_WORKERS = int(os.environ.get('EMAIL_OUTBOX_WORKERS', 2))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = 30
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = 3600
+    EMAIL_OUTBOX_LEASE_SECONDS = 120
+    EMAIL_OUTBOX_POLL_SECONDS = 2.0
+    EMAIL_OUTBOX_DRAIN_SECONDS = 10
+    
+    # Transporte de correo: 'http' (API REST con conexiones keep-alive por
+    # worker), 'sdk' (SDK de Resend, una conexión por envío) o 'capture' (no envía)
+    EMAIL_TRANSPORT = os.environ.get('EMAIL_TRANSPORT', 'http')
+    EMAIL_HTTP_BASE_URL = os.environ.get('EMAIL_HTTP_BASE_URL')
+    EMAIL_HTTP_CONNECT_TIMEOUT = 3.0
+    EMAIL_HTTP_READ_TIMEOUT = 10.0
+    EMAIL_HTTP_POOL_SIZE = int(os.environ.get('EMAIL_HTTP_POOL_SIZE', '10'))
+    
+    # Circuit breaker del proveedor de correo: se abre tras N fallos seguidos y
+    # prueba de nuevo pasados EMAIL_BREAKER_RECOVERY_SECONDS
+    EMAIL_BREAKER_ENABLED = os.environ.get('EMAIL_BREAKER_ENABLED', 'true').lower() == 'true'
+    EMAIL_BREAKER_FAILURE_THRESHOLD = 5
+    EMAIL_BREAKER_RECOVERY_SECONDS = 30
+    # Spool local (NDJSON) de los correos que fallan fuera del outbox
+    # (`flask emails replay-spool` los reenvía)
+    EMAIL_SPOOL_ENABLED = os.environ.get('EMAIL_SPOOL_ENABLED', 'true').lower() == 'true'
+    EMAIL_SPOOL_PATH = os.environ.get('EMAIL_SPOOL_PATH', os.path.join(BASE_DIR, 'var', 'email-spool.ndjson'))
+    
+    # Campañas de anuncios (`flask campaigns`): correos por llamada al endpoint
+    # batch, lotes en vuelo y llamadas por segundo al proveedor (Resend permite 2)
+    CAMPAIGN_COLLECTION = 'email_campaigns'
+    CAMPAIGN_BATCH_SIZE = int(os.environ.get('CAMPAIGN_BATCH_SIZE', 100))
+    CAMPAIGN_CONCURRENCY = int(os.environ.get('CAMPAIGN_CONCURRENCY', 2))
+    CAMPAIGN_RATE = float(os.environ.get('CAMPAIGN_RATE', 2))
+    # Reintentos de un lote (con backoff exponencial) antes de pausar la campaña
+    CAMPAIGN_MAX_RETRIES = 3
+    CAMPAIGN_RETRY_BACKOFF_SECONDS = 2.0
+    # Segundos que una campaña queda reservada a su runner sin renovar el lease
+    CAMPAIGN_LEASE_SECONDS = 300
+    
+    # Assets estáticos con hash (`flask assets build`)
+    # URL pública (o CDN) desde la que se sirven; sin ella los correos usan el logo remoto
+    ASSETS_BASE_URL = os.environ.get('ASSETS_BASE_URL')
+    ASSETS_VARIANT_WIDTHS = (180, 360, 640, 1280)
+    ASSETS_SOURCE_DIR = os.path.join(BASE_DIR, 'static', 'images')
+    ASSETS_OUTPUT_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+    
+    # Capa HTTP (app/utils/http_edge.py)
+    # Segundos que el navegador cachea la respuesta del preflight CORS
+    CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 86400))
+    # Ajustes por blueprint: 'default' aplica a todos y cada blueprint sobreescribe claves
+    HTTP_EDGE_SETTINGS = {
+        'default': {'compress': True, 'compress_min_size': 1024, 'etag': True},
+        'users': {'compress_min_size': 512},
+        # Las imágenes ya van comprimidas y traen su propio ETag
+        'assets': {'compress': False, 'etag': False},
+    }
+    
+    # Rate limiting (app/utils/rate_limit.py)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    # 'memory' (por worker) o 'mongo' (compartido entre workers y hosts)
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_COLLECTION = 'rate_limits'
+    # Usar X-Forwarded-For (solo detrás de un proxy de confianza)
+    RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+    # Proxies de confianza delante de la API: la IP del cliente es la entrada
+    # que añadió el más externo, contando desde la derecha de X-Forwarded-For
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '1'))
+    # Peticiones permitidas ('limit') por ventana de 'period' segundos, por 'key'
+    RATE_LIMITS = {
+        'register': {'limit': 10, 'period': 60, 'key': 'ip'},
+        'register_bulk': {'limit': 5, 'period': 60, 'key': 'ip'},
+        'verify_phrase': {'limit': 5, 'period': 60, 'key': 'ip'},
+    }
+    
+    # Control de admisión (app/utils/admission.py): peticiones en curso por
+    # clase de rutas en cada worker, con una cola corta; lo que no cabe recibe
+    # 503 con Retry-After. Solo tiene efecto con workers que atienden varias
+    # peticiones a la vez (gunicorn --threads, modo ASGI)
+    ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+    # Endpoints que nunca se limitan (health check y métricas)
+    ADMISSION_EXEMPT_ENDPOINTS = ('home', 'metrics.metrics')
+    # Clase de cada endpoint; los que no aparecen van a 'default'
+    ADMISSION_ROUTE_CLASSES = {
+        'users.register': 'register',
+        'users.register_bulk': 'bulk',
+        'users.export_users': 'bulk',
+        'users.verify_secret_phrase': 'light',
+        'users.get_own_profile': 'light',
+    }
+    # 'default' aplica a todas las clases y cada clase sobreescribe claves
+    # (ver DEFAULT_ADMISSION_SETTINGS)
+    ADMISSION_LIMITS = {
+        'default': {'limit': 32, 'min_limit': 4, 'max_limit': 64, 'queue': 16,
+                    'queue_timeout': 0.1, 'target_latency': 0.25},
+        'register': {'limit': 16, 'min_limit': 2, 'max_limit': 32, 'queue': 8,
+                     'queue_timeout': 0.2, 'target_latency': 0.5},
+        'bulk': {'limit': 2, 'min_limit': 1, 'max_limit': 4, 'queue': 0, 'target_latency': 10},
+        'light': {'target_latency': 0.05},
+        # Registro async del modo ASGI: cientos de peticiones en vuelo por proceso
+        'register_async': {'limit': 100, 'min_limit': 10, 'max_limit': 400, 'queue': 0,
+                           'target_latency': 0.5},
+    }
+    
+    # Cabecera Idempotency-Key en /register: respuestas guardadas en MongoDB
+    # (con TTL) y en una caché en proceso
+    IDEMPOTENCY_ENABLED = os.environ.get('IDEMPOTENCY_ENABLED', 'true').lower() == 'true'
+    IDEMPOTENCY_COLLECTION = 'idempotency_keys'
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 3600))
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+    # Tiempo que una petición reserva su clave y máximo que espera un reintento concurrente
+    IDEMPOTENCY_LOCK_SECONDS = 30
+    IDEMPOTENCY_WAIT_SECONDS = 10
+    
+    # Métricas de Prometheus (/metrics). Con varios workers de gunicorn hay que
+    # definir PROMETHEUS_MULTIPROC_DIR (ver gunicorn.conf.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Cabecera Server-Timing con las fases de cada petición (validación, insert, token, correo...)
+    # (desactivada por defecto: expone a cualquier cliente cuánto tarda cada fase)
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+    # Registrar en el log las peticiones que tarden más (vacío o sin definir para desactivar)
+    SLOW_REQUEST_THRESHOLD_MS = (
+        float(os.environ['SLOW_REQUEST_THRESHOLD_MS']) if os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '').strip() else None
+    )
+    # Perfilado con cProfile: 'off', 'header' (peticiones con PROFILING_HEADER) o 'all'
+    PROFILING = os.environ.get('PROFILING', 'off')
+    PROFILING_HEADER = 'X-Profile'
+    # Si se define, la cabecera debe llevar este valor
+    PROFILING_SECRET = os.environ.get('PROFILING_SECRET')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/profiles')
+    
+    # Modo ASGI (app/asgi.py): conexiones de Motor y del cliente HTTP de Resend
+    ASGI_MONGO_POOL_SIZE = int(os.environ.get('ASGI_MONGO_POOL_SIZE', '100'))
+    ASGI_EMAIL_MAX_CONNECTIONS = int(os.environ.get('ASGI_EMAIL_MAX_CONNECTIONS', '100'))
+    ASGI_EMAIL_TIMEOUT = float(os.environ.get('ASGI_EMAIL_TIMEOUT', '10'))
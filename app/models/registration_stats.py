@@ -0,0 +1,159 @@
+from collections import Counter
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+from app.extensions import mongo
+from app.utils.db import get_collection, record_round_trip
+
+class RegistrationStats:
+    """
+    Contadores de registros por día, userType y país, mantenidos en escritura
+    """
+
+    COLLECTION = 'registration_stats'
+
+    # Un documento por bucket; el índice único hace atómico el upsert con $inc
+    INDEXES = [
+        IndexModel([('day', DESCENDING), ('userType', ASCENDING), ('country', ASCENDING)],
+                   name='day_userType_country', unique=True),
+    ]
+
+    @staticmethod
+    def bucket_key(user_data):
+        """
+        Bucket al que pertenece un usuario
+
+        Args:
+            user_data (dict): Usuario con registrationDate, userType y country
+
+        Returns:
+            tuple: (día a medianoche UTC, userType, country)
+        """
+        registered = user_data['registrationDate']
+        day = datetime(registered.year, registered.month, registered.day)
+        return day, user_data.get('userType'), user_data.get('country')
+
+    @staticmethod
+    def _increment(day, user_type, country, amount):
+        return UpdateOne(
+            {'day': day, 'userType': user_type, 'country': country},
+            {'$inc': {'count': amount}},
+            upsert=True
+        )
+
+    @staticmethod
+    def record(user_data):
+        """
+        Sumar un registro a su bucket con un upsert atómico
+
+        Args:
+            user_data (dict): Usuario recién insertado
+        """
+        day, user_type, country = RegistrationStats.bucket_key(user_data)
+        get_collection(RegistrationStats.COLLECTION, 'register').update_one(
+            {'day': day, 'userType': user_type, 'country': country},
+            {'$inc': {'count': 1}},
+            upsert=True
+        )
+        record_round_trip(RegistrationStats.COLLECTION, 'update_one')
+
+    @staticmethod
+    def record_many(users_data):
+        """
+        Sumar un lote de registros: un $inc por bucket en un único bulk_write
+
+        Args:
+            users_data (list): Usuarios recién insertados
+        """
+        buckets = Counter(RegistrationStats.bucket_key(user_data) for user_data in users_data)
+        if not buckets:
+            return
+        get_collection(RegistrationStats.COLLECTION, 'register_bulk').bulk_write(
+            [RegistrationStats._increment(day, user_type, country, amount)
+             for (day, user_type, country), amount in buckets.items()],
+            ordered=False
+        )
+        record_round_trip(RegistrationStats.COLLECTION, 'bulk_write')
+
+    @staticmethod
+    def query(day_from=None, day_to=None, user_type=None, country=None):
+        """
+        Leer los buckets de un rango; el coste depende del número de buckets,
+        no del tamaño de la colección users. El rango es semiabierto
+        [day_from, day_to), igual que el listado y la exportación
+
+        Args:
+            day_from (datetime): Primer día (incluido)
+            day_to (datetime): Día en que termina el rango (excluido)
+            user_type (str): Filtrar por userType
+            country (str): Filtrar por país
+
+        Returns:
+            dict: Buckets y totales por día, userType y país
+        """
+        query = {}
+        if day_from or day_to:
+            query['day'] = {}
+            if day_from:
+                query['day']['$gte'] = day_from
+            if day_to:
+                query['day']['$lt'] = day_to
+        if user_type:
+            query['userType'] = user_type
+        if country:
+            query['country'] = country
+
+        buckets = list(mongo.db[RegistrationStats.COLLECTION].find(query, {'_id': 0}).sort('day', DESCENDING))
+        record_round_trip(RegistrationStats.COLLECTION, 'find')
+
+        by_day, by_user_type, by_country = Counter(), Counter(), Counter()
+        for bucket in buckets:
+            by_day[bucket['day'].date().isoformat()] += bucket['count']
+            by_user_type[bucket['userType']] += bucket['count']
+            by_country[bucket['country']] += bucket['count']
+
+        return {
+            'total': sum(by_day.values()),
+            'by_day': dict(by_day),
+            'by_user_type': dict(by_user_type),
+            'by_country': dict(by_country),
+            'buckets': buckets
+        }
+
+    @staticmethod
+    def rebuild():
+        """
+        Recalcular todos los buckets a partir de la colección users
+
+        El resultado se escribe con $out, que reemplaza la colección de una vez
+        y conserva sus índices. Los registros que entren durante el rebuild
+        pueden quedar fuera: conviene lanzarlo en horas valle.
+
+        Returns:
+            int: Número de buckets generados
+        """
+        mongo.db.users.aggregate([
+            {'$match': {'registrationDate': {'$type': 'date'}}},
+            {'$group': {
+                '_id': {
+                    'day': {'$dateFromParts': {
+                        'year': {'$year': '$registrationDate'},
+                        'month': {'$month': '$registrationDate'},
+                        'day': {'$dayOfMonth': '$registrationDate'},
+                    }},
+                    'userType': '$userType',
+                    'country': '$country',
+                },
+                'count': {'$sum': 1},
+            }},
+            {'$project': {
+                '_id': 0,
+                'day': '$_id.day',
+                'userType': '$_id.userType',
+                'country': '$_id.country',
+                'count': 1,
+            }},
+            {'$out': RegistrationStats.COLLECTION},
+        ], allowDiskUse=True)
+        return mongo.db[RegistrationStats.COLLECTION].count_documents({})
@@ -0,0 +1,97 @@
+import re
+
+# Patrón de email (el mismo que usaba User.validate_email)
+EMAIL_PATTERN = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
+
+# Esquema declarativo de usuarios. 'base' aplica a todos los tipos; el resto
+# se añade según userType. Cada campo admite:
+#   required (bool): el valor debe existir y no estar vacío
+#   message (str): mensaje si falta (por defecto "El campo X es requerido")
+#   pattern (str): expresión regular que debe cumplir el valor
+#   pattern_message (str): mensaje si no cumple el patrón
+_PERSON_FIELDS = {
+    'interestArea': {'required': True},
+    'toolsUsed': {'required': True},
+    'projectDescription': {'required': True},
+}
+
+USER_SCHEMAS = {
+    'base': {
+        'name': {'required': True},
+        'email': {
+            'required': True,
+            'pattern': EMAIL_PATTERN,
+            'pattern_message': "El formato del email no es válido",
+        },
+        'country': {'required': True},
+        'userType': {'required': True},
+    },
+    'Empresa': {
+        'company': {'required': True, 'message': "El campo company es requerido para empresas"},
+        'automationNeeds': {'required': True, 'message': "El campo automationNeeds es requerido para empresas"},
+    },
+    'Emprendedor': _PERSON_FIELDS,
+    'Freelancer': _PERSON_FIELDS,
+    'Persona': _PERSON_FIELDS,
+}
+
+
+def compile_fields(fields):
+    """Compilar las reglas de cada campo en tuplas (campo, requerido, mensaje, regex, mensaje de patrón)"""
+    checks = []
+    for field, rules in fields.items():
+        pattern = rules.get('pattern')
+        checks.append((
+            field,
+            rules.get('required', False),
+            rules.get('message', f"El campo {field} es requerido"),
+            re.compile(pattern).match if pattern else None,
+            rules.get('pattern_message', f"El formato del campo {field} no es válido"),
+        ))
+    return tuple(checks)
+
+
+def _run_checks(checks, data, errors):
+    for field, required, message, match, pattern_message in checks:
+        value = data.get(field)
+        if not value:
+            if required:
+                errors.append(message)
+            continue
+        if match is not None and not (isinstance(value, str) and match(value)):
+            errors.append(pattern_message)
+
+
+class SchemaValidator:
+    """Validador compilado de un esquema por tipo de usuario; devuelve todos los errores a la vez"""
+
+    def __init__(self, schemas, type_field='userType'):
+        self.type_field = type_field
+        self.base_checks = compile_fields(schemas.get('base', {}))
+        self.type_checks = {
+            user_type: compile_fields(fields)
+            for user_type, fields in schemas.items()
+            if user_type != 'base'
+        }
+
+    def validate(self, data):
+        """Mensajes de error de un documento (lista vacía si es válido)"""
+        if not isinstance(data, dict):
+            return ["Los datos del usuario deben ser un objeto"]
+
+        errors = []
+        _run_checks(self.base_checks, data, errors)
+
+        checks = self.type_checks.get(data.get(self.type_field))
+        if checks:
+            _run_checks(checks, data, errors)
+        return errors
+
+    def validate_many(self, rows):
+        """Errores de cada documento de una lista, en el mismo orden (rutas masivas)"""
+        validate = self.validate
+        return [validate(row) for row in rows]
+
+
+# Validador de usuarios compilado al importar el módulo
+user_validator = SchemaValidator(USER_SCHEMAS)
@@ -1,17 +1,98 @@
 from datetime import datetime
+import base64
 import re
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import current_app
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import BulkWriteError
 from app.extensions import mongo
+from app.models.registration_stats import RegistrationStats
+from app.models.schemas import EMAIL_PATTERN, user_validator
+from app.utils.db import get_collection, record_round_trip
+from app.utils.group_commit import GroupCommitter
+from app.utils.user_cache import get_cached_user, invalidate_user
+from app.utils.timing import span
+
+EMAIL_REGEX = re.compile(EMAIL_PATTERN)
 
 class User:
     """
     Clase para manejar las operaciones con usuarios en MongoDB
     """
     
+    # Tamaño de cada insert_many en los registros masivos
+    BULK_CHUNK_SIZE = 500
+    
+    # Índices de la colección users (se crean con `flask db ensure-indexes`).
+    # El email no es único: se permiten registros repetidos en pruebas.
+    INDEXES = [
+        IndexModel([('email', ASCENDING)], name='email'),
+        # Orden del listado paginado (keyset sobre registrationDate, _id)
+        IndexModel([('registrationDate', DESCENDING), ('_id', DESCENDING)], name='registrationDate_id'),
+        # Filtros de administración; el sufijo sirve el mismo orden sin SORT en memoria
+        IndexModel([('userType', ASCENDING), ('country', ASCENDING),
+                    ('registrationDate', DESCENDING), ('_id', DESCENDING)],
+                   name='userType_country_registrationDate_id'),
+    ]
+    
+    # Orden estable del listado: más recientes primero
+    LIST_SORT = [('registrationDate', DESCENDING), ('_id', DESCENDING)]
+    
+    # Campos que se pueden pedir en el listado y la exportación
+    LIST_FIELDS = ('name', 'email', 'phone', 'country', 'userType', 'company',
+                   'automationNeeds', 'interestArea', 'toolsUsed', 'projectDescription',
+                   'registrationDate', 'isVerified')
+    DEFAULT_LIST_FIELDS = ('name', 'email', 'phone', 'country', 'userType', 'registrationDate')
+    
+    # Campos del perfil que devuelve GET /me (lo único que se guarda en la caché)
+    PROFILE_FIELDS = LIST_FIELDS
+    # Campos que el propio usuario puede cambiar; email y userType quedan fijos
+    PROFILE_EDITABLE_FIELDS = ('name', 'phone', 'country', 'company', 'automationNeeds',
+                               'interestArea', 'toolsUsed', 'projectDescription')
+    
+    # Formas de consulta del modelo, para revisar sus planes con explain()
+    QUERY_SHAPES = {
+        'find_by_email': {
+            'filter': {'email': 'usuario@example.com'}
+        },
+        'registrations_since': {
+            'filter': {'registrationDate': {'$gte': datetime(2025, 1, 1)}},
+            'sort': [('registrationDate', DESCENDING)]
+        },
+        'by_user_type_and_country': {
+            'filter': {'userType': 'Empresa', 'country': 'Colombia'}
+        },
+        'list_page': {
+            'filter': {'$or': [
+                {'registrationDate': {'$lt': datetime(2025, 1, 1)}},
+                {'registrationDate': datetime(2025, 1, 1), '_id': {'$lt': ObjectId('000000000000000000000000')}},
+            ]},
+            'sort': [('registrationDate', DESCENDING), ('_id', DESCENDING)]
+        },
+        'list_page_by_user_type_and_country': {
+            'filter': {'userType': 'Empresa', 'country': 'Colombia'},
+            'sort': [('registrationDate', DESCENDING), ('_id', DESCENDING)]
+        },
+    }
+    
     @staticmethod
     def validate_email(email):
         """Validar formato de email"""
-        email_pattern = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
-        return bool(re.match(email_pattern, email))
+        return bool(EMAIL_REGEX.match(email))
+    
+    @staticmethod
+    def validate_user(user_data):
+        """
+        Validar los datos de un usuario con el esquema de su userType
+        
+        Args:
+            user_data (dict): Datos del usuario a validar
+            
+        Returns:
+            list: Todos los mensajes de error (vacía si los datos son válidos)
+        """
+        return user_validator.validate(user_data)
     
     @staticmethod
     def create_user(user_data):
@@ -24,30 +105,10 @@ class User:
         Returns:
             tuple: (bool, dict or str) - (éxito, datos del usuario o mensaje de error)
         """
-        # Validar campos requeridos (se elimina "phone" para que sea opcional)
-        required_fields = ['name', 'email', 'country', 'userType']
-        for field in required_fields:
-            if field not in user_data or not user_data[field]:
-                return False, f"El campo {field} es requerido"
-        
-        # Validar email
-        if not User.validate_email(user_data['email']):
-            return False, "El formato del email no es válido"
-        
-        # Validar campos específicos según tipo de usuario
-        if user_data['userType'] == 'Empresa':
-            if 'company' not in user_data or not user_data['company']:
-                return False, "El campo company es requerido para empresas"
-            if 'automationNeeds' not in user_data or not user_data['automationNeeds']:
-                return False, "El campo automationNeeds es requerido para empresas"
-        
-        elif user_data['userType'] in ['Emprendedor', 'Freelancer', 'Persona']:
-            if 'interestArea' not in user_data or not user_data['interestArea']:
-                return False, "El campo interestArea es requerido"
-            if 'toolsUsed' not in user_data or not user_data['toolsUsed']:
-                return False, "El campo toolsUsed es requerido"
-            if 'projectDescription' not in user_data or not user_data['projectDescription']:
-                return False, "El campo projectDescription es requerido"
+        with span('validation'):
+            errors = User.validate_user(user_data)
+        if errors:
+            return False, '. '.join(errors)
         
         # La siguiente verificación de email duplicado se ha eliminado para permitir
         # registros múltiples con el mismo correo en entorno de pruebas
@@ -59,22 +120,289 @@ class User:
         user_data['registrationDate'] = datetime.utcnow()
         user_data['isVerified'] = False
         
-        # Insertar en la base de datos
-        result = mongo.db.users.insert_one(user_data)
+        if current_app.config.get('GROUP_COMMIT_ENABLED'):
+            # Un insert_many (y un upsert de contadores) compartido con los
+            # registros concurrentes del proceso
+            with span('group_commit'):
+                User.get_group_committer().insert(user_data)
+            record_round_trip('users', 'insert_many')
+            return True, user_data
+        
+        # Insertar en la base de datos. Son dos round trips: el insert y el upsert
+        # de registration_stats, que al ser otra colección no cabe en el mismo batch
+        with span('insert_one'):
+            result = get_collection('users', 'register').insert_one(user_data)
+        record_round_trip('users', 'insert_one')
         
         if result.inserted_id:
-            # Recuperar el usuario insertado
-            new_user = mongo.db.users.find_one({'_id': result.inserted_id})
-            # Convertir ObjectId a string para poder serializarlo a JSON
-            new_user['_id'] = str(new_user['_id'])
-            return True, new_user
+            with span('stats'):
+                User.record_stats([user_data])
+            # El documento insertado (ya con su _id) es el usuario: no hace falta releerlo
+            return True, user_data
         
         return False, "Error al crear el usuario"
     
+    @staticmethod
+    def get_group_committer():
+        """
+        Group commit de los registros de la aplicación actual (uno por proceso)
+        
+        Returns:
+            GroupCommitter: Agrupador de inserts de la colección users
+        """
+        committer = current_app.extensions.get('users_group_commit')
+        if committer is None:
+            committer = current_app.extensions.setdefault('users_group_commit', GroupCommitter(
+                lambda documents: get_collection('users', 'register').insert_many(documents, ordered=False),
+                window=current_app.config.get('GROUP_COMMIT_WINDOW_MS', 2) / 1000,
+                max_docs=current_app.config.get('GROUP_COMMIT_MAX_DOCS', 64),
+                on_flush=User.record_stats
+            ))
+        return committer
+    
+    @staticmethod
+    def create_users(users_data, chunk_size=None):
+        """
+        Crear varios usuarios con insert_many no ordenado, por bloques
+        
+        Args:
+            users_data (list): Lista de usuarios a crear
+            chunk_size (int): Documentos por cada insert_many
+        
+        Returns:
+            list: Un resultado (bool, dict or str) por fila, en el mismo orden
+        """
+        chunk_size = chunk_size or User.BULK_CHUNK_SIZE
+        results = [None] * len(users_data)
+        
+        # Validar todas las filas antes de escribir
+        valid_rows = []
+        for index, errors in enumerate(user_validator.validate_many(users_data)):
+            if errors:
+                results[index] = (False, '. '.join(errors))
+                continue
+            user_data = users_data[index]
+            user_data['registrationDate'] = datetime.utcnow()
+            user_data['isVerified'] = False
+            valid_rows.append(index)
+        
+        # Insertar las filas válidas por bloques; un fallo no detiene al resto
+        for start in range(0, len(valid_rows), chunk_size):
+            chunk = valid_rows[start:start + chunk_size]
+            documents = [users_data[index] for index in chunk]
+            failed = {}
+            try:
+                get_collection('users', 'register_bulk').insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                for write_error in e.details.get('writeErrors', []):
+                    failed[write_error['index']] = write_error.get('errmsg', "Error al crear el usuario")
+            record_round_trip('users', 'insert_many')
+            
+            for position, index in enumerate(chunk):
+                if position in failed:
+                    results[index] = (False, failed[position])
+                else:
+                    results[index] = (True, users_data[index])
+            
+            User.record_stats([users_data[index] for position, index in enumerate(chunk)
+                               if position not in failed])
+        
+        return results
+    
+    @staticmethod
+    def record_stats(users_data):
+        """
+        Actualizar los contadores de registros; un fallo aquí no anula el registro
+        (los contadores se pueden recalcular con `flask stats rebuild`)
+        """
+        if not users_data:
+            return
+        try:
+            if len(users_data) == 1:
+                RegistrationStats.record(users_data[0])
+            else:
+                RegistrationStats.record_many(users_data)
+        except Exception as e:
+            current_app.logger.error(f"Error al actualizar los contadores de registros: {str(e)}")
+    
     @staticmethod
     def find_by_email(email):
         """Buscar usuario por email"""
         user = mongo.db.users.find_one({'email': email})
-        if user:
-            user['_id'] = str(user['_id'])
+        record_round_trip('users', 'find_one')
+        return user
+    
+    @staticmethod
+    def load_profile(user_id):
+        """
+        Leer el perfil de un usuario de MongoDB, sin caché
+        
+        Args:
+            user_id (str): _id del usuario en texto
+            
+        Returns:
+            dict or None: Perfil con los campos de PROFILE_FIELDS
+        """
+        try:
+            object_id = ObjectId(user_id)
+        except (InvalidId, TypeError):
+            return None
+        projection = {field: 1 for field in User.PROFILE_FIELDS}
+        user = mongo.db.users.find_one({'_id': object_id}, projection)
+        record_round_trip('users', 'find_one')
         return user
+    
+    @staticmethod
+    def get_profile(user_id):
+        """Perfil de un usuario a través de la caché del worker (read-through)"""
+        return get_cached_user(str(user_id), User.load_profile)
+    
+    @staticmethod
+    def update_profile(user_id, changes):
+        """
+        Actualizar los campos editables del perfil e invalidar su caché
+        
+        Args:
+            user_id (str): _id del usuario en texto
+            changes (dict): Campos a cambiar (solo PROFILE_EDITABLE_FIELDS)
+            
+        Returns:
+            tuple: (bool, dict or str or None) - (éxito, perfil actualizado o
+                mensaje de error); None si el usuario no existe
+        """
+        not_editable = sorted(set(changes) - set(User.PROFILE_EDITABLE_FIELDS))
+        if not_editable:
+            return False, f"Campos no editables: {', '.join(not_editable)}"
+        
+        user = User.load_profile(user_id)
+        if user is None:
+            return False, None
+        
+        # Validar el perfil completo tal y como quedaría
+        updated = {**user, **changes}
+        errors = User.validate_user(updated)
+        if errors:
+            return False, '. '.join(errors)
+        
+        if changes:
+            get_collection('users', 'admin').update_one({'_id': user['_id']}, {'$set': changes})
+            record_round_trip('users', 'update_one')
+            invalidate_user(user_id)
+        return True, updated
+    
+    @staticmethod
+    def encode_cursor(user):
+        """Cursor opaco que apunta justo después de un usuario en LIST_SORT"""
+        raw = f"{user['registrationDate'].isoformat()}|{user['_id']}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decodificar un cursor de paginación
+        
+        Returns:
+            tuple: (datetime, ObjectId)
+            
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            date_part, id_part = raw.split('|')
+            return datetime.fromisoformat(date_part), ObjectId(id_part)
+        except (ValueError, UnicodeError, InvalidId) as e:
+            raise ValueError("Cursor inválido") from e
+    
+    @staticmethod
+    def build_list_filter(user_type=None, country=None, registered_from=None, registered_to=None, after=None):
+        """
+        Construir el filtro del listado de usuarios
+        
+        Args:
+            user_type (str): Filtrar por userType
+            country (str): Filtrar por país
+            registered_from (datetime): Registrados desde (incluido)
+            registered_to (datetime): Registrados antes de (excluido)
+            after (tuple): (registrationDate, _id) del último usuario de la página anterior
+            
+        Returns:
+            dict: Filtro de MongoDB
+        """
+        query = {}
+        if user_type:
+            query['userType'] = user_type
+        if country:
+            query['country'] = country
+        if registered_from or registered_to:
+            query['registrationDate'] = {}
+            if registered_from:
+                query['registrationDate']['$gte'] = registered_from
+            if registered_to:
+                query['registrationDate']['$lt'] = registered_to
+        if after:
+            last_date, last_id = after
+            # Keyset: todo lo que va después del último documento en LIST_SORT
+            query['$or'] = [
+                {'registrationDate': {'$lt': last_date}},
+                {'registrationDate': last_date, '_id': {'$lt': last_id}},
+            ]
+        return query
+    
+    @staticmethod
+    def build_projection(fields=None):
+        """Proyección con los campos pedidos (siempre incluye las claves del orden)"""
+        fields = [field for field in (fields or User.DEFAULT_LIST_FIELDS) if field in User.LIST_FIELDS]
+        projection = {field: 1 for field in fields}
+        projection['registrationDate'] = 1
+        return projection
+    
+    @staticmethod
+    def list_users(filters, fields=None, cursor=None, limit=50):
+        """
+        Página de usuarios con paginación keyset sobre (registrationDate, _id)
+        
+        El coste de cada página no depende de cuántas haya antes: no hay skip.
+        
+        Args:
+            filters (dict): Argumentos de build_list_filter (sin 'after')
+            fields (list): Campos a devolver
+            cursor (str): Cursor devuelto por la página anterior
+            limit (int): Tamaño de página
+            
+        Returns:
+            tuple: (list, str or None) - (usuarios, cursor de la siguiente página)
+        """
+        after = User.decode_cursor(cursor) if cursor else None
+        query = User.build_list_filter(after=after, **filters)
+        
+        users = list(mongo.db.users.find(query, User.build_projection(fields))
+                     .sort(User.LIST_SORT)
+                     .limit(limit + 1))
+        record_round_trip('users', 'find')
+        
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = User.encode_cursor(users[-1])
+        return users, next_cursor
+    
+    @staticmethod
+    def iter_users(filters, fields=None, batch_size=1000):
+        """
+        Recorrer todos los usuarios del filtro con un cursor del servidor
+        
+        Los documentos llegan en lotes de batch_size, así que la memoria es
+        constante sin importar cuántos usuarios haya.
+        
+        Args:
+            filters (dict): Argumentos de build_list_filter (sin 'after')
+            fields (list): Campos a devolver
+            batch_size (int): Documentos por lote del cursor
+            
+        Returns:
+            Cursor: Cursor de PyMongo
+        """
+        return (mongo.db.users.find(User.build_list_filter(**filters), User.build_projection(fields))
+                .sort(User.LIST_SORT)
+                .batch_size(batch_size))
@@ -1,11 +1,26 @@
-from flask import Blueprint, request, jsonify, current_app
+import csv
+import io
+import os
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from app.models.registration_stats import RegistrationStats
 from app.models.user import User
-from app.utils.auth import generate_token
-from app.utils.email_sender import send_welcome_email, notify_admin_new_registration
+from app.utils.auth import generate_token, admin_required, token_required, token_cache_stats
+from app.utils.idempotency import idempotent
+from app.utils.rate_limit import rate_limit
+from app.utils.timing import span
+from app.utils.user_cache import user_cache_stats
+from app.utils.email_sender import (
+    send_welcome_email, notify_admin_new_registration,
+    send_welcome_emails_batch, notify_admin_bulk_registration
+)
+from app.utils.email_outbox import enqueue_registration_emails, enqueue_bulk_registration_emails
 
 user_bp = Blueprint('users', __name__)
 
 @user_bp.route('/register', methods=['POST'])
+@rate_limit('register')
+@idempotent('register')
 def register():
     """
     Endpoint para registrar un nuevo usuario
@@ -19,7 +34,8 @@ def register():
     
     if success:
         # Generar token para el usuario
-        token = generate_token(str(result['_id']))
+        with span('generate_token'):
+            token = generate_token(str(result['_id']))
         
         # Preparar respuesta con datos básicos y token
         response = {
@@ -32,27 +48,124 @@ def register():
             'token': token
         }
         
-        # Enviar correo de bienvenida al usuario
-        try:
-            send_welcome_email(result)
-            current_app.logger.info(f"Correo de bienvenida enviado a {result['email']}")
-        except Exception as e:
-            # Registro del error pero continuamos con el flujo
-            current_app.logger.error(f"Error al enviar correo de bienvenida: {str(e)}")
+        # Encolar los correos en el outbox; los envía el pool de workers
+        if current_app.config.get('EMAIL_OUTBOX_ENABLED', True):
+            try:
+                with span('enqueue_emails'):
+                    enqueue_registration_emails(result)
+            except Exception as e:
+                # Registro del error pero continuamos con el flujo
+                current_app.logger.error(f"Error al encolar correos de registro: {str(e)}")
+        else:
+            # Enviar correo de bienvenida al usuario
+            try:
+                with span('welcome_email'):
+                    send_welcome_email(result)
+                current_app.logger.info(f"Correo de bienvenida enviado a {result['email']}")
+            except Exception as e:
+                # Registro del error pero continuamos con el flujo
+                current_app.logger.error(f"Error al enviar correo de bienvenida: {str(e)}")
         
-        # Enviar notificación a los administradores
-        try:
-            notify_admin_new_registration(result)
-            current_app.logger.info("Notificación de nuevo registro enviada a los administradores")
-        except Exception as e:
-            # Registro del error pero continuamos con el flujo
-            current_app.logger.error(f"Error al enviar notificación a administradores: {str(e)}")
+            # Enviar notificación a los administradores
+            try:
+                with span('admin_email'):
+                    notify_admin_new_registration(result)
+                current_app.logger.info("Notificación de nuevo registro enviada a los administradores")
+            except Exception as e:
+                # Registro del error pero continuamos con el flujo
+                current_app.logger.error(f"Error al enviar notificación a administradores: {str(e)}")
         
         return jsonify(response), 201
     else:
         return jsonify({'message': result}), 400
 
+def parse_bulk_rows():
+    """
+    Leer las filas de un registro masivo: array JSON o NDJSON (un objeto por línea)
+    
+    Returns:
+        tuple: (list or None, list or str) - (filas, errores de parseo por fila o mensaje de error)
+    """
+    raw = request.get_data(as_text=True)
+    is_ndjson = 'ndjson' in (request.content_type or '') or not raw.lstrip().startswith('[')
+    
+    if not is_ndjson:
+        try:
+            rows = current_app.json.loads(raw)
+        except ValueError:
+            return None, "El cuerpo no es un JSON válido"
+        return rows, [None] * len(rows)
+    
+    rows, parse_errors = [], []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(current_app.json.loads(line))
+            parse_errors.append(None)
+        except ValueError:
+            rows.append(None)
+            parse_errors.append("La línea no es un JSON válido")
+    return rows, parse_errors
+
+@user_bp.route('/register/bulk', methods=['POST'])
+@rate_limit('register_bulk')
+def register_bulk():
+    """
+    Endpoint para registrar muchos usuarios en una sola petición
+    """
+    rows, parse_errors = parse_bulk_rows()
+    
+    if rows is None:
+        return jsonify({'message': parse_errors}), 400
+    if not rows:
+        return jsonify({'message': 'No se proporcionaron datos'}), 400
+    
+    max_rows = current_app.config.get('BULK_REGISTER_MAX_ROWS', 5000)
+    if len(rows) > max_rows:
+        return jsonify({'message': f'Máximo {max_rows} usuarios por petición'}), 413
+    
+    # Solo se intentan crear las filas que se pudieron parsear
+    parsed = [index for index, error in enumerate(parse_errors) if error is None]
+    created_results = User.create_users([rows[index] for index in parsed])
+    
+    results = [{'index': index, 'success': False, 'message': error}
+               for index, error in enumerate(parse_errors)]
+    created_users = []
+    for index, (success, result) in zip(parsed, created_results):
+        if success:
+            created_users.append(result)
+            results[index] = {
+                'index': index,
+                'success': True,
+                '_id': result['_id'],
+                'email': result['email'],
+                'token': generate_token(str(result['_id']))
+            }
+        else:
+            results[index] = {'index': index, 'success': False, 'message': result}
+    
+    # Correos agrupados: bienvenidas por lotes y un único resumen para administradores
+    if created_users:
+        try:
+            if current_app.config.get('EMAIL_OUTBOX_ENABLED', True):
+                enqueue_bulk_registration_emails(created_users)
+            else:
+                send_welcome_emails_batch(created_users)
+                notify_admin_bulk_registration(created_users)
+        except Exception as e:
+            # Registro del error pero continuamos con el flujo
+            current_app.logger.error(f"Error al enviar correos del registro masivo: {str(e)}")
+    
+    return jsonify({
+        'total': len(rows),
+        'created': len(created_users),
+        'failed': len(rows) - len(created_users),
+        'results': results
+    }), 200
+
 @user_bp.route('/verify-phrase', methods=['POST'])
+@rate_limit('verify_phrase')
 def verify_secret_phrase():
     """
     Endpoint para verificar la frase secreta
@@ -77,3 +190,192 @@ def verify_secret_phrase():
             'success': False,
             'message': 'Frase secreta incorrecta'
         }), 401
+
+@user_bp.route('/me', methods=['GET'])
+@token_required
+def get_own_profile():
+    """
+    Endpoint con el perfil del usuario del token (servido desde la caché del worker)
+    """
+    if request.is_special_access:
+        return jsonify({'message': 'El acceso con frase secreta no tiene perfil'}), 404
+    
+    with span('profile'):
+        user = User.get_profile(request.user_id)
+    if user is None:
+        return jsonify({'message': 'Usuario no encontrado'}), 404
+    
+    return jsonify(user), 200
+
+@user_bp.route('/me', methods=['PATCH'])
+@token_required
+def update_own_profile():
+    """
+    Endpoint para que el usuario del token cambie los campos editables de su perfil
+    """
+    if request.is_special_access:
+        return jsonify({'message': 'El acceso con frase secreta no tiene perfil'}), 404
+    
+    data = request.json
+    if not data or not isinstance(data, dict):
+        return jsonify({'message': 'No se proporcionaron datos'}), 400
+    
+    success, result = User.update_profile(request.user_id, data)
+    if success:
+        return jsonify(result), 200
+    if result is None:
+        return jsonify({'message': 'Usuario no encontrado'}), 404
+    return jsonify({'message': result}), 400
+
+@user_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def cache_stats():
+    """
+    Endpoint con los aciertos y fallos de las cachés de este worker
+    """
+    return jsonify({
+        'pid': os.getpid(),
+        'users': user_cache_stats(),
+        'tokens': token_cache_stats(),
+    }), 200
+
+def parse_list_filters():
+    """
+    Leer los filtros del listado de la query string. Las fechas forman un
+    rango semiabierto: ?from incluido, ?to excluido
+    
+    Returns:
+        dict: Argumentos para User.build_list_filter
+        
+    Raises:
+        ValueError: Si alguna fecha no tiene formato ISO 8601
+    """
+    def parse_date(name):
+        value = request.args.get(name)
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"El parámetro {name} debe ser una fecha ISO 8601")
+    
+    return {
+        'user_type': request.args.get('userType'),
+        'country': request.args.get('country'),
+        'registered_from': parse_date('from'),
+        'registered_to': parse_date('to'),
+    }
+
+def parse_fields():
+    """Campos pedidos en ?fields=a,b,c (None para los de por defecto)"""
+    fields = request.args.get('fields')
+    return [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+@user_bp.route('', methods=['GET'])
+@admin_required
+def list_users():
+    """
+    Endpoint para listar usuarios con paginación por cursor
+    """
+    try:
+        filters = parse_list_filters()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    limit = request.args.get('limit', current_app.config.get('USERS_PAGE_SIZE', 50), type=int)
+    limit = max(1, min(limit, current_app.config.get('USERS_MAX_PAGE_SIZE', 500)))
+    
+    try:
+        users, next_cursor = User.list_users(filters, parse_fields(), request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return jsonify({
+        'users': users,
+        'count': len(users),
+        'next_cursor': next_cursor
+    }), 200
+
+@user_bp.route('/export', methods=['GET'])
+@admin_required
+def export_users():
+    """
+    Endpoint para exportar usuarios en CSV o NDJSON, en streaming
+    """
+    try:
+        filters = parse_list_filters()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'message': 'Formato no soportado: usa csv o ndjson'}), 400
+    
+    fields = [field for field in (parse_fields() or User.DEFAULT_LIST_FIELDS) if field in User.LIST_FIELDS]
+    batch_size = current_app.config.get('USERS_EXPORT_BATCH_SIZE', 1000)
+    # Tamaño aproximado de cada trozo enviado al cliente
+    chunk_bytes = 64 * 1024
+    
+    def generate():
+        cursor = User.iter_users(filters, fields, batch_size)
+        try:
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(['_id'] + fields)
+                for user in cursor:
+                    writer.writerow([user['_id']] + [
+                        value.isoformat() if isinstance(value, datetime) else value
+                        for value in (user.get(field, '') for field in fields)
+                    ])
+                    if buffer.tell() >= chunk_bytes:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+                yield buffer.getvalue()
+            else:
+                lines = []
+                size = 0
+                for user in cursor:
+                    line = current_app.json.dumps(user) + '\n'
+                    lines.append(line)
+                    size += len(line)
+                    if size >= chunk_bytes:
+                        yield ''.join(lines)
+                        lines, size = [], 0
+                yield ''.join(lines)
+        finally:
+            cursor.close()
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=users.{export_format}'}
+    )
+
+@user_bp.route('/stats', methods=['GET'])
+@admin_required
+def registration_stats():
+    """
+    Endpoint con los contadores de registros por día, userType y país
+    """
+    try:
+        filters = parse_list_filters()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # Los contadores son por día: una hora dentro del día no se puede
+    # aplicar y el total no cuadraría con el listado del mismo rango
+    for name, key in (('from', 'registered_from'), ('to', 'registered_to')):
+        value = filters[key]
+        if value and value != datetime.combine(value.date(), datetime.min.time()):
+            return jsonify({'message': f"El parámetro {name} debe ser una fecha sin hora (AAAA-MM-DD)"}), 400
+    
+    stats = RegistrationStats.query(
+        day_from=filters['registered_from'],
+        day_to=filters['registered_to'],
+        user_type=filters['user_type'],
+        country=filters['country']
+    )
+    return jsonify(stats), 200
@@ -0,0 +1,219 @@
+import math
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from app.utils.metrics import ADMISSION_IN_FLIGHT, ADMISSION_LIMIT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED
+
+# Claves del environ WSGI con las que una petición elige su clase de rutas y
+# pide no esperar en la cola (el registro async de app/asgi.py corre dentro
+# del event loop y admite muchas más peticiones en vuelo que un hilo)
+ADMISSION_CLASS_ENVIRON = 'app.admission_class'
+ADMISSION_NOWAIT_ENVIRON = 'app.admission_nowait'
+
+# Crear cada limitador una sola vez aunque lleguen varias peticiones a la vez
+_limiters_lock = threading.Lock()
+
+DEFAULT_ADMISSION_SETTINGS = {
+    # Peticiones en curso permitidas al arrancar y rango en el que se adapta
+    'limit': 32,
+    'min_limit': 4,
+    'max_limit': 64,
+    # Peticiones que pueden esperar un hueco y cuánto esperan como máximo
+    'queue': 16,
+    'queue_timeout': 0.1,
+    # Latencia media objetivo por ventana de `window` peticiones
+    'target_latency': 0.25,
+    'window': 20,
+    # Factor de reducción del límite cuando la ventana supera el objetivo
+    'backoff': 0.75,
+}
+
+
+class AdaptiveLimiter:
+    """
+    Límite de peticiones en curso para una clase de rutas, con una cola de
+    espera acotada y un límite que se adapta a la latencia observada (AIMD).
+
+    Al cerrar cada ventana de peticiones: si la latencia media supera el
+    objetivo el límite se multiplica por `backoff`; si no, y la ventana
+    llegó a usar todo el límite, sube en uno. Así, cuando MongoDB o Resend
+    se ralentizan, el worker deja de aceptar más trabajo del que puede
+    terminar y las rutas baratas siguen respondiendo.
+    """
+
+    def __init__(self, name, limit, min_limit, max_limit, queue, queue_timeout,
+                 target_latency, window, backoff):
+        self.name = name
+        self.limit = limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.window = window
+        self.backoff = backoff
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+        self.latency_ewma = None
+        self._window_latency = 0.0
+        self._window_count = 0
+        self._window_saturated = False
+        self._condition = threading.Condition()
+        ADMISSION_LIMIT.labels(name).set(limit)
+
+    def acquire(self, wait=True):
+        """
+        Reservar un hueco, esperando en la cola si hace falta
+
+        Args:
+            wait (bool): False para rechazar en lugar de esperar en la cola
+
+        Returns:
+            str or None: None si se admite; 'queue_full' o 'timeout' si se rechaza
+        """
+        with self._condition:
+            if self.in_flight < self.limit:
+                return self._admit()
+            if not wait or self.waiting >= self.queue:
+                return self._reject('queue_full')
+
+            self.waiting += 1
+            ADMISSION_QUEUE_DEPTH.labels(self.name).inc()
+            try:
+                admitted = self._condition.wait_for(lambda: self.in_flight < self.limit, self.queue_timeout)
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUE_DEPTH.labels(self.name).dec()
+            if not admitted:
+                return self._reject('timeout')
+            return self._admit()
+
+    def _admit(self):
+        self.in_flight += 1
+        if self.in_flight >= self.limit:
+            self._window_saturated = True
+        ADMISSION_IN_FLIGHT.labels(self.name).inc()
+        return None
+
+    def _reject(self, reason):
+        self.shed += 1
+        ADMISSION_SHED.labels(self.name, reason).inc()
+        return reason
+
+    def release(self, latency):
+        """
+        Liberar el hueco de una petición terminada
+
+        Args:
+            latency (float): Segundos que estuvo en curso
+        """
+        with self._condition:
+            self.in_flight -= 1
+            ADMISSION_IN_FLIGHT.labels(self.name).dec()
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            self._window_latency += latency
+            self._window_count += 1
+            if self._window_count >= self.window:
+                self._adapt(self._window_latency / self._window_count)
+            self._condition.notify()
+
+    def _adapt(self, average):
+        if average > self.target_latency:
+            self.limit = max(self.min_limit, math.floor(self.limit * self.backoff))
+        elif self._window_saturated:
+            self.limit = min(self.max_limit, self.limit + 1)
+        ADMISSION_LIMIT.labels(self.name).set(self.limit)
+        # Si el límite subió, pueden entrar peticiones de la cola
+        self._condition.notify(self.waiting)
+        self._window_latency, self._window_count = 0.0, 0
+        self._window_saturated = self.in_flight >= self.limit
+
+    def retry_after(self):
+        """Segundos sugeridos al cliente: lo que tarda en vaciarse la cola actual"""
+        latency = self.latency_ewma or self.target_latency
+        return max(1, math.ceil(latency * (self.waiting + 1) / max(1, self.limit)))
+
+    def stats(self):
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'queued': self.waiting,
+                'shed': self.shed,
+                'latency_ewma_ms': round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None,
+            }
+
+
+def admission_settings(app, route_class):
+    """
+    Ajustes de una clase de rutas.
+
+    ADMISSION_LIMITS['default'] aplica a todas y cada clase puede
+    sobreescribir claves con su propio nombre.
+    """
+    configured = app.config.get('ADMISSION_LIMITS', {})
+    settings = dict(DEFAULT_ADMISSION_SETTINGS)
+    settings.update(configured.get('default', {}))
+    settings.update(configured.get(route_class, {}))
+    return settings
+
+
+def get_limiter(app, route_class):
+    """Limitador de una clase de rutas (uno por worker)"""
+    limiters = app.extensions.setdefault('admission_limiters', {})
+    limiter = limiters.get(route_class)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = limiters.get(route_class)
+            if limiter is None:
+                limiter = limiters[route_class] = AdaptiveLimiter(route_class, **admission_settings(app, route_class))
+    return limiter
+
+
+def init_admission_control(app):
+    """
+    Control de admisión: limitar las peticiones en curso por clase de rutas.
+
+    Cada endpoint pertenece a una clase (ADMISSION_ROUTE_CLASSES, 'default'
+    si no aparece). Si la clase está llena la petición espera un hueco en
+    una cola corta; si la cola también está llena, o el hueco no llega a
+    tiempo, se responde 503 con Retry-After sin ejecutar la vista. Los
+    endpoints de ADMISSION_EXEMPT_ENDPOINTS (health check, métricas) nunca
+    se limitan.
+
+    Args:
+        app (Flask): Aplicación
+    """
+    if not app.config.get('ADMISSION_CONTROL_ENABLED', True):
+        return
+
+    exempt = frozenset(app.config.get('ADMISSION_EXEMPT_ENDPOINTS', ()))
+    route_classes = app.config.get('ADMISSION_ROUTE_CLASSES', {})
+
+    @app.before_request
+    def admit_request():
+        endpoint = request.endpoint
+        if request.method == 'OPTIONS' or endpoint is None or endpoint in exempt:
+            return None
+
+        route_class = request.environ.get(ADMISSION_CLASS_ENVIRON) or route_classes.get(endpoint, 'default')
+        limiter = get_limiter(app, route_class)
+        rejected = limiter.acquire(wait=not request.environ.get(ADMISSION_NOWAIT_ENVIRON))
+        if rejected:
+            response = jsonify({'message': 'El servicio está saturado. Inténtalo de nuevo en unos segundos.'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(limiter.retry_after())
+            return response
+
+        g.admission = (limiter, time.perf_counter())
+        return None
+
+    @app.teardown_request
+    def release_request(exception=None):
+        admission = g.pop('admission', None)
+        if admission is not None:
+            limiter, start = admission
+            limiter.release(time.perf_counter() - start)
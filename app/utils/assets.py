@@ -0,0 +1,198 @@
+import hashlib
+import io
+import json
+import os
+
+from flask import Blueprint, abort, current_app, request, send_from_directory
+
+# Un año: los ficheros con hash en el nombre no cambian nunca
+IMMUTABLE_MAX_AGE = 31536000
+
+assets_bp = Blueprint('assets', __name__)
+
+
+def assets_paths():
+    """
+    Directorios del pipeline de assets.
+
+    Returns:
+        tuple: (directorio de origen, directorio de salida, ruta del manifest)
+    """
+    source = current_app.config['ASSETS_SOURCE_DIR']
+    output = current_app.config['ASSETS_OUTPUT_DIR']
+    return source, output, os.path.join(output, 'manifest.json')
+
+
+def content_hash(data, length=10):
+    """Hash corto del contenido para el nombre del fichero"""
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, format='WEBP', quality=82, method=6)
+    else:
+        image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def build_assets(widths=None):
+    """
+    Generar variantes optimizadas, redimensionadas y con hash de cada imagen.
+
+    Por cada imagen de origen y cada ancho (sin ampliar nunca el original)
+    se generan un PNG optimizado y un WebP. El manifest relaciona el nombre
+    lógico con los ficheros generados.
+
+    Args:
+        widths (list): Anchos a generar (por defecto ASSETS_VARIANT_WIDTHS)
+
+    Returns:
+        dict: Manifest generado
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Pillow es necesario para generar los assets: pip install Pillow")
+
+    source_dir, output_dir, manifest_path = assets_paths()
+    widths = widths or current_app.config.get('ASSETS_VARIANT_WIDTHS', (320, 640, 1280))
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+
+    for filename in sorted(os.listdir(source_dir)):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() not in ('.png', '.jpg', '.jpeg'):
+            continue
+
+        with Image.open(os.path.join(source_dir, filename)) as original:
+            original.load()
+            targets = sorted({w for w in widths if w < original.width} | {original.width})
+            variants = []
+
+            for width in targets:
+                height = round(original.height * width / original.width)
+                image = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+                variant = {'width': width, 'height': height}
+
+                for fmt in ('png', 'webp'):
+                    data = _encode(image, fmt)
+                    name = f"{stem}-{width}w.{content_hash(data)}.{fmt}"
+                    with open(os.path.join(output_dir, name), 'wb') as f:
+                        f.write(data)
+                    variant[fmt] = name
+                    variant[f'{fmt}_bytes'] = len(data)
+
+                variants.append(variant)
+
+        manifest[filename] = {
+            'source_bytes': os.path.getsize(os.path.join(source_dir, filename)),
+            'variants': variants,
+        }
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    current_app.extensions['asset_manifest'] = manifest
+    return manifest
+
+
+def get_manifest():
+    """
+    Manifest de assets de la aplicación (se lee una vez por proceso).
+
+    Returns:
+        dict: Manifest, vacío si aún no se ha ejecutado `flask assets build`
+    """
+    manifest = current_app.extensions.get('asset_manifest')
+    if manifest is None:
+        _, _, manifest_path = assets_paths()
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        current_app.extensions['asset_manifest'] = manifest
+    return manifest
+
+
+def pick_variant(name, width=None, webp=False):
+    """
+    Elegir el fichero generado para un asset lógico.
+
+    Args:
+        name (str): Nombre lógico (el fichero de origen, p. ej. 'irrelevant-logo.png')
+        width (int): Ancho deseado; se usa la variante más pequeña que lo cubra
+        webp (bool): Preferir WebP
+
+    Returns:
+        str or None: Nombre del fichero con hash, o None si el asset no existe
+    """
+    entry = get_manifest().get(name)
+    if not entry:
+        return None
+
+    variants = entry['variants']
+    chosen = variants[-1]
+    if width:
+        chosen = next((v for v in variants if v['width'] >= width), variants[-1])
+    return chosen['webp'] if webp else chosen['png']
+
+
+def asset_url(name, width=None, webp=False, default=None):
+    """
+    URL absoluta y con hash de un asset, apta para correos y CDNs.
+
+    Args:
+        name (str): Nombre lógico del asset
+        width (int): Ancho deseado
+        webp (bool): Preferir WebP
+        default (str): URL a usar si el asset no está generado o no hay ASSETS_BASE_URL
+
+    Returns:
+        str: URL del asset
+    """
+    base_url = current_app.config.get('ASSETS_BASE_URL')
+    filename = pick_variant(name, width, webp)
+    if not base_url or not filename:
+        return default
+    return f"{base_url.rstrip('/')}/assets/{filename}"
+
+
+@assets_bp.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    """
+    Servir un fichero con hash: cacheable para siempre, ETag fuerte (el hash
+    del contenido) y soporte de Range
+    """
+    if filename.count('.') < 2:
+        abort(404)
+    _, output_dir, _ = assets_paths()
+    response = send_from_directory(
+        output_dir, filename,
+        conditional=True,
+        etag=filename.split('.')[-2],
+        max_age=IMMUTABLE_MAX_AGE
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@assets_bp.route('/assets/images/<name>')
+def negotiated_asset(name):
+    """
+    Servir la mejor variante de un asset lógico según Accept y ?w=ancho
+    """
+    webp = 'image/webp' in request.headers.get('Accept', '')
+    filename = pick_variant(name, request.args.get('w', type=int), webp)
+    if filename is None:
+        abort(404)
+
+    response = hashed_asset(filename)
+    # El nombre lógico puede cambiar de fichero en el siguiente build
+    response.cache_control.immutable = False
+    response.cache_control.max_age = current_app.config.get('ASSETS_NEGOTIATED_MAX_AGE', 86400)
+    response.vary.add('Accept')
+    return response
@@ -1,7 +1,65 @@
 import jwt
 import datetime
+import hashlib
 from flask import current_app, request, jsonify
 from functools import wraps
+from app.utils.lru import TTLCache
+
+def get_token_cache():
+    """
+    Caché de tokens ya verificados de la aplicación actual
+    
+    Returns:
+        TTLCache: Payloads decodificados indexados por el digest del token
+    """
+    cache = current_app.extensions.get('token_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('token_cache', TTLCache(
+            maxsize=current_app.config.get('TOKEN_CACHE_SIZE', 10000),
+            ttl=current_app.config.get('TOKEN_CACHE_TTL', 300)
+        ))
+    return cache
+
+def token_cache_stats():
+    """
+    Contadores de aciertos/fallos de la caché de tokens
+    
+    Returns:
+        dict: Estadísticas de la caché
+    """
+    return get_token_cache().stats()
+
+def decode_token(token):
+    """
+    Verificar y decodificar un token JWT, reutilizando verificaciones previas
+    
+    Un token repetido se resuelve con una búsqueda en la caché, sin HMAC ni
+    parseo JSON. Cada entrada caduca, como muy tarde, con el 'exp' del token.
+    
+    Args:
+        token (str): Token JWT
+        
+    Returns:
+        dict: Payload del token
+        
+    Raises:
+        jwt.ExpiredSignatureError, jwt.InvalidTokenError
+    """
+    cache = get_token_cache() if current_app.config.get('TOKEN_CACHE_ENABLED', True) else None
+    
+    if cache is not None:
+        digest = hashlib.sha256(token.encode('utf-8')).digest()
+        payload = cache.get(digest)
+        if payload is not None:
+            return payload
+    
+    secret_key = current_app.config['SECRET_KEY']
+    payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+    
+    if cache is not None:
+        cache.set(digest, payload, expires_at=payload.get('exp'))
+    
+    return payload
 
 def generate_token(user_id):
     """
@@ -46,9 +104,8 @@ def token_required(f):
             return jsonify({'message': 'Token no proporcionado'}), 401
         
         try:
-            # Decodificar token
-            secret_key = current_app.config['SECRET_KEY']
-            payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+            # Decodificar token (los ya verificados salen de la caché)
+            payload = decode_token(token)
             
             # Añadir información del usuario al contexto de la petición
             request.user_id = payload['user_id']
@@ -61,4 +118,19 @@ def token_required(f):
         
         return f(*args, **kwargs)
     
-    return decorated
\ No newline at end of file
+    return decorated
+
+def admin_required(f):
+    """
+    Decorador para rutas de administración: token válido de un usuario
+    incluido en ADMIN_USER_IDS
+    """
+    @wraps(f)
+    @token_required
+    def decorated(*args, **kwargs):
+        if request.user_id not in current_app.config.get('ADMIN_USER_IDS', ()):
+            return jsonify({'message': 'No tienes permisos para acceder a este recurso'}), 403
+        
+        return f(*args, **kwargs)
+    
+    return decorated
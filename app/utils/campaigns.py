@@ -0,0 +1,369 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from flask import current_app
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.extensions import mongo
+from app.models.user import User
+from app.utils.email_sender import RESEND_BATCH_SIZE, build_campaign_email, deliver, without_spool
+
+STATUS_DRAFT = 'draft'
+STATUS_RUNNING = 'running'
+STATUS_PAUSED = 'paused'
+STATUS_DONE = 'done'
+
+# Campos del usuario que necesita el render de la campaña
+RECIPIENT_FIELDS = ['name', 'email']
+
+
+class CampaignError(Exception):
+    """La campaña no existe o no se puede ejecutar en su estado actual"""
+
+
+def campaigns_collection():
+    """Colección de MongoDB donde se guardan las campañas y su checkpoint"""
+    return mongo.db[current_app.config.get('CAMPAIGN_COLLECTION', 'email_campaigns')]
+
+
+def create_campaign(name, subject, message, user_type=None, country=None):
+    """
+    Registrar una campaña nueva.
+
+    El segmento se fija al crearla: solo se envía a los usuarios registrados
+    antes de ese momento, así que los registros posteriores no desplazan el
+    checkpoint ni reciben el anuncio a medias.
+
+    Args:
+        name (str): Identificador de la campaña
+        subject (str): Asunto del correo
+        message (str): Texto del anuncio (párrafos separados por una línea en blanco)
+        user_type (str): Enviar solo a este userType
+        country (str): Enviar solo a este país
+
+    Returns:
+        dict: Documento de la campaña
+
+    Raises:
+        CampaignError: Si ya existe una campaña con ese nombre
+    """
+    now = datetime.utcnow()
+    campaign = {
+        '_id': name,
+        'subject': subject,
+        'message': message,
+        'filters': {'user_type': user_type, 'country': country, 'registered_to': now},
+        'status': STATUS_DRAFT,
+        # (registrationDate, _id) del último usuario hasta el que todo está enviado
+        'checkpoint': None,
+        # Lotes terminados por delante del checkpoint (con concurrencia > 1)
+        'completedAhead': [],
+        'sent': 0,
+        'batches': 0,
+        'lastError': None,
+        # Proceso que la está enviando y hasta cuándo es suyo el envío
+        'runner': None,
+        'leaseUntil': None,
+        'createdAt': now,
+        'updatedAt': now,
+        'startedAt': None,
+        'finishedAt': None,
+    }
+    try:
+        campaigns_collection().insert_one(campaign)
+    except DuplicateKeyError:
+        raise CampaignError(f"Ya existe una campaña llamada {name}")
+    return campaign
+
+
+def get_campaign(name):
+    """
+    Args:
+        name (str): Identificador de la campaña
+
+    Returns:
+        dict: Documento de la campaña
+
+    Raises:
+        CampaignError: Si no existe
+    """
+    campaign = campaigns_collection().find_one({'_id': name})
+    if campaign is None:
+        raise CampaignError(f"No existe la campaña {name}")
+    return campaign
+
+
+def sort_key(user):
+    """Clave de un usuario en User.LIST_SORT (descendente)"""
+    return (user['registrationDate'], user['_id'])
+
+
+def in_completed_range(key, completed_ahead):
+    """True si el usuario cae dentro de un lote que ya se envió por delante del checkpoint"""
+    # El orden es descendente: cada rango va de 'first' (mayor) a 'last' (menor)
+    return any(tuple(batch['last']) <= key <= tuple(batch['first']) for batch in completed_ahead)
+
+
+def iter_batches(campaign, batch_size):
+    """
+    Recorrer los destinatarios pendientes de la campaña en lotes.
+
+    Reanuda desde el checkpoint con el mismo keyset que el listado
+    (registrationDate, _id) y salta los lotes que ya se enviaron por
+    delante de él.
+
+    Yields:
+        list: Usuarios de cada lote (a lo sumo batch_size)
+    """
+    filters = dict(campaign['filters'])
+    checkpoint = campaign.get('checkpoint')
+    query = User.build_list_filter(after=tuple(checkpoint) if checkpoint else None, **filters)
+    cursor = (mongo.db.users.find(query, User.build_projection(RECIPIENT_FIELDS))
+              .sort(User.LIST_SORT)
+              .batch_size(max(batch_size, 1000)))
+    completed_ahead = campaign.get('completedAhead') or []
+
+    batch = []
+    for user in cursor:
+        if completed_ahead and in_completed_range(sort_key(user), completed_ahead):
+            continue
+        batch.append(user)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RateLimiter:
+    """Espaciar las llamadas al proveedor entre hilos: como máximo `rate` por segundo"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self.next_at > now:
+                time.sleep(self.next_at - now)
+            self.next_at = max(now, self.next_at) + self.interval
+
+
+class CampaignRunner:
+    """
+    Envía una campaña en lotes del tamaño del endpoint batch de Resend.
+
+    - El hilo principal lee el cursor y entrega cada lote a un pool de
+      `concurrency` hilos que lo renderiza y lo envía; nunca hay más lotes en
+      vuelo que hilos, así que la memoria no depende del tamaño del segmento.
+    - Un RateLimiter limita las llamadas por segundo al proveedor.
+    - Cada lote se reintenta con backoff; si sigue fallando la campaña se
+      pausa sin avanzar el checkpoint.
+    - El checkpoint solo avanza sobre el prefijo contiguo de lotes enviados.
+      Los lotes terminados por delante se guardan en completedAhead, así que
+      al reanudar no se repite ni se salta ningún correo.
+    - La campaña se reserva con un lease (runner/leaseUntil) que se renueva
+      en cada checkpoint: un segundo runner no puede enviarla a la vez, y si
+      el primero muere otro la retoma cuando el lease caduca.
+    """
+
+    def __init__(self, app, name, batch_size=None, concurrency=None, rate=None,
+                 max_retries=None, max_batches=None, on_progress=None):
+        """
+        Args:
+            app (Flask): Aplicación (los hilos del pool abren su propio contexto)
+            name (str): Campaña a enviar
+            batch_size (int): Correos por llamada (máximo RESEND_BATCH_SIZE)
+            concurrency (int): Lotes en vuelo a la vez
+            rate (float): Llamadas por segundo al proveedor (0 sin límite)
+            max_retries (int): Reintentos de un lote antes de pausar la campaña
+            max_batches (int): Detenerse tras este número de lotes (para pruebas)
+            on_progress (callable): Llamada con el documento tras cada checkpoint
+        """
+        config = app.config
+        self.app = app
+        self.name = name
+        self.batch_size = min(batch_size or config.get('CAMPAIGN_BATCH_SIZE', RESEND_BATCH_SIZE), RESEND_BATCH_SIZE)
+        self.concurrency = max(1, concurrency or config.get('CAMPAIGN_CONCURRENCY', 4))
+        self.limiter = RateLimiter(config.get('CAMPAIGN_RATE', 2) if rate is None else rate)
+        self.max_retries = config.get('CAMPAIGN_MAX_RETRIES', 3) if max_retries is None else max_retries
+        self.retry_backoff = config.get('CAMPAIGN_RETRY_BACKOFF_SECONDS', 2.0)
+        self.max_batches = max_batches
+        self.on_progress = on_progress
+        self.lease_seconds = config.get('CAMPAIGN_LEASE_SECONDS', 300)
+        self.runner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_lost = False
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Dejar de repartir lotes; los que están en vuelo terminan y se guardan"""
+        self._stop.set()
+
+    def acquire(self):
+        """
+        Reservar la campaña para este runner.
+
+        Returns:
+            dict: Documento de la campaña ya en estado running
+
+        Raises:
+            CampaignError: Si no existe, ya terminó o la tiene otro runner con el lease vigente
+        """
+        now = datetime.utcnow()
+        campaign = campaigns_collection().find_one_and_update(
+            {'_id': self.name, 'status': {'$ne': STATUS_DONE},
+             '$or': [{'runner': None}, {'leaseUntil': {'$lt': now}}]},
+            {'$set': {
+                'status': STATUS_RUNNING,
+                'runner': self.runner_id,
+                'leaseUntil': now + timedelta(seconds=self.lease_seconds),
+                'lastError': None,
+                'updatedAt': now,
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        if campaign is not None:
+            return campaign
+
+        campaign = get_campaign(self.name)
+        if campaign['status'] == STATUS_DONE:
+            raise CampaignError(f"La campaña {self.name} ya terminó")
+        raise CampaignError(
+            f"La campaña {self.name} la está enviando {campaign['runner']} "
+            f"(lease hasta {campaign['leaseUntil']:%Y-%m-%d %H:%M:%S} UTC)"
+        )
+
+    def owned(self):
+        """Filtro que solo casa mientras la campaña siga siendo de este runner"""
+        return {'_id': self.name, 'runner': self.runner_id}
+
+    def send_batch(self, campaign, users, year):
+        """Renderizar y enviar un lote (en un hilo del pool). Devuelve el error final o None"""
+        with self.app.app_context(), without_spool():
+            params = [build_campaign_email(user, campaign, year) for user in users]
+            for attempt in range(self.max_retries + 1):
+                self.limiter.wait()
+                try:
+                    deliver(params, kind='batch')
+                    return None
+                except Exception as e:
+                    error = e
+                    if attempt < self.max_retries and not self._stop.is_set():
+                        time.sleep(self.retry_backoff * (2 ** attempt))
+            return error
+
+    def run(self):
+        """
+        Enviar (o reanudar) la campaña hasta terminarla, pausarla por un
+        error o recibir stop().
+
+        Returns:
+            dict: Documento final de la campaña
+
+        Raises:
+            CampaignError: Si no existe, ya terminó o la está enviando otro runner
+        """
+        collection = campaigns_collection()
+        campaign = self.acquire()
+        now = datetime.utcnow()
+        if not campaign.get('startedAt'):
+            collection.update_one(self.owned(), {'$set': {'startedAt': now}})
+        year = now.year
+
+        checkpoint = tuple(campaign['checkpoint']) if campaign.get('checkpoint') else None
+        previous_ahead = campaign.get('completedAhead') or []
+        # Lotes de esta ejecución en orden de envío: índice -> {'first', 'last', 'done'}
+        batches = {}
+        next_index = 0
+        in_flight = {}
+        error = None
+        exhausted = False
+
+        def settle(future):
+            nonlocal checkpoint, next_index, error
+            index, count = in_flight.pop(future)
+            batch_error = future.result()
+            if batch_error is not None:
+                error = error or batch_error
+                return
+            batches[index]['done'] = True
+
+            # Avanzar el checkpoint sobre el prefijo contiguo de lotes enviados
+            while next_index in batches and batches[next_index]['done']:
+                checkpoint = tuple(batches.pop(next_index)['last'])
+                next_index += 1
+            # Rangos de ejecuciones anteriores que el checkpoint aún no alcanza
+            ahead = [batch for batch in previous_ahead
+                     if checkpoint is None or tuple(batch['last']) < checkpoint]
+            ahead += [{'first': batch['first'], 'last': batch['last']}
+                      for batch in batches.values() if batch['done']]
+            now = datetime.utcnow()
+            result = collection.update_one(self.owned(), {
+                '$set': {
+                    'checkpoint': list(checkpoint) if checkpoint else None,
+                    'completedAhead': ahead,
+                    'leaseUntil': now + timedelta(seconds=self.lease_seconds),
+                    'updatedAt': now,
+                },
+                '$inc': {'sent': count, 'batches': 1},
+            })
+            if result.matched_count == 0:
+                # El lease caducó y otro runner la retomó: dejar de enviar
+                self.lease_lost = True
+                self._stop.set()
+                return
+            if self.on_progress:
+                self.on_progress(collection.find_one({'_id': self.name}))
+
+        def drain(return_when):
+            done, _ = wait(list(in_flight), return_when=return_when)
+            for future in done:
+                settle(future)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='campaign') as pool:
+            batch_iter = iter_batches(campaign, self.batch_size)
+            while error is None and not self._stop.is_set():
+                if self.max_batches is not None and len(batches) + next_index >= self.max_batches:
+                    break
+                users = next(batch_iter, None)
+                if users is None:
+                    exhausted = True
+                    break
+                index = len(batches) + next_index
+                batches[index] = {
+                    'first': list(sort_key(users[0])),
+                    'last': list(sort_key(users[-1])),
+                    'done': False,
+                }
+                in_flight[pool.submit(self.send_batch, campaign, users, year)] = (index, len(users))
+                # Nunca más lotes en vuelo que hilos
+                while len(in_flight) >= self.concurrency:
+                    drain(FIRST_COMPLETED)
+            while in_flight:
+                drain(FIRST_COMPLETED)
+
+        if self.lease_lost:
+            current_app.logger.error(f"Campaña {self.name}: lease perdido, la continúa otro runner")
+            return get_campaign(self.name)
+
+        now = datetime.utcnow()
+        update = {'updatedAt': now, 'runner': None, 'leaseUntil': None}
+        if error is not None:
+            update.update(status=STATUS_PAUSED, lastError=str(error))
+            current_app.logger.error(f"Campaña {self.name} pausada: {str(error)}")
+        elif exhausted and not self._stop.is_set():
+            update.update(status=STATUS_DONE, completedAhead=[], finishedAt=now)
+        else:
+            update['status'] = STATUS_PAUSED
+        collection.update_one(self.owned(), {'$set': update})
+        return get_campaign(self.name)
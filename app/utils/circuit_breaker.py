@@ -0,0 +1,141 @@
+import threading
+import time
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: la llamada se rechaza sin intentarla"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker para un servicio externo.
+
+    - closed: las llamadas pasan; tras `failure_threshold` fallos seguidos se abre.
+    - open: las llamadas fallan al instante con CircuitOpenError durante
+      `recovery_timeout` segundos.
+    - half_open: se deja pasar una llamada de prueba; si va bien se cierra y
+      si falla se vuelve a abrir.
+
+    Se puede usar con call() o, para código async, con before_call(),
+    record_success() y record_failure().
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0, on_state_change=None,
+                 ignored_errors=()):
+        """
+        Args:
+            name (str): Nombre del servicio (para logs y métricas)
+            failure_threshold (int): Fallos consecutivos que abren el circuito
+            recovery_timeout (float): Segundos abierto antes de probar de nuevo
+            on_state_change (callable): Llamada con (name, estado) en cada cambio
+            ignored_errors (tuple): Excepciones con las que el servicio sí respondió
+                (rechazos de la propia llamada): cuentan como éxito, no como fallo
+        """
+        self.name = name
+        self.ignored_errors = ignored_errors
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.on_state_change = on_state_change
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            if self.on_state_change:
+                self.on_state_change(self.name, state)
+
+    def is_open(self):
+        """True si el circuito rechazaría ahora una llamada (abierto y sin plazo cumplido)"""
+        with self._lock:
+            return (self.state == STATE_OPEN
+                    and time.monotonic() - self.opened_at < self.recovery_timeout)
+
+    def before_call(self):
+        """
+        Decidir si una llamada puede intentarse
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto (o ya hay una prueba en curso)
+        """
+        with self._lock:
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"Circuito {self.name} abierto")
+                self._set_state(STATE_HALF_OPEN)
+            if self.state == STATE_HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"Circuito {self.name} en prueba")
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state(STATE_CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(STATE_OPEN)
+
+    def record_error(self, error):
+        """Anotar el error de una llamada: fallo, salvo que sea de ignored_errors"""
+        if isinstance(error, self.ignored_errors):
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def release_probe(self):
+        """
+        Liberar la llamada de prueba del estado half_open aunque no haya
+        terminado con éxito ni con fallo (p. ej. una tarea async cancelada):
+        si no, el circuito rechazaría todas las llamadas para siempre
+        """
+        with self._lock:
+            self._probing = False
+
+    def call(self, func, *args, **kwargs):
+        """
+        Ejecutar una llamada protegida por el circuito
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto
+        """
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_error(e)
+            raise
+        else:
+            self.record_success()
+            return result
+        finally:
+            self.release_probe()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Estado, fallos consecutivos y llamadas rechazadas
+        """
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+            }
@@ -0,0 +1,157 @@
+import threading
+import time
+
+from flask import current_app, g, has_request_context
+from pymongo.write_concern import WriteConcern
+
+from app.extensions import mongo
+from app.utils.metrics import mongo_event_listeners
+
+
+def get_collection(name, operation=None):
+    """
+    Obtener una colección con el write concern configurado para la operación.
+
+    Los write concerns se definen en MONGO_WRITE_CONCERNS, por ejemplo
+    {'register': {'w': 1}, 'admin': {'w': 'majority'}}. Las colecciones
+    derivadas se cachean por aplicación para no recrearlas en cada petición.
+
+    Args:
+        name (str): Nombre de la colección
+        operation (str): Operación lógica (clave de MONGO_WRITE_CONCERNS)
+
+    Returns:
+        Collection: Colección de PyMongo
+    """
+    cache = current_app.extensions.setdefault('mongo_collections', {})
+    key = (id(mongo.db), name, operation)
+    collection = cache.get(key)
+    if collection is None:
+        collection = mongo.db[name]
+        concern = current_app.config.get('MONGO_WRITE_CONCERNS', {}).get(operation)
+        if concern is not None:
+            collection = collection.with_options(write_concern=WriteConcern(**concern))
+        cache[key] = collection
+    return collection
+
+
+def record_round_trip(collection, command):
+    """
+    Anotar un round trip a MongoDB en la petición actual.
+
+    Args:
+        collection (str): Colección afectada
+        command (str): Comando enviado (insert_one, find_one, ...)
+    """
+    if has_request_context():
+        g.setdefault('db_round_trips', []).append(f"{collection}.{command}")
+
+
+def get_round_trips():
+    """
+    Round trips a MongoDB hechos durante la petición actual.
+
+    Returns:
+        list: Comandos en orden, como 'users.insert_one'
+    """
+    if not has_request_context():
+        return []
+    return list(g.get('db_round_trips', []))
+
+
+def init_round_trip_report(app):
+    """
+    Añadir la cabecera X-DB-Round-Trips a las respuestas si
+    REPORT_DB_ROUND_TRIPS está activo.
+
+    Args:
+        app (Flask): Aplicación
+    """
+    @app.after_request
+    def add_round_trip_header(response):
+        if app.config.get('REPORT_DB_ROUND_TRIPS'):
+            round_trips = get_round_trips()
+            response.headers['X-DB-Round-Trips'] = f"{len(round_trips)}; {', '.join(round_trips)}"
+        return response
+
+
+def mongo_client_options(app):
+    """
+    Opciones del MongoClient de la extensión mongo.
+
+    flask-pymongo ya crea el cliente con connect=False: no abre conexiones
+    ni hilos de monitorización hasta el primer comando, así que es seguro
+    crearlo en el master de gunicorn con preload_app.
+
+    Args:
+        app (Flask): Aplicación
+
+    Returns:
+        dict: Argumentos para mongo.init_app
+    """
+    options = {}
+    if app.config.get('MONGO_MIN_POOL_SIZE'):
+        options['minPoolSize'] = app.config['MONGO_MIN_POOL_SIZE']
+    if app.config.get('METRICS_ENABLED', True):
+        # Listeners de comandos y del pool para las métricas
+        options['event_listeners'] = mongo_event_listeners()
+    return options
+
+
+def init_mongo(app):
+    """
+    Inicializar la extensión mongo
+
+    Args:
+        app (Flask): Aplicación
+    """
+    mongo.init_app(app, **mongo_client_options(app))
+
+
+def reconnect_mongo(app):
+    """
+    Crear un MongoClient nuevo en un proceso hijo (post_worker_init de gunicorn).
+
+    Un MongoClient no es fork-safe: si el master ya lo usó (p. ej. para
+    crear índices), el hijo heredaría sockets y locks compartidos. El cliente
+    heredado no se cierra, porque cerrarlo hablaría con el servidor por
+    esos mismos sockets.
+
+    Args:
+        app (Flask): Aplicación
+    """
+    mongo.init_app(app, **mongo_client_options(app))
+    app.extensions.pop('mongo_collections', None)
+
+
+def warm_up_mongo(app, connections=None):
+    """
+    Abrir conexiones del pool antes de que el worker reciba tráfico, para
+    que las primeras peticiones no paguen el handshake (TCP, TLS y auth).
+
+    Args:
+        app (Flask): Aplicación
+        connections (int): Conexiones a abrir (por defecto WARMUP_MONGO_CONNECTIONS)
+
+    Returns:
+        int: Pings que respondieron correctamente
+    """
+    connections = connections or app.config.get('WARMUP_MONGO_CONNECTIONS', 4)
+    # Sin MongoDB disponible no se bloquea el arranque más de WARMUP_TIMEOUT
+    deadline = time.monotonic() + app.config.get('WARMUP_TIMEOUT', 5)
+    results = []
+
+    def ping():
+        try:
+            mongo.cx.admin.command('ping')
+            results.append(True)
+        except Exception as e:
+            app.logger.warning(f"Warmup de MongoDB fallido: {str(e)}")
+
+    # Pings concurrentes: cada uno obliga al pool a abrir su propia conexión
+    threads = [threading.Thread(target=ping, daemon=True) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(0, deadline - time.monotonic()))
+    return len(results)
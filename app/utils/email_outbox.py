@@ -0,0 +1,443 @@
+import atexit
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+from app.extensions import mongo
+from app.utils.db import record_round_trip
+from app.utils.email_sender import (
+    send_welcome_email, notify_admin_new_registration,
+    send_welcome_emails_batch, notify_admin_bulk_registration, get_email_breaker, without_spool,
+    RESEND_BATCH_SIZE
+)
+
+# Tipos de correo que puede despachar el outbox (cada uno recibe el payload del job)
+EMAIL_HANDLERS = {
+    'welcome': send_welcome_email,
+    'admin_notification': notify_admin_new_registration,
+    'welcome_batch': lambda payload: send_welcome_emails_batch(payload['users']),
+    'admin_bulk_notification': lambda payload: notify_admin_bulk_registration(payload['users']),
+}
+
+# Correos que se generan con cada registro
+REGISTRATION_EMAILS = ('welcome', 'admin_notification')
+
+# Campos del usuario que se guardan en el job (lo necesario para renderizar)
+PAYLOAD_FIELDS = ('_id', 'name', 'email', 'phone', 'userType', 'country')
+
+STATUS_PENDING = 'pending'
+STATUS_PROCESSING = 'processing'
+STATUS_SENT = 'sent'
+STATUS_DEAD = 'dead'
+
+# Días que se conservan los jobs enviados antes de que MongoDB los borre
+SENT_JOB_RETENTION_DAYS = 7
+
+# Índice que sirve la consulta con la que los workers reclaman jobs y TTL
+# que purga los enviados (los dead-letter no tienen sentAt y se conservan)
+OUTBOX_INDEXES = [
+    IndexModel([('status', ASCENDING), ('nextAttemptAt', ASCENDING)], name='status_nextAttemptAt'),
+    IndexModel([('sentAt', ASCENDING)], name='sentAt_ttl',
+               expireAfterSeconds=SENT_JOB_RETENTION_DAYS * 24 * 3600),
+]
+
+
+def outbox_collection():
+    """Colección de MongoDB donde viven los jobs de correo"""
+    return mongo.db[current_app.config.get('EMAIL_OUTBOX_COLLECTION', 'email_outbox')]
+
+
+def build_payload(user_data):
+    """
+    Extrae del usuario los campos necesarios para renderizar los correos.
+
+    Args:
+        user_data (dict): Datos del usuario registrado
+
+    Returns:
+        dict: Copia reducida y serializable del usuario
+    """
+    payload = {field: user_data.get(field) for field in PAYLOAD_FIELDS if field in user_data}
+    if '_id' in payload:
+        payload['_id'] = str(payload['_id'])
+    return payload
+
+
+def build_job(kind, payload, now, max_attempts):
+    """Documento de un job de correo listo para insertarse en el outbox"""
+    return {
+        'kind': kind,
+        'payload': payload,
+        'status': STATUS_PENDING,
+        'attempts': 0,
+        'maxAttempts': max_attempts,
+        'nextAttemptAt': now,
+        'lockedBy': None,
+        'lockedUntil': None,
+        'lastError': None,
+        'createdAt': now,
+        'updatedAt': now,
+    }
+
+
+def insert_jobs(jobs):
+    """
+    Insertar jobs en el outbox con un único insert_many y despertar a los workers.
+
+    Args:
+        jobs (list): Documentos creados con build_job
+
+    Returns:
+        list: IDs de los jobs creados
+    """
+    result = outbox_collection().insert_many(jobs)
+    record_round_trip(current_app.config.get('EMAIL_OUTBOX_COLLECTION', 'email_outbox'), 'insert_many')
+
+    # Despertar a los workers de este proceso (si los hay)
+    dispatcher = get_dispatcher(current_app._get_current_object())
+    if dispatcher:
+        dispatcher.notify()
+
+    return result.inserted_ids
+
+
+def enqueue_emails(user_data, kinds=REGISTRATION_EMAILS):
+    """
+    Encola los correos de un usuario como documentos en el outbox.
+
+    Todos los jobs se insertan con un único insert_many, así que el registro
+    solo paga un round trip a MongoDB.
+
+    Args:
+        user_data (dict): Datos del usuario registrado
+        kinds (tuple): Tipos de correo a encolar
+
+    Returns:
+        list: IDs de los jobs creados
+    """
+    now = datetime.utcnow()
+    payload = build_payload(user_data)
+    max_attempts = current_app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    return insert_jobs([build_job(kind, payload, now, max_attempts) for kind in kinds])
+
+
+def enqueue_bulk_emails(users_data):
+    """
+    Encola los correos de un registro masivo como envíos agrupados.
+
+    Las bienvenidas se agrupan en jobs del tamaño del endpoint batch del
+    proveedor y los administradores reciben un único resumen del lote.
+
+    Args:
+        users_data (list): Usuarios registrados
+
+    Returns:
+        list: IDs de los jobs creados
+    """
+    if not users_data:
+        return []
+
+    now = datetime.utcnow()
+    payloads = [build_payload(user_data) for user_data in users_data]
+    max_attempts = current_app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+
+    jobs = [
+        build_job('welcome_batch', {'users': payloads[start:start + RESEND_BATCH_SIZE]}, now, max_attempts)
+        for start in range(0, len(payloads), RESEND_BATCH_SIZE)
+    ]
+    jobs.append(build_job('admin_bulk_notification', {'users': payloads}, now, max_attempts))
+    return insert_jobs(jobs)
+
+
+def backoff_delay(attempts, base_seconds, max_seconds):
+    """
+    Calcula la espera antes del siguiente intento (exponencial con jitter).
+
+    Args:
+        attempts (int): Intentos realizados hasta ahora
+        base_seconds (float): Espera base tras el primer fallo
+        max_seconds (float): Espera máxima
+
+    Returns:
+        float: Segundos a esperar
+    """
+    delay = min(max_seconds, base_seconds * (2 ** max(attempts - 1, 0)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxDispatcher:
+    """
+    Pool de workers que reclama jobs del outbox, envía los correos,
+    reintenta con backoff y manda a dead-letter los que siguen fallando.
+    """
+
+    def __init__(self, app, workers=None):
+        self.app = app
+        self.workers = workers or app.config.get('EMAIL_OUTBOX_WORKERS', 2)
+        self.poll_interval = app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 2.0)
+        self.lease_seconds = app.config.get('EMAIL_OUTBOX_LEASE_SECONDS', 120)
+        self.backoff_base = app.config.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+        self.backoff_max = app.config.get('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', 3600)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Arrancar los hilos del pool (idempotente)"""
+        with self._lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self.app.logger.info(f"Outbox de correos iniciado con {self.workers} workers")
+
+    def notify(self):
+        """Despertar a los workers porque hay trabajo nuevo"""
+        self._wakeup.set()
+
+    def stop(self, timeout=30):
+        """
+        Detener el pool drenando los envíos en curso.
+
+        Los workers terminan el job que tienen entre manos y no reclaman más.
+        Los jobs pendientes quedan en MongoDB para el siguiente arranque.
+
+        Args:
+            timeout (float): Segundos máximos de espera por los workers
+
+        Returns:
+            bool: True si todos los workers terminaron a tiempo
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        deadline = datetime.utcnow() + timedelta(seconds=timeout)
+        for thread in self._threads:
+            remaining = (deadline - datetime.utcnow()).total_seconds()
+            thread.join(max(remaining, 0))
+        drained = not self.running
+        if drained:
+            self.app.logger.info("Outbox de correos detenido")
+        else:
+            self.app.logger.warning("Outbox de correos detenido con envíos en curso")
+        return drained
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stopping.is_set():
+                try:
+                    processed = self.process_one()
+                except Exception as e:
+                    current_app.logger.error(f"Error en el worker del outbox: {str(e)}")
+                    processed = False
+
+                if not processed:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+
+    def claim(self):
+        """
+        Reclamar atómicamente el siguiente job listo para enviarse.
+
+        También recupera jobs cuyo lease expiró (worker caído a mitad de envío)
+        mientras les queden intentos; los que no, los manda a dead-letter
+        reap_expired().
+
+        Returns:
+            dict or None: Job reclamado o None si no hay trabajo
+        """
+        now = datetime.utcnow()
+        return outbox_collection().find_one_and_update(
+            {'$or': [
+                {'status': STATUS_PENDING, 'nextAttemptAt': {'$lte': now}},
+                {'status': STATUS_PROCESSING, 'lockedUntil': {'$lte': now},
+                 '$expr': {'$lt': ['$attempts', '$maxAttempts']}},
+            ]},
+            {
+                '$set': {
+                    'status': STATUS_PROCESSING,
+                    'lockedBy': self.worker_id,
+                    'lockedUntil': now + timedelta(seconds=self.lease_seconds),
+                    'updatedAt': now,
+                },
+                '$inc': {'attempts': 1},
+            },
+            sort=[('nextAttemptAt', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def process_one(self):
+        """
+        Reclamar y enviar un job.
+
+        Returns:
+            bool: True si se procesó algún job
+        """
+        # Con el proveedor caído no se reclaman jobs: gastarían intentos sin enviarse
+        if current_app.config.get('EMAIL_BREAKER_ENABLED', True) and get_email_breaker().is_open():
+            return False
+
+        job = self.claim()
+        if not job:
+            self.reap_expired()
+            return False
+
+        handler = EMAIL_HANDLERS.get(job['kind'])
+        error = None
+        if handler is None:
+            error = f"Tipo de correo desconocido: {job['kind']}"
+        else:
+            try:
+                # Un fallo aquí se reintenta con backoff: no se duplica en el spool
+                with without_spool():
+                    ok = handler(job['payload'])
+                if not ok:
+                    error = "El proveedor de correo rechazó el envío"
+            except Exception as e:
+                error = str(e)
+
+        if error is None:
+            self._mark_sent(job)
+        else:
+            self._mark_failed(job, error)
+        return True
+
+    def reap_expired(self):
+        """
+        Mandar a dead-letter los jobs con el lease expirado y sin intentos
+        restantes (el worker cayó durante su último intento).
+
+        Returns:
+            int: Jobs marcados como dead
+        """
+        now = datetime.utcnow()
+        result = outbox_collection().update_many(
+            {'status': STATUS_PROCESSING, 'lockedUntil': {'$lte': now},
+             '$expr': {'$gte': ['$attempts', '$maxAttempts']}},
+            {'$set': {
+                'status': STATUS_DEAD,
+                'lockedBy': None,
+                'lockedUntil': None,
+                'lastError': 'Lease expirado en el último intento',
+                'updatedAt': now,
+            }}
+        )
+        if result.modified_count:
+            current_app.logger.error(f"{result.modified_count} jobs de correo enviados a dead-letter por lease expirado")
+        return result.modified_count
+
+    def _mark_sent(self, job):
+        now = datetime.utcnow()
+        outbox_collection().update_one(
+            {'_id': job['_id'], 'lockedBy': self.worker_id},
+            {'$set': {
+                'status': STATUS_SENT,
+                'sentAt': now,
+                'updatedAt': now,
+                'lockedBy': None,
+                'lockedUntil': None,
+                'lastError': None,
+            }}
+        )
+
+    def _mark_failed(self, job, error):
+        now = datetime.utcnow()
+        update = {
+            'lockedBy': None,
+            'lockedUntil': None,
+            'lastError': error,
+            'updatedAt': now,
+        }
+        if job['attempts'] >= job.get('maxAttempts', 5):
+            update['status'] = STATUS_DEAD
+            current_app.logger.error(
+                f"Job de correo {job['_id']} ({job['kind']}) enviado a dead-letter: {error}"
+            )
+        else:
+            update['status'] = STATUS_PENDING
+            update['nextAttemptAt'] = now + timedelta(
+                seconds=backoff_delay(job['attempts'], self.backoff_base, self.backoff_max)
+            )
+            current_app.logger.warning(
+                f"Job de correo {job['_id']} ({job['kind']}) falló, se reintentará: {error}"
+            )
+        outbox_collection().update_one(
+            {'_id': job['_id'], 'lockedBy': self.worker_id},
+            {'$set': update}
+        )
+
+
+def get_dispatcher(app, create=False):
+    """
+    Obtener el dispatcher en proceso de la aplicación.
+
+    Args:
+        app (Flask): Aplicación
+        create (bool): Crear y arrancar el dispatcher si aún no existe
+
+    Returns:
+        OutboxDispatcher or None
+    """
+    dispatcher = app.extensions.get('email_outbox')
+    if dispatcher is None and create:
+        dispatcher = OutboxDispatcher(app)
+        app.extensions['email_outbox'] = dispatcher
+        atexit.register(dispatcher.stop, app.config.get('EMAIL_OUTBOX_DRAIN_SECONDS', 10))
+    return dispatcher
+
+
+def ensure_dispatcher_started():
+    """
+    Arrancar perezosamente el pool en proceso si EMAIL_OUTBOX_WORKERS es
+    mayor que cero; con cero, los jobs los procesa un worker dedicado
+    (`flask outbox work`).
+    """
+    app = current_app._get_current_object()
+    if app.config.get('EMAIL_OUTBOX_WORKERS', 2) > 0:
+        dispatcher = get_dispatcher(app, create=True)
+        if not dispatcher.running:
+            dispatcher.start()
+
+
+def enqueue_registration_emails(user_data):
+    """
+    Encolar los correos de bienvenida y de notificación a administradores.
+
+    Args:
+        user_data (dict): Datos del usuario registrado
+
+    Returns:
+        list: IDs de los jobs creados
+    """
+    ensure_dispatcher_started()
+    return enqueue_emails(user_data)
+
+
+def enqueue_bulk_registration_emails(users_data):
+    """
+    Encolar los correos agrupados de un registro masivo.
+
+    Args:
+        users_data (list): Usuarios registrados
+
+    Returns:
+        list: IDs de los jobs creados
+    """
+    ensure_dispatcher_started()
+    return enqueue_bulk_emails(users_data)
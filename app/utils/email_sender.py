@@ -1,15 +1,141 @@
-import os
-import resend
+from contextlib import contextmanager
+from contextvars import ContextVar
 from flask import current_app
 from datetime import datetime
-from dotenv import load_dotenv
+from functools import lru_cache
 
-# Cargar variables de entorno
-load_dotenv()
+from app.utils.assets import asset_url
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.email_spool import EmailSpool
+from app.utils.email_transport import EmailPermanentError, get_email_transport
+from app.utils.metrics import EMAIL_SPOOLED, set_breaker_state, track_email_send
+from app.utils.template_engine import CompiledTemplate
+from app.utils.timing import span
 
-# Configura la API key de Resend desde .env
-resend.api_key = os.getenv("RESEND_API_KEY")
+# Remitente de todos los correos
+SENDER = "irrelevant club <info@updates.stayirrelevant.com>"
 
+# Lista de administradores a notificar
+ADMIN_EMAILS = ["jpgomez@stayirrelevant.com", "ahoyosh@stayirrelevant.com"]
+
+# Logo de la cabecera si los assets con hash no están generados
+DEFAULT_LOGO_URL = "https://storage.googleapis.com/cluvi/nuevo_irre-removebg-preview.png"
+
+# Máximo de correos por llamada al endpoint batch de Resend
+RESEND_BATCH_SIZE = 100
+
+# Dentro del outbox los fallos ya se reintentan: no hace falta el spool
+_spool_disabled = ContextVar('email_spool_disabled', default=False)
+
+@contextmanager
+def without_spool():
+    """Desactivar el spool para los envíos hechos dentro del bloque"""
+    token = _spool_disabled.set(True)
+    try:
+        yield
+    finally:
+        _spool_disabled.reset(token)
+
+def get_email_breaker():
+    """
+    Circuit breaker del proveedor de correo de la aplicación actual.
+
+    Returns:
+        CircuitBreaker: Breaker compartido por todos los envíos del proceso
+    """
+    breaker = current_app.extensions.get('email_breaker')
+    if breaker is None:
+        breaker = current_app.extensions.setdefault('email_breaker', CircuitBreaker(
+            'email',
+            failure_threshold=current_app.config.get('EMAIL_BREAKER_FAILURE_THRESHOLD', 5),
+            recovery_timeout=current_app.config.get('EMAIL_BREAKER_RECOVERY_SECONDS', 30),
+            on_state_change=set_breaker_state,
+            # Un correo rechazado (p. ej. dirección inválida) no dice nada del proveedor
+            ignored_errors=(EmailPermanentError,)
+        ))
+    return breaker
+
+def get_email_spool():
+    """Spool local de la aplicación actual (EMAIL_SPOOL_PATH)"""
+    spool = current_app.extensions.get('email_spool')
+    if spool is None:
+        spool = current_app.extensions.setdefault('email_spool', EmailSpool(current_app.config['EMAIL_SPOOL_PATH']))
+    return spool
+
+def spool_email(kind, params, error):
+    """
+    Guardar en el spool un envío fallido, si el spool está activo. Los
+    rechazos permanentes no se guardan: reenviarlos fallaría igual.
+
+    Args:
+        kind (str): 'email' o 'batch'
+        params: Parámetros del envío
+        error (Exception): Motivo del fallo
+
+    Returns:
+        bool: True si el correo quedó en el spool
+    """
+    if _spool_disabled.get() or not current_app.config.get('EMAIL_SPOOL_ENABLED', True):
+        return False
+    if isinstance(error, EmailPermanentError):
+        current_app.logger.error(f"Correo rechazado por el proveedor, no se reintentará: {str(error)}")
+        return False
+    try:
+        get_email_spool().append(kind, params)
+    except OSError as e:
+        current_app.logger.error(f"No se pudo escribir en el spool de correos: {str(e)}")
+        return False
+    EMAIL_SPOOLED.labels(kind).inc()
+    current_app.logger.warning(f"Correo guardado en el spool para reenviarlo más tarde: {str(error)}")
+    return True
+
+def transport_send(kind, params):
+    """Envío directo por el transporte configurado (EMAIL_TRANSPORT), sin breaker ni spool"""
+    if kind == 'batch':
+        return get_email_transport().send_batch(params)
+    return get_email_transport().send(params)
+
+def deliver(params, kind='email'):
+    """
+    Enviar un correo (o una lista con kind='batch') a través del circuit breaker.
+
+    Con el circuito abierto el envío falla en microsegundos en lugar de
+    esperar el timeout del proveedor. Si el envío falla, el correo se guarda
+    en el spool local (`flask emails replay-spool` lo reenvía).
+
+    Args:
+        params: Parámetros del envío en el formato de Resend
+        kind (str): 'email' o 'batch'
+
+    Returns:
+        Respuesta del proveedor
+
+    Raises:
+        Exception: El error del envío (CircuitOpenError si el circuito está abierto)
+    """
+    try:
+        if not current_app.config.get('EMAIL_BREAKER_ENABLED', True):
+            return transport_send(kind, params)
+        return get_email_breaker().call(transport_send, kind, params)
+    except Exception as e:
+        spool_email(kind, params, e)
+        raise
+
+def replay_spool(limit=None):
+    """
+    Reenviar los correos del spool a través del circuit breaker.
+
+    Args:
+        limit (int): Máximo de correos a reenviar
+
+    Returns:
+        dict: Enviados, devueltos al spool y error que detuvo el replay
+    """
+    breaker = get_email_breaker()
+    return get_email_spool().replay(lambda kind, params: breaker.call(transport_send, kind, params), limit,
+                                    permanent_errors=(EmailPermanentError,))
+
+@track_email_send('welcome')
 def send_welcome_email(user_data):
     """
     Envía un correo de bienvenida al usuario recién registrado usando Resend.
@@ -24,18 +150,12 @@ def send_welcome_email(user_data):
         # Obtener año actual para el footer
         current_year = datetime.utcnow().year
 
-        # Preparar HTML y texto plano
-        html_content = get_welcome_email_html(user_data, current_year)
-        text_content = get_welcome_email_text(user_data, current_year)
+        with span('email_render'):
+            params = build_welcome_email(user_data, current_year)
 
         # Enviar correo usando Resend
-        response = resend.Emails.send({
-            "from": "irrelevant club <info@updates.stayirrelevant.com>",
-            "to": [user_data['email']],
-            "subject": "Welcome to irrelevant club",
-            "html": html_content,
-            "text": text_content
-        })
+        with span('email_send'):
+            response = deliver(params)
 
         current_app.logger.info(f"Correo enviado exitosamente a {user_data['email']}")
         return True
@@ -44,6 +164,7 @@ def send_welcome_email(user_data):
         current_app.logger.error(f"Error en el envío de correo: {str(e)}")
         return False
 
+@track_email_send('admin_notification')
 def notify_admin_new_registration(user_data):
     """
     Envía una notificación por correo a los administradores cuando hay un nuevo registro.
@@ -55,21 +176,8 @@ def notify_admin_new_registration(user_data):
         bool: True si el correo se envió correctamente, False en caso contrario
     """
     try:
-        # Lista de administradores a notificar
-        admin_emails = ["jpgomez@stayirrelevant.com", "ahoyosh@stayirrelevant.com"]
-        
-        # Crear el contenido del correo de notificación
-        html_content = get_admin_notification_html(user_data)
-        text_content = get_admin_notification_text(user_data)
-        
         # Enviar correo usando Resend
-        response = resend.Emails.send({
-            "from": "irrelevant club <info@updates.stayirrelevant.com>",
-            "to": admin_emails,
-            "subject": f"Nuevo registro en irrelevant club: {user_data['name']}",
-            "html": html_content,
-            "text": text_content
-        })
+        response = deliver(build_admin_notification_email(user_data))
         
         current_app.logger.info(f"Notificación de nuevo registro enviada a los administradores")
         return True
@@ -78,6 +186,144 @@ def notify_admin_new_registration(user_data):
         current_app.logger.error(f"Error en el envío de notificación a administradores: {str(e)}")
         return False
 
+def build_welcome_email(user_data, current_year):
+    """
+    Construye el mensaje de bienvenida en el formato de la API de Resend.
+
+    Args:
+        user_data (dict): Datos del usuario registrado
+        current_year (int): Año actual para el footer
+
+    Returns:
+        dict: Parámetros del correo (from, to, subject, html, text)
+    """
+    return {
+        "from": SENDER,
+        "to": [user_data['email']],
+        "subject": "Welcome to irrelevant club",
+        "html": get_welcome_email_html(user_data, current_year),
+        "text": get_welcome_email_text(user_data, current_year)
+    }
+
+def build_admin_notification_email(user_data):
+    """
+    Construye la notificación de nuevo registro para los administradores.
+
+    Args:
+        user_data (dict): Datos del usuario registrado
+
+    Returns:
+        dict: Parámetros del correo (from, to, subject, html, text)
+    """
+    return {
+        "from": SENDER,
+        "to": ADMIN_EMAILS,
+        "subject": f"Nuevo registro en irrelevant club: {user_data['name']}",
+        "html": get_admin_notification_html(user_data),
+        "text": get_admin_notification_text(user_data)
+    }
+
+def build_campaign_email(user_data, campaign, current_year):
+    """
+    Construye el correo de una campaña (anuncio) para un usuario.
+
+    Args:
+        user_data (dict): Datos del usuario destinatario
+        campaign (dict): Campaña con 'subject' y 'message' (texto plano,
+            párrafos separados por una línea en blanco)
+        current_year (int): Año actual para el footer
+
+    Returns:
+        dict: Parámetros del correo (from, to, subject, html, text)
+    """
+    values = {
+        'name': user_data['name'],
+        'subject': campaign['subject'],
+        'year': current_year,
+    }
+    logo_url = asset_url('irrelevant-logo.png', width=360, default=DEFAULT_LOGO_URL)
+    return {
+        "from": SENDER,
+        "to": [user_data['email']],
+        "subject": campaign['subject'],
+        "html": CAMPAIGN_EMAIL_HTML.render(message=render_campaign_message_html(campaign['message']),
+                                           logo_url=logo_url, **values),
+        "text": CAMPAIGN_EMAIL_TEXT.render(message=campaign['message'].strip(), **values)
+    }
+
+@lru_cache(maxsize=16)
+def render_campaign_message_html(message):
+    """Párrafos HTML del mensaje de una campaña (se renderizan una vez por campaña)"""
+    paragraphs = [paragraph.strip() for paragraph in message.strip().split('\n\n') if paragraph.strip()]
+    return ''.join(CAMPAIGN_PARAGRAPH_HTML.render(text=paragraph) for paragraph in paragraphs)
+
+@track_email_send('welcome_batch')
+def send_welcome_emails_batch(users_data):
+    """
+    Envía los correos de bienvenida de varios usuarios con el endpoint batch de Resend.
+
+    Args:
+        users_data (list): Usuarios registrados
+
+    Returns:
+        bool: True si todos los lotes se enviaron correctamente, False en caso contrario
+    """
+    current_year = datetime.utcnow().year
+    failed = 0
+
+    # Cada lote por separado: un lote fallido (que deliver guarda en el
+    # spool) no impide enviar, o guardar, los siguientes
+    for start in range(0, len(users_data), RESEND_BATCH_SIZE):
+        chunk = users_data[start:start + RESEND_BATCH_SIZE]
+        try:
+            deliver([build_welcome_email(user_data, current_year) for user_data in chunk], kind='batch')
+        except Exception as e:
+            failed += 1
+            current_app.logger.error(f"Error en el envío de correos en lote ({len(chunk)} usuarios): {str(e)}")
+
+    if failed:
+        return False
+    current_app.logger.info(f"Correos de bienvenida enviados a {len(users_data)} usuarios")
+    return True
+
+@track_email_send('admin_bulk_notification')
+def notify_admin_bulk_registration(users_data):
+    """
+    Envía a los administradores un único resumen de un registro masivo.
+
+    Args:
+        users_data (list): Usuarios registrados en el lote
+
+    Returns:
+        bool: True si el correo se envió correctamente, False en caso contrario
+    """
+    try:
+        now = datetime.utcnow()
+        values = {
+            'count': len(users_data),
+            'timestamp': now.strftime("%d/%m/%Y %H:%M:%S UTC"),
+            'year': now.year
+        }
+        html_rows = ''.join(ADMIN_BULK_ROW_HTML.render(**get_admin_notification_values(user_data))
+                            for user_data in users_data)
+        text_rows = ''.join(ADMIN_BULK_ROW_TEXT.render(**get_admin_notification_values(user_data))
+                            for user_data in users_data)
+
+        response = deliver({
+            "from": SENDER,
+            "to": ADMIN_EMAILS,
+            "subject": f"Registro masivo en irrelevant club: {len(users_data)} usuarios",
+            "html": ADMIN_BULK_NOTIFICATION_HTML.render(rows=html_rows, **values),
+            "text": ADMIN_BULK_NOTIFICATION_TEXT.render(rows=text_rows, **values)
+        })
+
+        current_app.logger.info("Resumen de registro masivo enviado a los administradores")
+        return True
+
+    except Exception as e:
+        current_app.logger.error(f"Error en el envío del resumen de registro masivo: {str(e)}")
+        return False
+
 def get_admin_notification_html(user_data):
     """
     Genera el HTML para la notificación de nuevo registro para administradores.
@@ -88,11 +334,78 @@ def get_admin_notification_html(user_data):
     Returns:
         str: HTML del correo de notificación
     """
+    return ADMIN_NOTIFICATION_HTML.render(**get_admin_notification_values(user_data))
+
+def get_admin_notification_text(user_data):
+    """
+    Genera la versión de texto plano de la notificación de nuevo registro para administradores.
+
+    Args:
+        user_data (dict): Datos del usuario registrado
+
+    Returns:
+        str: Texto plano del correo de notificación
+    """
+    return ADMIN_NOTIFICATION_TEXT.render(**get_admin_notification_values(user_data))
+
+def get_admin_notification_values(user_data):
+    """
+    Valores de los campos de la notificación a administradores.
+
+    Args:
+        user_data (dict): Datos del usuario registrado
+
+    Returns:
+        dict: Valor de cada campo de la plantilla
+    """
     # Obtener fecha y hora actual
     now = datetime.utcnow()
-    timestamp = now.strftime("%d/%m/%Y %H:%M:%S UTC")
     
-    return f"""<!DOCTYPE html>
+    return {
+        'name': user_data['name'],
+        'email': user_data['email'],
+        'user_type': user_data.get('userType', 'No especificado'),
+        'country': user_data.get('country', 'No especificado'),
+        'timestamp': now.strftime("%d/%m/%Y %H:%M:%S UTC"),
+        'year': now.year
+    }
+
+def get_welcome_email_text(user_data, current_year):
+    """
+    Genera la versión de texto plano del correo de bienvenida.
+
+    Args:
+        user_data (dict): Datos del usuario
+        current_year (int): Año actual para el footer
+
+    Returns:
+        str: Texto plano del correo
+    """
+    return WELCOME_EMAIL_TEXT.render(name=user_data['name'], year=current_year)
+
+def get_welcome_email_html(user_data, current_year):
+    """
+    Genera el HTML para el correo de bienvenida.
+
+    Args:
+        user_data (dict): Datos del usuario
+        current_year (int): Año actual para el footer
+
+    Returns:
+        str: HTML del correo
+    """
+    logo_url = asset_url('irrelevant-logo.png', width=360, default=DEFAULT_LOGO_URL)
+    return render_welcome_email_html(user_data['name'], current_year, logo_url)
+
+@lru_cache(maxsize=1024)
+def render_welcome_email_html(name, current_year, logo_url=DEFAULT_LOGO_URL):
+    """Render cacheado del HTML de bienvenida (solo depende del nombre, el año y el logo)"""
+    return WELCOME_EMAIL_HTML.render(name=name, year=current_year, logo_url=logo_url)
+
+# Plantillas de correo. Los campos van entre llaves y las llaves literales
+# del CSS se escriben dobles. Se compilan (y minifican) una sola vez al importar.
+
+ADMIN_NOTIFICATION_HTML_SOURCE = """<!DOCTYPE html>
 <html lang="es">
 <head>
     <meta charset="UTF-8">
@@ -179,19 +492,19 @@ def get_admin_notification_html(user_data):
             <div class="user-card">
                 <div class="user-detail">
                     <div class="detail-label">Nombre:</div>
-                    <div class="detail-value">{user_data['name']}</div>
+                    <div class="detail-value">{name}</div>
                 </div>
                 <div class="user-detail">
                     <div class="detail-label">Email:</div>
-                    <div class="detail-value">{user_data['email']}</div>
+                    <div class="detail-value">{email}</div>
                 </div>
                 <div class="user-detail">
                     <div class="detail-label">Tipo de usuario:</div>
-                    <div class="detail-value">{user_data.get('userType', 'No especificado')}</div>
+                    <div class="detail-value">{user_type}</div>
                 </div>
                 <div class="user-detail">
                     <div class="detail-label">País:</div>
-                    <div class="detail-value">{user_data.get('country', 'No especificado')}</div>
+                    <div class="detail-value">{country}</div>
                 </div>
             </div>
             
@@ -202,58 +515,33 @@ def get_admin_notification_html(user_data):
             </div>
         </div>
         <div class="footer">
-            <p>© {now.year} irrelevant. Sistema automático de notificaciones.</p>
+            <p>© {year} irrelevant. Sistema automático de notificaciones.</p>
         </div>
     </div>
 </body>
 </html>"""
 
-def get_admin_notification_text(user_data):
-    """
-    Genera la versión de texto plano de la notificación de nuevo registro para administradores.
-
-    Args:
-        user_data (dict): Datos del usuario registrado
-
-    Returns:
-        str: Texto plano del correo de notificación
-    """
-    # Obtener fecha y hora actual
-    now = datetime.utcnow()
-    timestamp = now.strftime("%d/%m/%Y %H:%M:%S UTC")
-    
-    return f"""NUEVO REGISTRO EN IRRELEVANT CLUB
+ADMIN_NOTIFICATION_TEXT_SOURCE = """NUEVO REGISTRO EN IRRELEVANT CLUB
 
 Un nuevo usuario se ha registrado en la plataforma:
 
 DATOS DEL USUARIO:
-Nombre: {user_data['name']}
-Email: {user_data['email']}
-Tipo de usuario: {user_data.get('userType', 'No especificado')}
-País: {user_data.get('country', 'No especificado')}
+Nombre: {name}
+Email: {email}
+Tipo de usuario: {user_type}
+País: {country}
 
 Ya se le ha enviado el correo de bienvenida automáticamente.
 
 Registro realizado el {timestamp}
 
-© {now.year} irrelevant. Sistema automático de notificaciones.
+© {year} irrelevant. Sistema automático de notificaciones.
 """
 
-def get_welcome_email_text(user_data, current_year):
-    """
-    Genera la versión de texto plano del correo de bienvenida.
-
-    Args:
-        user_data (dict): Datos del usuario
-        current_year (int): Año actual para el footer
-
-    Returns:
-        str: Texto plano del correo
-    """
-    return f"""
+WELCOME_EMAIL_TEXT_SOURCE = """
 Acabas de entrar al lado oscuro de la automatización.
 
-Hola {user_data['name']},
+Hola {name},
 
 Bienvenido a irrelevant club. No es una plataforma. No es un empresa tradicional de tecnologia. Es un club para gente que está cansada de hacer las cosas como "siempre se han hecho".
 
@@ -276,21 +564,10 @@ Equipo irrelevant
 
 P.D. Si te preguntas si esto es para ti: si llegaste hasta aquí, lo es.
 
-© {current_year} irrelevant. Todos los derechos reservados.
+© {year} irrelevant. Todos los derechos reservados.
 """
 
-def get_welcome_email_html(user_data, current_year):
-    """
-    Genera el HTML para el correo de bienvenida.
-
-    Args:
-        user_data (dict): Datos del usuario
-        current_year (int): Año actual para el footer
-
-    Returns:
-        str: HTML del correo
-    """
-    return f"""<!DOCTYPE html>
+WELCOME_EMAIL_HTML_SOURCE = """<!DOCTYPE html>
 <html lang="es">
 <head>
     <meta charset="UTF-8">
@@ -514,12 +791,12 @@ def get_welcome_email_html(user_data, current_year):
 <body>
     <div class="container">
         <div class="header">
-            <img src="https://storage.googleapis.com/cluvi/nuevo_irre-removebg-preview.png" alt="irrelevant Logo" />
+            <img src="{logo_url}" alt="irrelevant Logo" />
             <h1>Bienvenido al Crew</h1>
         </div>
         <div class="content">
             <div class="welcome-message">
-                <p>Hola <strong>{user_data['name']}</strong>,</p>
+                <p>Hola <strong>{name}</strong>,</p>
                 <p style="color: white;">Bienvenido a irrelevant club. No es una plataforma. No es un empresa tradicional de tecnologia. Es un club para gente que está cansada de hacer las cosas como "siempre se han hecho"..</p>
             </div>
             <div class="arsenal-section">
@@ -554,8 +831,141 @@ def get_welcome_email_html(user_data, current_year):
                 <a href="https://tiktok.com/@irrelevant" class="social-icon" style="font-size: 14px;">TT</a>
                 <a href="https://youtube.com/c/irrelevant" class="social-icon" style="font-size: 14px;">YT</a>
             </div>
-            <p>© {current_year} irrelevant. Todos los derechos reservados.</p>
+            <p>© {year} irrelevant. Todos los derechos reservados.</p>
         </div>
     </div>
 </body>
-</html>"""
\ No newline at end of file
+</html>"""
+
+ADMIN_BULK_NOTIFICATION_HTML_SOURCE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <title>Registro masivo en irrelevant club</title>
+    <style>
+        body {{ font-family: sans-serif; margin: 0; padding: 0; background-color: #f5f5f5; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; background-color: #14121f; border-radius: 16px; overflow: hidden; color: #e1e1e6; }}
+        .header {{ background: linear-gradient(125deg, #9C6BFF, #7A4FD3); padding: 20px; text-align: center; }}
+        .header h1 {{ margin: 0; font-size: 24px; color: white; }}
+        .content {{ padding: 25px; }}
+        table {{ width: 100%; border-collapse: collapse; font-size: 14px; }}
+        th {{ text-align: left; color: #9C6BFF; padding: 6px; }}
+        td {{ color: white; padding: 6px; border-top: 1px solid #292841; }}
+        .footer {{ background-color: #12101a; padding: 15px; text-align: center; font-size: 13px; color: #8e8e96; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🎉 {count} nuevos registros en irrelevant club</h1>
+        </div>
+        <div class="content">
+            <table>
+                <tr><th>Nombre</th><th>Email</th><th>Tipo</th><th>País</th></tr>
+                {rows}
+            </table>
+            <p>Registro realizado el {timestamp}</p>
+        </div>
+        <div class="footer">
+            <p>© {year} irrelevant. Sistema automático de notificaciones.</p>
+        </div>
+    </div>
+</body>
+</html>"""
+
+ADMIN_BULK_ROW_HTML_SOURCE = """<tr><td>{name}</td><td>{email}</td><td>{user_type}</td><td>{country}</td></tr>"""
+
+ADMIN_BULK_NOTIFICATION_TEXT_SOURCE = """REGISTRO MASIVO EN IRRELEVANT CLUB
+
+Se han registrado {count} usuarios nuevos:
+
+{rows}
+Registro realizado el {timestamp}
+
+© {year} irrelevant. Sistema automático de notificaciones.
+"""
+
+ADMIN_BULK_ROW_TEXT_SOURCE = """- {name} <{email}> | {user_type} | {country}
+"""
+
+CAMPAIGN_EMAIL_HTML_SOURCE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{subject}</title>
+    <style>
+        body {{ font-family: 'Inter', sans-serif; margin: 0; padding: 0; background-color: #f5f5f5; color: #333; line-height: 1.5; }}
+        .container {{ max-width: 600px; margin: 0 auto; background-color: #14121f; border-radius: 16px; overflow: hidden; color: #e1e1e6; }}
+        .header {{ background: linear-gradient(125deg, #9C6BFF, #7A4FD3); padding: 30px 20px; text-align: center; }}
+        .header img {{ max-width: 180px; margin-bottom: 15px; }}
+        .header h1 {{ margin: 0; font-size: 26px; color: white; letter-spacing: -0.5px; font-weight: 800; }}
+        .content {{ padding: 35px 25px; font-size: 16px; }}
+        .content p {{ margin-bottom: 18px; }}
+        .footer {{ background-color: #12101a; padding: 15px; text-align: center; font-size: 13px; color: #8e8e96; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <img src="{logo_url}" alt="irrelevant club">
+            <h1>{subject}</h1>
+        </div>
+        <div class="content">
+            <p>Hola {name},</p>
+            {message}
+            <p>Nos vemos del otro lado,<br>Equipo irrelevant</p>
+        </div>
+        <div class="footer">
+            <p>© {year} irrelevant. Todos los derechos reservados.</p>
+        </div>
+    </div>
+</body>
+</html>"""
+
+CAMPAIGN_PARAGRAPH_HTML_SOURCE = """<p>{text}</p>"""
+
+CAMPAIGN_EMAIL_TEXT_SOURCE = """{subject}
+
+Hola {name},
+
+{message}
+
+Nos vemos del otro lado,
+Equipo irrelevant
+
+© {year} irrelevant. Todos los derechos reservados.
+"""
+
+ADMIN_NOTIFICATION_HTML = CompiledTemplate(ADMIN_NOTIFICATION_HTML_SOURCE)
+ADMIN_NOTIFICATION_TEXT = CompiledTemplate(ADMIN_NOTIFICATION_TEXT_SOURCE, minify=False, escape=False)
+WELCOME_EMAIL_HTML = CompiledTemplate(WELCOME_EMAIL_HTML_SOURCE)
+WELCOME_EMAIL_TEXT = CompiledTemplate(WELCOME_EMAIL_TEXT_SOURCE, minify=False, escape=False)
+ADMIN_BULK_NOTIFICATION_HTML = CompiledTemplate(ADMIN_BULK_NOTIFICATION_HTML_SOURCE, raw_fields=('rows',))
+ADMIN_BULK_ROW_HTML = CompiledTemplate(ADMIN_BULK_ROW_HTML_SOURCE)
+ADMIN_BULK_NOTIFICATION_TEXT = CompiledTemplate(ADMIN_BULK_NOTIFICATION_TEXT_SOURCE, minify=False, escape=False)
+ADMIN_BULK_ROW_TEXT = CompiledTemplate(ADMIN_BULK_ROW_TEXT_SOURCE, minify=False, escape=False)
+CAMPAIGN_EMAIL_HTML = CompiledTemplate(CAMPAIGN_EMAIL_HTML_SOURCE, raw_fields=('message',))
+CAMPAIGN_PARAGRAPH_HTML = CompiledTemplate(CAMPAIGN_PARAGRAPH_HTML_SOURCE)
+CAMPAIGN_EMAIL_TEXT = CompiledTemplate(CAMPAIGN_EMAIL_TEXT_SOURCE, minify=False, escape=False)
+
+# Plantillas y valores de ejemplo para el reporte de tamaño/CPU
+SAMPLE_VALUES = {
+    'name': 'María Fernanda Gómez',
+    'email': 'maria@example.com',
+    'user_type': 'Emprendedor',
+    'country': 'Colombia',
+    'timestamp': '01/03/2025 12:00:00 UTC',
+    'year': 2025,
+    'logo_url': DEFAULT_LOGO_URL,
+    'subject': 'Novedades de irrelevant club',
+    'message': '<p>Tenemos herramientas nuevas en el arsenal.</p><p>Entra con tu frase secreta para verlas.</p>'
+}
+
+EMAIL_TEMPLATES = {
+    'welcome_html': (WELCOME_EMAIL_HTML, SAMPLE_VALUES),
+    'welcome_text': (WELCOME_EMAIL_TEXT, SAMPLE_VALUES),
+    'admin_notification_html': (ADMIN_NOTIFICATION_HTML, SAMPLE_VALUES),
+    'admin_notification_text': (ADMIN_NOTIFICATION_TEXT, SAMPLE_VALUES),
+    'campaign_html': (CAMPAIGN_EMAIL_HTML, SAMPLE_VALUES),
+}
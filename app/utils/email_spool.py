@@ -0,0 +1,153 @@
+import fcntl
+import json
+import os
+from datetime import datetime
+
+
+class SpoolBusyError(Exception):
+    """Otro proceso está haciendo replay del mismo spool"""
+
+
+class EmailSpool:
+    """
+    Spool local de correos que no se pudieron enviar: un fichero NDJSON al
+    que solo se añaden líneas, compartido por todos los workers del host.
+
+    Cada línea es {'kind': 'email' | 'batch', 'params': ..., 'spooledAt': ...}.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Ruta del fichero de spool
+        """
+        self.path = path
+
+    def append(self, kind, params):
+        """
+        Añadir un correo al spool (con flock y fsync: sobrevive a un reinicio)
+
+        Args:
+            kind (str): 'email' (un correo) o 'batch' (lista de correos)
+            params: Parámetros del envío en el formato del proveedor
+        """
+        self._append_lines([json.dumps({
+            'kind': kind,
+            'params': params,
+            'spooledAt': datetime.utcnow().isoformat(),
+        }, ensure_ascii=False, default=str)])
+
+    def _append_lines(self, lines):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        while True:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # Si replay() renombró el fichero entre el open y el flock,
+                    # escribir aquí lo perdería: se reabre la ruta nueva
+                    if not self._is_current(f):
+                        continue
+                    f.write(''.join(line + '\n' for line in lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    return
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _is_current(self, f):
+        """Si el fichero abierto sigue siendo el de self.path"""
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def count(self):
+        """Correos pendientes en el spool"""
+        total = 0
+        for path in (self.path, self.path + '.replay'):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    total += sum(1 for line in f if line.strip())
+            except FileNotFoundError:
+                pass
+        return total
+
+    def replay(self, send, limit=None, permanent_errors=()):
+        """
+        Reenviar los correos del spool en orden.
+
+        El fichero se renombra antes de leerlo, así que los workers pueden
+        seguir añadiendo correos mientras tanto. Se lee con el flock de los
+        escritores: un append que ya tenía el fichero abierto termina antes,
+        y los que llegan después ven el renombrado y escriben en uno nuevo.
+        Al primer fallo se para y lo no enviado vuelve al spool. Los correos
+        que fallan con un error de `permanent_errors` pasan al fichero de
+        dead-letter (`<path>.dead`) y el replay sigue: si volvieran al
+        principio del spool bloquearían todos los replays siguientes.
+
+        Args:
+            send (callable): (kind, params) -> envía o lanza una excepción
+            limit (int): Máximo de correos a reenviar
+            permanent_errors (tuple): Excepciones que no tiene sentido reintentar
+
+        Returns:
+            dict: Enviados, descartados a dead-letter, devueltos al spool y
+            error que detuvo el replay
+
+        Raises:
+            SpoolBusyError: Si otro replay del mismo spool está en curso
+        """
+        # Un solo replay a la vez: dos leerían las mismas líneas y cada
+        # correo se enviaría dos veces (p. ej. un cron solapado con uno manual)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.replay.lock', 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise SpoolBusyError(f"Ya hay un replay de {self.path} en curso")
+            try:
+                return self._replay(send, limit, permanent_errors)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _replay(self, send, limit, permanent_errors):
+        replay_path = self.path + '.replay'
+        # Un replay anterior interrumpido deja su fichero: se procesa primero
+        if not os.path.exists(replay_path):
+            try:
+                os.rename(self.path, replay_path)
+            except FileNotFoundError:
+                return {'sent': 0, 'dead': 0, 'requeued': 0, 'error': None}
+
+        with open(replay_path, encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                lines = [line.rstrip('\n') for line in f if line.strip()]
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        sent, processed, dead, error = 0, 0, [], None
+        for line in lines:
+            if limit is not None and sent >= limit:
+                break
+            entry = json.loads(line)
+            try:
+                send(entry['kind'], entry['params'])
+            except permanent_errors as e:
+                dead.append(json.dumps(dict(entry, error=str(e)), ensure_ascii=False, default=str))
+                processed += 1
+                continue
+            except Exception as e:
+                error = str(e)
+                break
+            sent += 1
+            processed += 1
+
+        if dead:
+            with open(self.path + '.dead', 'a', encoding='utf-8') as f:
+                f.write(''.join(line + '\n' for line in dead))
+        remaining = lines[processed:]
+        if remaining:
+            self._append_lines(remaining)
+        os.remove(replay_path)
+        return {'sent': sent, 'dead': len(dead), 'requeued': len(remaining), 'error': error}
@@ -0,0 +1,250 @@
+import os
+import threading
+
+from flask import current_app
+
+# API REST de Resend (transporte 'http' y cliente asíncrono del modo ASGI)
+RESEND_API_URL = "https://api.resend.com"
+
+# SDK de Resend, importado en el primer envío (ver get_resend)
+_resend = None
+
+
+def get_resend():
+    """
+    Importar y configurar el SDK de Resend la primera vez que se necesita.
+
+    Solo lo usa el transporte 'sdk'. Importarlo (junto con requests) es la
+    parte más lenta del arranque y muchos procesos nunca envían correos, así
+    que no se hace al importar este módulo. Las variables de entorno ya las
+    carga app/config.py.
+
+    Returns:
+        module: Módulo resend con la API key configurada
+    """
+    global _resend
+    if _resend is None:
+        import resend
+        resend.api_key = os.getenv("RESEND_API_KEY")
+        _resend = resend
+    return _resend
+
+
+class EmailTransportError(Exception):
+    """El proveedor de correo rechazó el envío o no respondió"""
+
+
+class EmailPermanentError(EmailTransportError):
+    """
+    El proveedor rechazó el correo en sí (p. ej. 422 por una dirección
+    inválida): reintentarlo no sirve y no indica que el proveedor esté caído
+    """
+
+
+# Respuestas 4xx que sí se pueden reintentar
+RETRYABLE_CLIENT_STATUSES = (408, 429)
+
+
+def raise_for_status(status_code, body):
+    """
+    Convertir una respuesta de error del proveedor en la excepción adecuada
+
+    Args:
+        status_code (int): Código HTTP de la respuesta
+        body (str): Cuerpo de la respuesta (se recorta para el mensaje)
+
+    Raises:
+        EmailPermanentError: 4xx salvo 408 y 429
+        EmailTransportError: El resto de errores
+    """
+    if status_code < 400:
+        return
+    message = f"El proveedor de correo respondió {status_code}: {body[:200]}"
+    if status_code < 500 and status_code not in RETRYABLE_CLIENT_STATUSES:
+        raise EmailPermanentError(message)
+    raise EmailTransportError(message)
+
+
+class EmailTransport:
+    """
+    Interfaz de los transportes de correo. Los parámetros de cada correo
+    siguen el formato de la API de Resend (from, to, subject, html, text).
+    """
+
+    def send(self, params):
+        """
+        Enviar un correo
+
+        Args:
+            params (dict): Parámetros del correo
+
+        Returns:
+            dict: Respuesta del proveedor
+        """
+        raise NotImplementedError
+
+    def send_batch(self, params_list):
+        """
+        Enviar varios correos en una sola llamada
+
+        Args:
+            params_list (list): Parámetros de cada correo
+
+        Returns:
+            dict: Respuesta del proveedor
+        """
+        raise NotImplementedError
+
+
+class ResendSDKTransport(EmailTransport):
+    """
+    SDK oficial de Resend. Abre una conexión HTTPS nueva en cada envío
+    (usa requests.request sin sesión).
+    """
+
+    def send(self, params):
+        return get_resend().Emails.send(params)
+
+    def send_batch(self, params_list):
+        return get_resend().Batch.send(params_list)
+
+
+class HTTPSessionTransport(EmailTransport):
+    """
+    API REST de Resend sobre una requests.Session con keep-alive: cada
+    proceso reutiliza sus conexiones TLS entre envíos en lugar de pagar un
+    handshake por correo.
+
+    La sesión se crea perezosamente y de nuevo tras un fork, así que el
+    transporte se puede crear en el master de gunicorn.
+    """
+
+    def __init__(self, api_key, base_url, connect_timeout=3.0, read_timeout=10.0, pool_size=10):
+        """
+        Args:
+            api_key (str): API key de Resend
+            base_url (str): URL base de la API
+            connect_timeout (float): Timeout de conexión en segundos
+            read_timeout (float): Timeout de respuesta en segundos
+            pool_size (int): Conexiones por host que mantiene la sesión
+        """
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({
+                        'Authorization': f"Bearer {self.api_key}",
+                        'Accept': 'application/json',
+                    })
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def _post(self, path, payload):
+        import requests
+
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise EmailTransportError(f"Error de conexión con el proveedor de correo: {str(e)}") from e
+        raise_for_status(response.status_code, response.text)
+        return response.json()
+
+    def send(self, params):
+        return self._post('/emails', params)
+
+    def send_batch(self, params_list):
+        return self._post('/emails/batch', params_list)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class CaptureTransport(EmailTransport):
+    """
+    Guarda los correos en memoria en lugar de enviarlos (desarrollo,
+    pruebas manuales y benchmarks)
+    """
+
+    def __init__(self):
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def send(self, params):
+        with self._lock:
+            self.messages.append(params)
+            return {'id': f"captured-{len(self.messages)}"}
+
+    def send_batch(self, params_list):
+        return {'data': [self.send(params) for params in params_list]}
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+
+
+def create_transport(config):
+    """
+    Crear el transporte configurado en EMAIL_TRANSPORT
+
+    Args:
+        config (dict): Configuración de la aplicación
+
+    Returns:
+        EmailTransport: 'http' (por defecto), 'sdk' o 'capture'
+    """
+    name = config.get('EMAIL_TRANSPORT', 'http')
+    if name == 'sdk':
+        return ResendSDKTransport()
+    if name == 'capture':
+        return CaptureTransport()
+    if name == 'http':
+        return HTTPSessionTransport(
+            os.getenv('RESEND_API_KEY'),
+            config.get('EMAIL_HTTP_BASE_URL') or RESEND_API_URL,
+            connect_timeout=config.get('EMAIL_HTTP_CONNECT_TIMEOUT', 3.0),
+            read_timeout=config.get('EMAIL_HTTP_READ_TIMEOUT', 10.0),
+            pool_size=config.get('EMAIL_HTTP_POOL_SIZE', 10),
+        )
+    raise ValueError(f"EMAIL_TRANSPORT desconocido: {name}")
+
+
+def get_email_transport():
+    """
+    Transporte de correo de la aplicación actual (uno por proceso)
+
+    Returns:
+        EmailTransport: Transporte configurado
+    """
+    transport = current_app.extensions.get('email_transport')
+    if transport is None:
+        transport = current_app.extensions.setdefault('email_transport', create_transport(current_app.config))
+    return transport
+
+
+def set_email_transport(app, transport):
+    """
+    Sustituir el transporte de una aplicación (p. ej. por uno falso en un benchmark)
+
+    Args:
+        app (Flask): Aplicación
+        transport (EmailTransport): Transporte a usar
+    """
+    app.extensions['email_transport'] = transport
@@ -0,0 +1,109 @@
+import threading
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+from app.utils.metrics import GROUP_COMMIT_BATCH_SIZE
+
+
+class _Group:
+    """Documentos que se escriben juntos en un mismo insert_many"""
+
+    def __init__(self):
+        self.documents = []
+        self.errors = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class GroupCommitter:
+    """
+    Agrupa los inserts concurrentes de varias peticiones en un solo insert_many.
+
+    El primer hilo que llega abre un grupo y actúa de líder: espera hasta
+    `window` segundos (o hasta que el grupo tenga `max_docs` documentos) y
+    escribe todo el grupo con un insert_many no ordenado. El resto de hilos
+    añade su documento y espera el resultado. Mientras el líder escribe,
+    los que llegan abren el grupo siguiente.
+
+    Cada hilo recibe su propio resultado: el _id del documento o la
+    excepción que habría lanzado su insert_one.
+    """
+
+    def __init__(self, insert_many, window=0.002, max_docs=64, on_flush=None):
+        """
+        Args:
+            insert_many (callable): Recibe la lista de documentos y los inserta
+                (debe lanzar BulkWriteError con los fallos por documento)
+            window (float): Segundos máximos que un grupo espera a llenarse
+            max_docs (int): Documentos que cierran el grupo sin esperar más
+            on_flush (callable): Llamada con los documentos insertados de cada grupo
+        """
+        self.insert_many = insert_many
+        self.window = window
+        self.max_docs = max(1, max_docs)
+        self.on_flush = on_flush
+        self._group = None
+        self._lock = threading.Lock()
+
+    def insert(self, document):
+        """
+        Insertar un documento dentro del grupo en curso.
+
+        Args:
+            document (dict): Documento a insertar (recibe su _id como con insert_one)
+
+        Returns:
+            ObjectId: _id del documento insertado
+
+        Raises:
+            DuplicateKeyError, WriteError: Si falló este documento
+            Exception: El error del insert_many si falló el grupo entero
+        """
+        with self._lock:
+            group = self._group
+            leader = group is None
+            if leader:
+                group = self._group = _Group()
+            position = len(group.documents)
+            group.documents.append(document)
+            if len(group.documents) >= self.max_docs:
+                # Grupo lleno: el siguiente hilo abre uno nuevo
+                self._group = None
+                group.full.set()
+
+        if leader:
+            group.full.wait(self.window)
+            with self._lock:
+                if self._group is group:
+                    self._group = None
+            self.flush(group)
+        else:
+            group.done.wait()
+
+        error = group.errors.get(position)
+        if error is not None:
+            raise error
+        return document['_id']
+
+    def flush(self, group):
+        """Escribir un grupo cerrado y repartir los resultados"""
+        documents = group.documents
+        try:
+            GROUP_COMMIT_BATCH_SIZE.observe(len(documents))
+            try:
+                self.insert_many(documents)
+            except BulkWriteError as e:
+                for write_error in e.details.get('writeErrors', []):
+                    error_class = DuplicateKeyError if write_error.get('code') == 11000 else WriteError
+                    group.errors[write_error['index']] = error_class(
+                        write_error.get('errmsg'), write_error.get('code'), write_error
+                    )
+            except Exception as e:
+                group.errors = dict.fromkeys(range(len(documents)), e)
+
+            if self.on_flush and len(group.errors) < len(documents):
+                self.on_flush([document for position, document in enumerate(documents)
+                               if position not in group.errors])
+        finally:
+            # Los hilos del grupo no pueden quedarse esperando pase lo que pase
+            group.done.set()
@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+
+from flask import request
+from flask_cors import CORS
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se negocia gzip
+    brotli = None
+
+# Tipos de contenido que compensa comprimir
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'image/svg+xml',
+    'text/csv',
+    'text/html',
+    'text/plain',
+    'text/css',
+}
+
+DEFAULT_EDGE_SETTINGS = {
+    'compress': True,
+    'compress_min_size': 1024,
+    'gzip_level': 6,
+    'brotli_quality': 5,
+    'etag': True,
+}
+
+
+def edge_settings(app, blueprint):
+    """
+    Ajustes de la capa HTTP para un blueprint.
+
+    HTTP_EDGE_SETTINGS['default'] aplica a todas las rutas y cada blueprint
+    puede sobreescribir claves con su propio nombre.
+
+    Args:
+        app (Flask): Aplicación
+        blueprint (str): Nombre del blueprint de la petición (o None)
+
+    Returns:
+        dict: Ajustes efectivos
+    """
+    cache = app.extensions.setdefault('http_edge_settings', {})
+    settings = cache.get(blueprint)
+    if settings is None:
+        configured = app.config.get('HTTP_EDGE_SETTINGS', {})
+        settings = dict(DEFAULT_EDGE_SETTINGS)
+        settings.update(configured.get('default', {}))
+        settings.update(configured.get(blueprint, {}))
+        cache[blueprint] = settings
+    return settings
+
+
+def negotiate_encoding():
+    """Codificación preferida por el cliente entre las que soportamos"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_body(data, encoding, settings):
+    """Comprimir el cuerpo con la codificación negociada"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings['brotli_quality'])
+    return gzip.compress(data, compresslevel=settings['gzip_level'])
+
+
+def is_compressible(response, settings):
+    if not settings['compress']:
+        return False
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    return response.content_length is not None and response.content_length >= settings['compress_min_size']
+
+
+def init_http_edge(app):
+    """
+    Capa HTTP de la aplicación: CORS con preflight cacheado, ETag/304 para
+    GET y compresión gzip/brotli negociada por encima de un umbral.
+
+    Args:
+        app (Flask): Aplicación
+    """
+    # El navegador reutiliza la respuesta del preflight durante CORS_MAX_AGE
+    CORS(app, max_age=app.config.get('CORS_MAX_AGE', 86400))
+
+    @app.after_request
+    def apply_http_edge(response):
+        settings = edge_settings(app, request.blueprint)
+        compressible = is_compressible(response, settings)
+        encoding = negotiate_encoding() if compressible else None
+
+        # Aunque este cliente no pida compresión, otro sí: una caché intermedia
+        # no debe servirle a él la versión sin comprimir (ni al revés)
+        if compressible:
+            response.vary.add('Accept-Encoding')
+
+        # ETag del cuerpo sin comprimir; cada codificación es una representación distinta
+        if (settings['etag'] and request.method in ('GET', 'HEAD') and response.status_code == 200
+                and not response.direct_passthrough and not response.is_streamed
+                and response.get_etag()[0] is None):
+            digest = hashlib.sha1(response.get_data()).hexdigest()
+            response.set_etag(f"{digest}-{encoding}" if encoding else digest)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if encoding:
+            response.set_data(compress_body(response.get_data(), encoding, settings))
+            response.headers['Content-Encoding'] = encoding
+
+        return response
@@ -0,0 +1,274 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from app.extensions import mongo
+from app.utils.lru import TTLCache
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+STATUS_PROCESSING = 'processing'
+STATUS_DONE = 'done'
+
+# Las claves caducan solas con este índice TTL
+IDEMPOTENCY_INDEXES = [
+    IndexModel([('expireAt', ASCENDING)], name='expireAt_ttl', expireAfterSeconds=0),
+]
+
+
+def idempotency_collection():
+    """Colección de MongoDB con las claves y sus respuestas"""
+    return mongo.db[current_app.config.get('IDEMPOTENCY_COLLECTION', 'idempotency_keys')]
+
+
+def get_idempotency_cache():
+    """
+    Caché en proceso de las respuestas ya guardadas
+
+    Returns:
+        TTLCache: Respuestas indexadas por clave
+    """
+    cache = current_app.extensions.get('idempotency_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('idempotency_cache', TTLCache(
+            maxsize=current_app.config.get('IDEMPOTENCY_CACHE_SIZE', 10000),
+            ttl=current_app.config.get('IDEMPOTENCY_TTL', 86400)
+        ))
+    return cache
+
+
+class InFlight:
+    """
+    Peticiones con clave que se están procesando en este proceso.
+
+    La primera petición de una clave la ejecuta; las concurrentes esperan a
+    que termine y reutilizan su respuesta.
+    """
+
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """
+        Returns:
+            tuple: (bool, threading.Event) - (esta petición es la dueña, evento de fin)
+        """
+        with self._lock:
+            event = self._events.get(key)
+            if event is not None:
+                return False, event
+            event = self._events[key] = threading.Event()
+            return True, event
+
+    def release(self, key):
+        with self._lock:
+            event = self._events.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+def get_in_flight():
+    return current_app.extensions.setdefault('idempotency_in_flight', InFlight())
+
+
+def fingerprint():
+    """Huella del cuerpo de la petición, para detectar claves reutilizadas con otro contenido"""
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+
+def replay(stored):
+    """
+    Reconstruir la respuesta guardada
+
+    Args:
+        stored (dict): {'status', 'body', 'mimetype'}
+
+    Returns:
+        Response: Respuesta original con Idempotent-Replayed: true
+    """
+    response = current_app.response_class(stored['body'], status=stored['status'],
+                                          mimetype=stored['mimetype'])
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def error_response(message, status, retry_after=None):
+    response = jsonify({'message': message})
+    response.status_code = status
+    if retry_after:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def claim(key, digest):
+    """
+    Reservar una clave en MongoDB para procesarla
+
+    Returns:
+        dict or None: None si la reserva es nuestra; si no, el documento existente
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    document = {
+        '_id': key,
+        'status': STATUS_PROCESSING,
+        'fingerprint': digest,
+        'lockedUntil': now + timedelta(seconds=config.get('IDEMPOTENCY_LOCK_SECONDS', 30)),
+        'createdAt': now,
+        'expireAt': now + timedelta(seconds=config.get('IDEMPOTENCY_TTL', 86400)),
+    }
+    try:
+        idempotency_collection().insert_one(document)
+        return None
+    except DuplicateKeyError:
+        pass
+
+    # Una reserva caducada (el proceso que la tenía murió) se puede retomar
+    taken = idempotency_collection().find_one_and_update(
+        {'_id': key, 'status': STATUS_PROCESSING, 'lockedUntil': {'$lt': now}},
+        {'$set': {'fingerprint': digest, 'lockedUntil': document['lockedUntil']}}
+    )
+    if taken is not None:
+        return None
+    return idempotency_collection().find_one({'_id': key}) or {'status': STATUS_PROCESSING}
+
+
+def wait_for_result(key):
+    """
+    Esperar a que otro proceso termine una clave en curso
+
+    Returns:
+        dict or None: Documento terminado, o None si la clave se liberó o se
+        agota IDEMPOTENCY_WAIT_SECONDS
+    """
+    deadline = time.monotonic() + current_app.config.get('IDEMPOTENCY_WAIT_SECONDS', 10)
+    delay = 0.05
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        document = idempotency_collection().find_one({'_id': key})
+        if document is None or document['status'] == STATUS_DONE:
+            return document
+        delay = min(delay * 2, 0.5)
+    return None
+
+
+def serialize(response):
+    """Respuesta en el formato que se guarda y que replay() reconstruye"""
+    return {
+        'status': response.status_code,
+        'body': response.get_data(as_text=True),
+        'mimetype': response.mimetype,
+    }
+
+
+def store(key, response):
+    """
+    Guardar la respuesta de una clave. Las respuestas 5xx no se guardan: la
+    clave se libera para que el cliente pueda reintentar.
+
+    Returns:
+        dict or None: Respuesta guardada
+    """
+    if response.status_code >= 500:
+        idempotency_collection().delete_one({'_id': key, 'status': STATUS_PROCESSING})
+        return None
+
+    stored = serialize(response)
+    idempotency_collection().update_one(
+        {'_id': key},
+        {'$set': {'status': STATUS_DONE, 'response': stored, 'lockedUntil': None}}
+    )
+    return stored
+
+
+def idempotent(name):
+    """
+    Decorador que hace idempotente una ruta POST con la cabecera Idempotency-Key.
+
+    La primera petición con una clave se ejecuta y su respuesta se guarda
+    en MongoDB (con TTL) y en una caché en proceso. Los reintentos con la
+    misma clave reciben esa respuesta sin volver a ejecutar la ruta; las
+    peticiones concurrentes esperan a la primera. Reutilizar la clave con
+    otro cuerpo devuelve 422.
+
+    Args:
+        name (str): Ámbito de las claves (normalmente el nombre de la ruta)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            app = current_app._get_current_object()
+            header = request.headers.get(IDEMPOTENCY_HEADER)
+            if not header or not app.config.get('IDEMPOTENCY_ENABLED', True):
+                return f(*args, **kwargs)
+            if len(header) > MAX_KEY_LENGTH:
+                return error_response(f"{IDEMPOTENCY_HEADER} no puede superar {MAX_KEY_LENGTH} caracteres", 400)
+
+            key = f"{name}:{header}"
+            digest = fingerprint()
+            cache = get_idempotency_cache()
+            in_flight = get_in_flight()
+
+            owner, event = in_flight.acquire(key)
+            if not owner:
+                # Otra petición de este proceso tiene la clave: esperar su respuesta
+                event.wait(app.config.get('IDEMPOTENCY_WAIT_SECONDS', 10))
+
+            try:
+                cached = cache.get(key)
+                if cached is not None:
+                    if cached['fingerprint'] != digest:
+                        return error_response(f"{IDEMPOTENCY_HEADER} ya usada con otra petición", 422)
+                    return replay(cached['response'])
+
+                if not owner:
+                    # La primera no guardó respuesta (5xx o error): esta la intenta
+                    owner, event = in_flight.acquire(key)
+                    if not owner:
+                        return error_response("Petición con la misma clave en curso", 409, retry_after=1)
+
+                existing = claim(key, digest)
+                if existing is not None and existing['status'] != STATUS_DONE:
+                    # La tiene otro proceso: esperar su respuesta y, si la
+                    # liberó sin guardarla, intentar reservarla de nuevo
+                    existing = wait_for_result(key) or claim(key, digest)
+                    if existing is not None and existing['status'] != STATUS_DONE:
+                        return error_response("Petición con la misma clave en curso", 409, retry_after=1)
+                if existing is not None:
+                    if existing['fingerprint'] != digest:
+                        return error_response(f"{IDEMPOTENCY_HEADER} ya usada con otra petición", 422)
+                    cache.set(key, {'fingerprint': existing['fingerprint'], 'response': existing['response']})
+                    return replay(existing['response'])
+
+                try:
+                    response = app.make_response(f(*args, **kwargs))
+                except Exception:
+                    idempotency_collection().delete_one({'_id': key, 'status': STATUS_PROCESSING})
+                    raise
+
+                try:
+                    stored = store(key, response)
+                except Exception as e:
+                    # La ruta ya se ejecutó: su respuesta se devuelve igual. Los
+                    # reintentos a este proceso la reciben desde la caché; en
+                    # otros procesos la reserva caduca tras IDEMPOTENCY_LOCK_SECONDS
+                    app.logger.error(f"No se pudo guardar la respuesta de {IDEMPOTENCY_HEADER} {key}: {str(e)}")
+                    stored = serialize(response) if response.status_code < 500 else None
+                if stored is not None:
+                    cache.set(key, {'fingerprint': digest, 'response': stored})
+                return response
+            finally:
+                if owner:
+                    in_flight.release(key)
+
+        return decorated
+
+    return decorator
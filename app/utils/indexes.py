@@ -0,0 +1,175 @@
+import threading
+
+from flask import current_app
+from pymongo import IndexModel
+
+from app.extensions import mongo
+from app.models.registration_stats import RegistrationStats
+from app.models.user import User
+from app.utils.email_outbox import OUTBOX_INDEXES
+from app.utils.idempotency import IDEMPOTENCY_INDEXES
+from app.utils.rate_limit import RATE_LIMIT_INDEXES
+
+
+def get_index_registry():
+    """
+    Índices declarados por colección.
+
+    Returns:
+        dict: nombre de colección -> lista de IndexModel
+    """
+    return {
+        'users': User.INDEXES,
+        RegistrationStats.COLLECTION: RegistrationStats.INDEXES,
+        current_app.config.get('EMAIL_OUTBOX_COLLECTION', 'email_outbox'): OUTBOX_INDEXES,
+        current_app.config.get('RATE_LIMIT_COLLECTION', 'rate_limits'): RATE_LIMIT_INDEXES,
+        current_app.config.get('IDEMPOTENCY_COLLECTION', 'idempotency_keys'): IDEMPOTENCY_INDEXES,
+    }
+
+
+def get_query_shapes():
+    """
+    Formas de consulta declaradas por colección, para explain().
+
+    Returns:
+        dict: nombre de colección -> {nombre: {'filter': ..., 'sort': ...}}
+    """
+    return {
+        'users': User.QUERY_SHAPES,
+    }
+
+
+# Opciones que forman parte de la definición de un índice (además de las claves)
+COMPARED_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+
+def index_options(document):
+    """Opciones comparables de un índice, sin las que valen lo mismo que su ausencia"""
+    options = {option: document.get(option) for option in COMPARED_OPTIONS}
+    options['unique'] = bool(options['unique'])
+    options['sparse'] = bool(options['sparse'])
+    return options
+
+
+def background_copy(index):
+    """Copia de un IndexModel que se crea en segundo plano (sin tocar el del registro, que se comparte)"""
+    options = dict(index.document)
+    keys = options.pop('key')
+    options.setdefault('background', True)
+    return IndexModel(list(keys.items()), **options)
+
+
+def ensure_indexes(registry=None):
+    """
+    Crear los índices que falten y verificar los existentes (idempotente).
+
+    Los índices se crean en segundo plano en el servidor. Si ya existe un
+    índice con el mismo nombre pero otra definición (claves u opciones como
+    unique o expireAfterSeconds), se reporta y no se toca.
+
+    Args:
+        registry (dict): Registro de índices (por defecto get_index_registry())
+
+    Returns:
+        list: Una fila por índice con su estado ('created', 'ok', 'mismatch')
+    """
+    registry = registry or get_index_registry()
+    report = []
+
+    for collection_name, indexes in registry.items():
+        collection = mongo.db[collection_name]
+        existing = collection.index_information()
+        missing = []
+
+        for index in indexes:
+            document = index.document
+            name = document['name']
+            keys = list(document['key'].items())
+            if name not in existing:
+                missing.append(index)
+                report.append({'collection': collection_name, 'index': name, 'status': 'created'})
+            elif ([(field, direction) for field, direction in existing[name]['key']] != keys
+                  or index_options(existing[name]) != index_options(document)):
+                report.append({'collection': collection_name, 'index': name, 'status': 'mismatch'})
+            else:
+                report.append({'collection': collection_name, 'index': name, 'status': 'ok'})
+
+        if missing:
+            collection.create_indexes([background_copy(index) for index in missing])
+
+    return report
+
+
+def ensure_indexes_in_background(app):
+    """
+    Lanzar ensure_indexes en un hilo para no retrasar el arranque.
+
+    Args:
+        app (Flask): Aplicación
+
+    Returns:
+        threading.Thread: Hilo lanzado
+    """
+    def run():
+        with app.app_context():
+            try:
+                for row in ensure_indexes():
+                    if row['status'] != 'ok':
+                        app.logger.info(f"Índice {row['collection']}.{row['index']}: {row['status']}")
+            except Exception as e:
+                app.logger.error(f"Error al crear los índices: {str(e)}")
+
+    thread = threading.Thread(target=run, name='ensure-indexes', daemon=True)
+    thread.start()
+    return thread
+
+
+def plan_stages(plan):
+    """
+    Aplanar las etapas de un plan de ejecución de explain().
+
+    Args:
+        plan (dict): winningPlan (o subplan) de explain()
+
+    Returns:
+        list: Nombres de etapa desde la raíz, p. ej. ['FETCH', 'IXSCAN']
+    """
+    # En servidores con el motor SBE el plan clásico va dentro de 'queryPlan'
+    plan = plan.get('queryPlan', plan)
+    stages = [plan.get('stage', '?')]
+    if 'inputStage' in plan:
+        stages += plan_stages(plan['inputStage'])
+    for child in plan.get('inputStages', []):
+        stages += plan_stages(child)
+    return stages
+
+
+def explain_query_shapes(shapes=None):
+    """
+    Ejecutar explain() sobre cada forma de consulta declarada.
+
+    Args:
+        shapes (dict): Formas de consulta (por defecto get_query_shapes())
+
+    Returns:
+        list: Una fila por consulta con sus etapas y si hace COLLSCAN
+    """
+    shapes = shapes or get_query_shapes()
+    report = []
+
+    for collection_name, queries in shapes.items():
+        collection = mongo.db[collection_name]
+        for name, shape in queries.items():
+            cursor = collection.find(shape['filter'])
+            if shape.get('sort'):
+                cursor = cursor.sort(shape['sort'])
+            plan = cursor.explain()['queryPlanner']['winningPlan']
+            stages = plan_stages(plan)
+            report.append({
+                'collection': collection_name,
+                'query': name,
+                'stages': stages,
+                'collscan': 'COLLSCAN' in stages,
+            })
+
+    return report
@@ -0,0 +1,79 @@
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa json de la stdlib
+    orjson = None
+
+if orjson is not None:
+    # Las fechas de MongoDB son naive en UTC: se serializan con +00:00
+    ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+def encode_value(value):
+    """
+    Convertir a JSON los tipos de BSON/Python que el encoder no conoce.
+
+    Args:
+        value: Valor no serializable de forma nativa
+
+    Returns:
+        Representación serializable (str o float)
+
+    Raises:
+        TypeError: Si el tipo no está soportado
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Objeto de tipo {type(value).__name__} no serializable a JSON")
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Proveedor JSON de Flask para jsonify y request.json.
+
+    Usa orjson si está instalado y json de la stdlib si no. En ambos casos
+    codifica de forma nativa ObjectId, datetime (ISO 8601 en UTC) y Decimal128,
+    así que los modelos pueden devolver documentos de MongoDB tal cual.
+    """
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=encode_value, option=ORJSON_OPTIONS).decode('utf-8')
+        kwargs.setdefault('default', encode_value)
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is not None:
+            data = orjson.dumps(obj, default=encode_value, option=ORJSON_OPTIONS)
+        else:
+            data = json.dumps(obj, default=encode_value, ensure_ascii=False, separators=(',', ':'))
+        return self._app.response_class(data, mimetype=self.mimetype)
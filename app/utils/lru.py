@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Caché LRU acotada, segura entre hilos, con caducidad por entrada y
+    contadores de aciertos/fallos.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        """
+        Args:
+            maxsize (int): Número máximo de entradas
+            ttl (float): Vida por defecto de cada entrada en segundos (None = sin límite)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Obtener una entrada vigente y marcarla como usada recientemente.
+
+        Args:
+            key: Clave buscada
+            default: Valor devuelto si no hay entrada vigente
+
+        Returns:
+            Valor cacheado o default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        """
+        Guardar una entrada, desalojando la menos usada si la caché está llena.
+
+        Args:
+            key: Clave
+            value: Valor a guardar
+            ttl (float): Vida de la entrada en segundos (por defecto self.ttl)
+            expires_at (float): Instante de caducidad en epoch (time.time());
+                la entrada caduca en el primero de ttl y expires_at
+        """
+        now = time.monotonic()
+        ttl = self.ttl if ttl is None else ttl
+        expires = now + ttl if ttl is not None else None
+        if expires_at is not None:
+            absolute = now + (expires_at - time.time())
+            expires = absolute if expires is None else min(expires, absolute)
+
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Eliminar una entrada si existe"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Vaciar la caché (los contadores se conservan)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """
+        Estadísticas de uso de la caché.
+
+        Returns:
+            dict: Tamaño, aciertos, fallos, desalojos y tasa de acierto
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,221 @@
+import os
+import time
+from functools import wraps
+
+from flask import Blueprint, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+# Con PROMETHEUS_MULTIPROC_DIR definido (gunicorn con varios workers) cada
+# proceso escribe sus métricas en ficheros y /metrics agrega todos.
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones HTTP',
+    ['method', 'endpoint'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'Peticiones HTTP por código de estado',
+    ['method', 'endpoint', 'status']
+)
+
+MONGO_COMMAND_DURATION = Histogram(
+    'mongodb_command_duration_seconds', 'Duración de los comandos enviados a MongoDB',
+    ['command'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+MONGO_COMMAND_FAILURES = Counter(
+    'mongodb_command_failures_total', 'Comandos de MongoDB fallidos', ['command']
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    'mongodb_pool_connections', 'Conexiones abiertas en el pool de MongoDB',
+    multiprocess_mode='livesum'
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    'mongodb_pool_checked_out_connections', 'Conexiones del pool en uso',
+    multiprocess_mode='livesum'
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    'mongodb_pool_checkout_failures_total', 'Fallos al obtener una conexión del pool', ['reason']
+)
+MONGO_POOL_CLEARED = Counter(
+    'mongodb_pool_cleared_total', 'Veces que el pool de MongoDB se vació'
+)
+
+EMAIL_SEND_DURATION = Histogram(
+    'email_send_duration_seconds', 'Latencia de los envíos de correo', ['kind'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+EMAIL_SEND_FAILURES = Counter(
+    'email_send_failures_total', 'Envíos de correo fallidos', ['kind']
+)
+EMAIL_SPOOLED = Counter(
+    'email_spooled_total', 'Correos guardados en el spool local tras un fallo de envío', ['kind']
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    'circuit_breaker_state', 'Estado del circuit breaker (0 closed, 1 half_open, 2 open)', ['name'],
+    multiprocess_mode='livemax'
+)
+BREAKER_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+ADMISSION_SHED = Counter(
+    'admission_shed_total', 'Peticiones rechazadas con 503 por el control de admisión',
+    ['route_class', 'reason']
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    'admission_queue_depth', 'Peticiones esperando un hueco', ['route_class'],
+    multiprocess_mode='livesum'
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    'admission_in_flight', 'Peticiones en curso admitidas', ['route_class'],
+    multiprocess_mode='livesum'
+)
+ADMISSION_LIMIT = Gauge(
+    'admission_limit', 'Límite adaptativo de peticiones en curso', ['route_class'],
+    multiprocess_mode='livesum'
+)
+
+USER_CACHE_LOOKUPS = Counter(
+    'user_cache_lookups_total', 'Lecturas de perfiles a través de la caché por worker', ['result']
+)
+
+GROUP_COMMIT_BATCH_SIZE = Histogram(
+    'mongodb_group_commit_documents', 'Documentos escritos por cada insert_many del group commit',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+WORKER_STARTUP_SECONDS = Gauge(
+    'app_worker_startup_seconds', 'Duración del arranque del worker por fase (load, reconnect, warmup, total)',
+    ['phase'], multiprocess_mode='livemax'
+)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Duración y fallos de cada comando de MongoDB"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name).observe(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name).observe(event.duration_micros / 1_000_000)
+        MONGO_COMMAND_FAILURES.labels(event.command_name).inc()
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Estado del pool de conexiones (eventos CMAP)"""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        MONGO_POOL_CLEARED.inc()
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_CHECKED_OUT.inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.dec()
+
+
+def mongo_event_listeners():
+    """Listeners para pasar al MongoClient de la extensión mongo"""
+    return [CommandMetricsListener(), PoolMetricsListener()]
+
+
+def set_breaker_state(name, state):
+    """Callback on_state_change de CircuitBreaker"""
+    CIRCUIT_BREAKER_STATE.labels(name).set(BREAKER_STATE_VALUES[state])
+
+
+def track_email_send(kind):
+    """
+    Decorador para las funciones de envío de email_sender: mide la latencia
+    y cuenta como fallo un resultado False o una excepción.
+
+    Args:
+        kind (str): Tipo de correo (etiqueta de las métricas)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            start = time.perf_counter()
+            ok = False
+            try:
+                ok = f(*args, **kwargs)
+                return ok
+            finally:
+                EMAIL_SEND_DURATION.labels(kind).observe(time.perf_counter() - start)
+                if not ok:
+                    EMAIL_SEND_FAILURES.labels(kind).inc()
+
+        return decorated
+
+    return decorator
+
+
+def init_metrics(app):
+    """
+    Medir latencia y códigos de estado de cada ruta y publicar /metrics.
+
+    Args:
+        app (Flask): Aplicación
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None and request.endpoint != 'metrics.metrics':
+            endpoint = request.endpoint or 'not_found'
+            HTTP_REQUEST_DURATION.labels(request.method, endpoint).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(request.method, endpoint, str(response.status_code)).inc()
+        return response
+
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """
+    Endpoint de métricas en formato Prometheus
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
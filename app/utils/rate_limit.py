@@ -0,0 +1,217 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+from app.extensions import mongo
+
+# Los documentos del backend de MongoDB caducan solos con este índice TTL
+RATE_LIMIT_INDEXES = [
+    IndexModel([('expireAt', ASCENDING)], name='expireAt_ttl', expireAfterSeconds=0),
+]
+
+
+class MemoryBackend:
+    """
+    Token bucket en memoria del proceso. Es el más rápido, pero cada worker
+    de gunicorn lleva su propia cuenta.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, period):
+        """
+        Consumir un token del bucket de una clave.
+
+        Args:
+            key (str): Clave limitada (ruta + IP, email...)
+            limit (int): Capacidad del bucket (peticiones permitidas por periodo)
+            period (float): Segundos en los que se rellena el bucket completo
+
+        Returns:
+            tuple: (bool, float) - (permitida, segundos hasta el siguiente token)
+        """
+        now = time.monotonic()
+        refill_rate = limit / period
+
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + (now - updated) * refill_rate)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / refill_rate
+
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+
+        return allowed, retry_after
+
+
+class MongoBackend:
+    """
+    Ventana deslizante aproximada (ventana actual + anterior ponderada)
+    guardada en MongoDB, compartida por todos los workers y hosts.
+
+    Cada petición es un único find_one_and_update atómico.
+    """
+
+    def __init__(self, collection='rate_limits'):
+        self.collection = collection
+
+    def hit(self, key, limit, period):
+        """
+        Contar una petición en la ventana de una clave.
+
+        Args:
+            key (str): Clave limitada
+            limit (int): Peticiones permitidas por ventana
+            period (float): Tamaño de la ventana en segundos
+
+        Returns:
+            tuple: (bool, float) - (permitida, segundos hasta poder reintentar)
+        """
+        now = time.time()
+        window = int(now // period * period)
+        previous = window - period
+
+        document = mongo.db[self.collection].find_one_and_update(
+            {'_id': key},
+            [{'$set': {
+                # Los valores de la derecha son los del documento antes del $set
+                'previous': {'$cond': [
+                    {'$eq': ['$window', window]}, '$previous',
+                    {'$cond': [{'$eq': ['$window', previous]}, '$count', 0]}
+                ]},
+                'count': {'$cond': [{'$eq': ['$window', window]}, {'$add': ['$count', 1]}, 1]},
+                'window': window,
+                'expireAt': datetime.utcnow() + timedelta(seconds=2 * period),
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        elapsed = now - window
+        estimate = document['previous'] * (1 - elapsed / period) + document['count']
+        if estimate <= limit:
+            return True, 0.0
+        return False, period - elapsed
+
+
+def get_backend(app):
+    """
+    Backend de rate limiting de la aplicación según RATE_LIMIT_BACKEND.
+
+    Args:
+        app (Flask): Aplicación
+
+    Returns:
+        MemoryBackend or MongoBackend
+    """
+    backend = app.extensions.get('rate_limit_backend')
+    if backend is None:
+        if app.config.get('RATE_LIMIT_BACKEND', 'memory') == 'mongo':
+            backend = MongoBackend(app.config.get('RATE_LIMIT_COLLECTION', 'rate_limits'))
+        else:
+            backend = MemoryBackend()
+        app.extensions['rate_limit_backend'] = backend
+    return backend
+
+
+def forwarded_ip(forwarded, trusted_proxies):
+    """
+    IP del cliente según X-Forwarded-For detrás de `trusted_proxies` proxies.
+
+    Cada proxy añade a la derecha la IP de quien le conectó, así que solo
+    las últimas `trusted_proxies` entradas son fiables: las de la izquierda
+    las puede escribir el propio cliente.
+
+    Args:
+        forwarded (str): Valor de X-Forwarded-For (entradas separadas por comas)
+        trusted_proxies (int): Número de proxies de confianza
+
+    Returns:
+        str or None: IP del cliente, o None si la cabecera no tiene tantas entradas
+    """
+    hops = [hop.strip() for hop in (forwarded or '').split(',') if hop.strip()]
+    if trusted_proxies < 1 or len(hops) < trusted_proxies:
+        return None
+    return hops[-trusted_proxies]
+
+
+def client_ip():
+    """IP del cliente (de X-Forwarded-For si RATE_LIMIT_TRUST_PROXY, si no remote_addr)"""
+    if current_app.config.get('RATE_LIMIT_TRUST_PROXY'):
+        forwarded = ','.join(request.headers.getlist('X-Forwarded-For'))
+        ip = forwarded_ip(forwarded, current_app.config.get('RATE_LIMIT_TRUSTED_PROXIES', 1))
+        if ip:
+            return ip
+    return request.remote_addr or 'unknown'
+
+
+def request_email():
+    """Email del cuerpo JSON, normalizado (o la IP si no hay email)"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get('email'), str):
+        return data['email'].strip().lower()
+    return client_ip()
+
+
+# Cómo se obtiene la clave limitada de cada petición
+KEY_FUNCTIONS = {
+    'ip': client_ip,
+    'email': request_email,
+    'route': lambda: 'global',
+}
+
+
+def rate_limit(name):
+    """
+    Decorador que limita una ruta según RATE_LIMITS[name].
+
+    Cada regla tiene 'limit' peticiones por 'period' segundos y 'key'
+    ('ip', 'email' o 'route'). Las peticiones que exceden el límite
+    reciben 429 con Retry-After.
+
+    Args:
+        name (str): Nombre de la regla en RATE_LIMITS
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            app = current_app._get_current_object()
+            rule = app.config.get('RATE_LIMITS', {}).get(name)
+            if not rule or not app.config.get('RATE_LIMIT_ENABLED', True):
+                return f(*args, **kwargs)
+
+            key = f"{name}:{KEY_FUNCTIONS[rule.get('key', 'ip')]()}"
+            try:
+                allowed, retry_after = get_backend(app).hit(key, rule['limit'], rule['period'])
+            except Exception as e:
+                # Si el backend compartido falla, se deja pasar la petición
+                app.logger.error(f"Error en el rate limiter: {str(e)}")
+                allowed, retry_after = True, 0.0
+
+            if not allowed:
+                response = jsonify({'message': 'Demasiadas peticiones. Inténtalo de nuevo más tarde.'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response
+
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,154 @@
+import html
+import re
+import time
+from string import Formatter
+
+# Reglas de minificación (se aplican una sola vez, al compilar)
+_IMPORT_RE = re.compile(r"@import\s+url\([^)]*\)\s*;?", re.IGNORECASE)
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_SPACES_RE = re.compile(r"\s*([{};:,>])\s*")
+_STYLE_BLOCK_RE = re.compile(r"(<style[^>]*>)(.*?)(</style>)", re.DOTALL | re.IGNORECASE)
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def minify_css(css):
+    """
+    Minificar una hoja de estilos y eliminar los @import de fuentes externas.
+
+    Args:
+        css (str): Contenido de un bloque <style>
+
+    Returns:
+        str: CSS minificado
+    """
+    css = _IMPORT_RE.sub('', css)
+    css = _CSS_COMMENT_RE.sub('', css)
+    css = _WHITESPACE_RE.sub(' ', css)
+    css = _CSS_SPACES_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_html(markup):
+    """
+    Minificar un fragmento HTML: CSS embebido minificado, comentarios
+    eliminados y espacios colapsados (el navegador ya los colapsa al renderizar).
+
+    Args:
+        markup (str): Fragmento HTML estático
+
+    Returns:
+        str: HTML minificado
+    """
+    markup = _HTML_COMMENT_RE.sub('', markup)
+
+    parts = []
+    last = 0
+    for match in _STYLE_BLOCK_RE.finditer(markup):
+        parts.append(_WHITESPACE_RE.sub(' ', markup[last:match.start()]))
+        parts.append(match.group(1) + minify_css(match.group(2)) + match.group(3))
+        last = match.end()
+    parts.append(_WHITESPACE_RE.sub(' ', markup[last:]))
+
+    return ''.join(parts)
+
+
+class CompiledTemplate:
+    """
+    Plantilla precompilada a partir de una cadena con campos `{campo}`.
+
+    Al compilar se separa la plantilla en segmentos estáticos y huecos por
+    usuario, y los segmentos estáticos se minifican. Renderizar solo une
+    cadenas.
+    """
+
+    def __init__(self, source, minify=True, escape=True, raw_fields=()):
+        self.source = source
+        self.escape = escape
+        # Campos que ya vienen renderizados (p. ej. filas de otra plantilla)
+        self.raw_fields = frozenset(raw_fields)
+        self.segments = []
+        self.fields = []
+
+        for literal, field, format_spec, conversion in Formatter().parse(source):
+            if literal:
+                self._append_literal(literal)
+            if field is not None:
+                if format_spec or conversion:
+                    raise ValueError(f"Formato no soportado en el campo {field}")
+                self.segments.append(None)
+                self.fields.append(field)
+
+        if minify:
+            self.segments = [
+                minify_html(segment) if segment is not None else None
+                for segment in self.segments
+            ]
+            if self.segments and self.segments[0] is not None:
+                self.segments[0] = self.segments[0].lstrip()
+            if self.segments and self.segments[-1] is not None:
+                self.segments[-1] = self.segments[-1].rstrip()
+
+        # Posiciones de los huecos dentro de la lista de segmentos
+        self._slots = [i for i, segment in enumerate(self.segments) if segment is None]
+
+    def _append_literal(self, literal):
+        # Formatter.parse corta el texto en cada llave escapada; se vuelve a unir
+        if self.segments and self.segments[-1] is not None:
+            self.segments[-1] += literal
+        else:
+            self.segments.append(literal)
+
+    def render(self, **values):
+        """
+        Renderizar la plantilla con los valores de los campos.
+
+        Args:
+            **values: Valor de cada campo de la plantilla
+
+        Returns:
+            str: Plantilla renderizada
+        """
+        parts = list(self.segments)
+        for slot, field in zip(self._slots, self.fields):
+            value = str(values[field])
+            if self.escape and field not in self.raw_fields:
+                value = html.escape(value, quote=False)
+            parts[slot] = value
+        return ''.join(parts)
+
+    def render_legacy(self, **values):
+        """Renderizar la fuente original sin compilar (referencia para el reporte)"""
+        return self.source.format(**values)
+
+
+def _time_per_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def template_report(templates, iterations=2000):
+    """
+    Comparar tamaño y coste de render entre la fuente original y la compilada.
+
+    Args:
+        templates (dict): nombre -> (CompiledTemplate, valores de ejemplo)
+        iterations (int): Renders por medición
+
+    Returns:
+        list: Una fila por plantilla con bytes y µs por render
+    """
+    rows = []
+    for name, (template, sample) in templates.items():
+        legacy = template.render_legacy(**sample)
+        compiled = template.render(**sample)
+        rows.append({
+            'template': name,
+            'legacy_bytes': len(legacy.encode('utf-8')),
+            'compiled_bytes': len(compiled.encode('utf-8')),
+            'legacy_us': _time_per_call(lambda: template.render_legacy(**sample), iterations),
+            'compiled_us': _time_per_call(lambda: template.render(**sample), iterations),
+        })
+    return rows
@@ -0,0 +1,129 @@
+import cProfile
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, has_request_context, request
+
+
+@contextmanager
+def _noop_span():
+    yield
+
+
+def span(name):
+    """
+    Medir una fase de la petición actual para Server-Timing y el log de
+    peticiones lentas. Fuera de una petición, o con la instrumentación
+    desactivada, no hace nada.
+
+    Args:
+        name (str): Nombre de la fase (sin espacios: va en una cabecera HTTP)
+
+    Returns:
+        Context manager
+    """
+    if not has_request_context():
+        return _noop_span()
+    spans = g.get('timing_spans')
+    if spans is None:
+        return _noop_span()
+    return _timed_span(spans, name)
+
+
+@contextmanager
+def _timed_span(spans, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, (time.perf_counter() - start) * 1000))
+
+
+def format_server_timing(spans, total_ms):
+    """Valor de la cabecera Server-Timing"""
+    entries = [f"{name};dur={duration:.2f}" for name, duration in spans]
+    entries.append(f"total;dur={total_ms:.2f}")
+    return ', '.join(entries)
+
+
+def should_profile(app):
+    """
+    Decidir si perfilar la petición actual según PROFILING:
+    'off', 'header' (solo con la cabecera PROFILING_HEADER) o 'all'.
+    """
+    mode = app.config.get('PROFILING', 'off')
+    if mode == 'all':
+        return True
+    if mode == 'header':
+        value = request.headers.get(app.config.get('PROFILING_HEADER', 'X-Profile'))
+        secret = app.config.get('PROFILING_SECRET')
+        return bool(value) and (not secret or value == secret)
+    return False
+
+
+def dump_profile(app, profiler):
+    """Guardar el perfil de la petición en PROFILE_DIR (abrir con snakeviz o pstats)"""
+    directory = app.config.get('PROFILE_DIR', '/tmp/profiles')
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.endpoint or 'unknown'}.prof"
+    path = os.path.join(directory, filename)
+    profiler.dump_stats(path)
+    return path
+
+
+def init_timing(app):
+    """
+    Instrumentación por petición: cabecera Server-Timing con las fases
+    medidas con span(), log de peticiones lentas y perfilado bajo demanda.
+
+    Args:
+        app (Flask): Aplicación
+    """
+    timing_enabled = app.config.get('SERVER_TIMING_ENABLED', False)
+    profiling_enabled = app.config.get('PROFILING', 'off') != 'off'
+    slow_log_enabled = app.config.get('SLOW_REQUEST_THRESHOLD_MS') is not None
+    if not (timing_enabled or profiling_enabled or slow_log_enabled):
+        # Sin hooks: span() se queda en el camino rápido sin medir nada
+        return
+
+    @app.before_request
+    def start_request_timing():
+        g.request_start = time.perf_counter()
+        g.timing_spans = []
+        if profiling_enabled and should_profile(app):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def finish_request_timing(response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+
+        total_ms = (time.perf_counter() - start) * 1000
+        spans = g.get('timing_spans', [])
+
+        if timing_enabled:
+            response.headers['Server-Timing'] = format_server_timing(spans, total_ms)
+
+        threshold = app.config.get('SLOW_REQUEST_THRESHOLD_MS')
+        if slow_log_enabled and total_ms >= threshold:
+            phases = ', '.join(f"{name}={duration:.1f}ms" for name, duration in spans)
+            app.logger.warning(
+                f"Petición lenta: {request.method} {request.path} {response.status_code} "
+                f"en {total_ms:.1f}ms ({phases or 'sin fases medidas'})"
+            )
+
+        return response
+
+    @app.teardown_request
+    def stop_request_profiler(exception=None):
+        # En teardown y no en after_request: si la vista lanza una excepción
+        # after_request no se ejecuta y el profiler se quedaría activo
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            path = dump_profile(app, profiler)
+            app.logger.info(f"Perfil de {request.method} {request.path} guardado en {path}")
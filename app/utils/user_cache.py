@@ -0,0 +1,173 @@
+import itertools
+import os
+import threading
+import time
+
+from flask import current_app
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.extensions import mongo
+from app.utils.lru import TTLCache
+from app.utils.metrics import USER_CACHE_LOOKUPS
+
+# Un solo listener por proceso aunque varios hilos usen la caché a la vez
+_watcher_lock = threading.Lock()
+
+# Reloj lógico de lecturas e invalidaciones (next() es atómico con el GIL)
+_sequence = itertools.count(1)
+
+
+def get_user_cache():
+    """
+    Caché de perfiles de usuario del worker actual.
+
+    Si USER_CACHE_WATCH está activo, el primer uso en cada proceso arranca
+    el listener del change stream que invalida los perfiles modificados.
+
+    Returns:
+        TTLCache: Perfiles (con la proyección de User.PROFILE_FIELDS) por _id en texto
+    """
+    app = current_app._get_current_object()
+    cache = app.extensions.get('user_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('user_cache', TTLCache(
+            maxsize=app.config.get('USER_CACHE_SIZE', 10000),
+            ttl=app.config.get('USER_CACHE_TTL', 60)
+        ))
+    if app.config.get('USER_CACHE_WATCH'):
+        ensure_watcher_started(app, cache)
+    return cache
+
+
+def get_invalidations(app):
+    """Momento (en _sequence) de la última invalidación de cada perfil, con el mismo TTL que la caché"""
+    invalidations = app.extensions.get('user_cache_invalidations')
+    if invalidations is None:
+        invalidations = app.extensions.setdefault('user_cache_invalidations', TTLCache(
+            maxsize=app.config.get('USER_CACHE_SIZE', 10000),
+            ttl=app.config.get('USER_CACHE_TTL', 60)
+        ))
+    return invalidations
+
+
+def mark_invalidated(app, cache, user_id=None):
+    """
+    Descartar un perfil (o todos, sin user_id) y anotar cuándo, para que
+    una lectura que empezó antes no lo vuelva a cachear con datos viejos.
+    """
+    if user_id is None:
+        app.extensions['user_cache_cleared'] = next(_sequence)
+        cache.clear()
+    else:
+        get_invalidations(app).set(user_id, next(_sequence))
+        cache.delete(user_id)
+
+
+def invalidated_since(app, user_id, started):
+    """True si el perfil se invalidó después de `started`"""
+    return (get_invalidations(app).get(user_id, 0) > started
+            or app.extensions.get('user_cache_cleared', 0) > started)
+
+
+def get_cached_user(user_id, load):
+    """
+    Leer un perfil a través de la caché (read-through).
+
+    Args:
+        user_id (str): _id del usuario en texto
+        load (callable): Carga el perfil desde MongoDB (None si no existe)
+
+    Returns:
+        dict or None: Perfil del usuario
+    """
+    if not current_app.config.get('USER_CACHE_ENABLED', True):
+        return load(user_id)
+
+    cache = get_user_cache()
+    user = cache.get(user_id)
+    if user is not None:
+        USER_CACHE_LOOKUPS.labels('hit').inc()
+        return user
+
+    USER_CACHE_LOOKUPS.labels('miss').inc()
+    app = current_app._get_current_object()
+    started = next(_sequence)
+    user = load(user_id)
+    # Si el perfil cambió mientras se leía, lo leído puede ser anterior al
+    # cambio: se devuelve, pero no se cachea
+    if user is not None and not invalidated_since(app, user_id, started):
+        cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id):
+    """Descartar el perfil cacheado de un usuario en este worker"""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('user_cache')
+    if cache is not None:
+        mark_invalidated(app, cache, str(user_id))
+
+
+def user_cache_stats():
+    """
+    Contadores de la caché de perfiles de este worker.
+
+    Returns:
+        dict: Tamaño, aciertos, fallos, desalojos, tasa de acierto y estado del listener
+    """
+    stats = get_user_cache().stats()
+    watcher = current_app.extensions.get('user_cache_watcher')
+    stats['watching'] = bool(watcher and watcher.is_alive() and watcher.pid == os.getpid())
+    return stats
+
+
+def ensure_watcher_started(app, cache):
+    """Arrancar el listener en este proceso (los hilos no sobreviven al fork de gunicorn)"""
+    watcher = app.extensions.get('user_cache_watcher')
+    if watcher is not None and watcher.pid == os.getpid():
+        return
+    with _watcher_lock:
+        watcher = app.extensions.get('user_cache_watcher')
+        if watcher is None or watcher.pid != os.getpid():
+            watcher = UserCacheWatcher(app, cache)
+            app.extensions['user_cache_watcher'] = watcher
+            watcher.start()
+
+
+class UserCacheWatcher(threading.Thread):
+    """
+    Invalida la caché de perfiles con un change stream sobre users, para
+    que los cambios hechos por otros workers (o fuera de la API) no esperen
+    al TTL. Requiere un replica set; en un mongod standalone se desactiva y
+    solo queda el TTL.
+    """
+
+    # Operaciones que dejan obsoleto un perfil cacheado
+    OPERATIONS = ['update', 'replace', 'delete']
+
+    def __init__(self, app, cache):
+        super().__init__(name='user-cache-watcher', daemon=True)
+        self.app = app
+        self.cache = cache
+        self.pid = os.getpid()
+        self.retry_seconds = app.config.get('USER_CACHE_WATCH_RETRY_SECONDS', 5)
+
+    def run(self):
+        with self.app.app_context():
+            resume_token = None
+            while True:
+                try:
+                    pipeline = [{'$match': {'operationType': {'$in': self.OPERATIONS}}}]
+                    with mongo.db.users.watch(pipeline, resume_after=resume_token) as stream:
+                        for change in stream:
+                            mark_invalidated(self.app, self.cache, str(change['documentKey']['_id']))
+                            resume_token = stream.resume_token
+                except OperationFailure as e:
+                    # Sin replica set no hay change streams: queda solo el TTL
+                    self.app.logger.warning(f"Change stream de users no disponible: {str(e)}")
+                    return
+                except PyMongoError as e:
+                    # Pudo perderse algún cambio mientras no había conexión
+                    self.app.logger.error(f"Change stream de users interrumpido: {str(e)}")
+                    mark_invalidated(self.app, self.cache)
+                    time.sleep(self.retry_seconds)
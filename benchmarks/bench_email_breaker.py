@@ -0,0 +1,95 @@
+"""
+Circuit breaker y spool del envío de correos ante una caída del proveedor,
+con el transporte falso de bench_load (latencia y errores inyectados).
+
+Fases: proveedor sano, caída (cada envío espera el timeout y falla) y
+recuperación con replay del spool. Se comparan la latencia por envío con y
+sin breaker y se comprueba que no se pierde ningún correo.
+
+Uso:
+    python -m benchmarks.bench_email_breaker [--sends N] [--timeout-ms MS]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from app.config import Config
+from app.utils.email_sender import get_email_breaker, get_email_spool, replay_spool, send_welcome_email
+from benchmarks.bench_load import FakeEmailTransport, make_user
+
+
+def build_app(breaker_enabled, spool_path, recovery_seconds):
+    class BenchConfig(Config):
+        TESTING = True
+        EMAIL_BREAKER_ENABLED = breaker_enabled
+        EMAIL_BREAKER_FAILURE_THRESHOLD = 5
+        EMAIL_BREAKER_RECOVERY_SECONDS = recovery_seconds
+        EMAIL_SPOOL_ENABLED = True
+        EMAIL_SPOOL_PATH = spool_path
+
+    app = create_app(BenchConfig)
+    app.logger.disabled = True
+    return app
+
+
+def run_phase(sends):
+    """Enviar `sends` bienvenidas y devolver (latencias en ms, envíos fallidos)"""
+    latencies, failed = [], 0
+    for i in range(sends):
+        start = time.perf_counter()
+        if not send_welcome_email(make_user(i, 'Persona')):
+            failed += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, failed
+
+
+def report(label, latencies, failed):
+    print(f"{label:<34}{statistics.median(latencies):>10.3f}{max(latencies):>10.1f}"
+          f"{sum(latencies):>12.0f}{failed:>9}")
+
+
+def scenario(transport, breaker_enabled, args):
+    spool_path = os.path.join(tempfile.mkdtemp(prefix='email-spool-'), 'spool.ndjson')
+    app = build_app(breaker_enabled, spool_path, args.recovery_seconds)
+    transport.install(app)
+    print(f"\nBreaker {'activado' if breaker_enabled else 'desactivado'}")
+    print(f"{'fase':<34}{'p50 ms':>10}{'máx ms':>10}{'total ms':>12}{'fallidos':>9}")
+
+    with app.app_context():
+        transport.down = False
+        report('proveedor sano', *run_phase(args.sends))
+
+        transport.down = True
+        calls_before = transport.calls
+        latencies, failed = run_phase(args.sends)
+        report('caída del proveedor', latencies, failed)
+        print(f"  llamadas al proveedor durante la caída: {transport.calls - calls_before}"
+              f", en el spool: {get_email_spool().count()}")
+
+        transport.down = False
+        time.sleep(args.recovery_seconds)
+        sent_before = transport.sent
+        result = replay_spool()
+        print(f"  replay tras la recuperación: {result['sent']} reenviados, "
+              f"{result['requeued']} pendientes (proveedor recibió {transport.sent - sent_before})")
+        print(f"  estado del breaker: {get_email_breaker().stats()['state']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sends', type=int, default=50, help='Envíos por fase')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Latencia del proveedor sano')
+    parser.add_argument('--timeout-ms', type=float, default=200.0, help='Espera de cada envío durante la caída')
+    parser.add_argument('--recovery-seconds', type=float, default=1.0, help='Tiempo del breaker abierto')
+    args = parser.parse_args()
+
+    transport = FakeEmailTransport(args.latency_ms, timeout_ms=args.timeout_ms)
+    scenario(transport, False, args)
+    scenario(transport, True, args)
+
+
+if __name__ == '__main__':
+    main()
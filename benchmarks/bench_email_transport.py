@@ -0,0 +1,141 @@
+"""
+Latencia por envío de los transportes de correo contra un servidor local que
+imita la API de Resend (HTTPS con certificado autofirmado si hay openssl):
+SDK de Resend (una conexión por envío) frente a la sesión keep-alive, y
+envíos individuales frente al endpoint batch.
+
+Uso:
+    python -m benchmarks.bench_email_transport [--sends N] [--delay-ms MS] [--no-tls]
+"""
+import argparse
+import json
+import os
+import shutil
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils.email_transport import HTTPSessionTransport, ResendSDKTransport, get_resend
+
+MESSAGE = {
+    'from': 'irrelevant club <info@updates.stayirrelevant.com>',
+    'to': ['bench@example.com'],
+    'subject': 'Welcome to irrelevant club',
+    'html': '<p>Hola</p>' * 200,
+    'text': 'Hola\n' * 200,
+}
+
+
+class StubResendHandler(BaseHTTPRequestHandler):
+    """Responde como POST /emails y POST /emails/batch de Resend"""
+
+    protocol_version = 'HTTP/1.1'
+    # Cabeceras y cuerpo en un solo segmento (sin la espera del ACK retardado)
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.path == '/emails/batch':
+            body = {'data': [{'id': f"stub-{i}"} for i in range(len(payload))]}
+        else:
+            body = {'id': 'stub'}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_certificate(directory):
+    """Certificado autofirmado para localhost, o None si no hay openssl"""
+    if not shutil.which('openssl'):
+        return None
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-keyout', key, '-out', cert,
+        '-days', '1', '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+    ], check=True, capture_output=True)
+    return cert, key
+
+
+def start_server(delay_ms, certificate):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubResendHandler)
+    server.daemon_threads = True
+    server.delay = delay_ms / 1000
+    server.connections = 0
+    scheme = 'http'
+    if certificate:
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(*certificate)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://localhost:{server.server_address[1]}"
+
+
+def measure(label, server, send, sends, messages_per_send=1):
+    send()  # Calentamiento (importaciones y primera conexión)
+    connections = server.connections
+    latencies = []
+    for _ in range(sends):
+        start = time.perf_counter()
+        send()
+        latencies.append((time.perf_counter() - start) * 1000)
+    per_message = sum(latencies) / (sends * messages_per_send)
+    print(f"{label:<34}{statistics.median(latencies):>10.2f}{per_message:>14.2f}"
+          f"{server.connections - connections:>12}")
+    return per_message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sends', type=int, default=200)
+    parser.add_argument('--delay-ms', type=float, default=0.0, help='Tiempo de proceso simulado del proveedor')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--no-tls', action='store_true', help='Servidor HTTP plano')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='email-transport-')
+    certificate = None if args.no_tls else make_certificate(directory)
+    if certificate:
+        # requests (SDK y sesión) confía en el certificado del servidor local
+        os.environ['REQUESTS_CA_BUNDLE'] = certificate[0]
+    server, base_url = start_server(args.delay_ms, certificate)
+
+    resend = get_resend()
+    resend.api_url = base_url
+    sdk = ResendSDKTransport()
+    pooled = HTTPSessionTransport('bench', base_url)
+    batch = [MESSAGE] * args.batch_size
+
+    print(f"Servidor {base_url} ({'TLS' if certificate else 'sin TLS'}), retardo {args.delay_ms} ms")
+    print(f"{'transporte':<34}{'p50 ms':>10}{'ms/correo':>14}{'conexiones':>12}")
+    sdk_ms = measure('sdk (conexión por envío)', server, lambda: sdk.send(MESSAGE), args.sends)
+    pooled_ms = measure('http (sesión keep-alive)', server, lambda: pooled.send(MESSAGE), args.sends)
+    batch_sends = max(1, args.sends // args.batch_size)
+    batch_ms = measure(f"http batch ({args.batch_size} correos)", server,
+                       lambda: pooled.send_batch(batch), batch_sends, args.batch_size)
+
+    print(f"\nAhorro por correo con keep-alive: {sdk_ms - pooled_ms:.2f} ms "
+          f"({1 - pooled_ms / sdk_ms:.0%}); con batch: {sdk_ms - batch_ms:.2f} ms")
+    server.shutdown()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Throughput y latencia de User.create_user con y sin group commit, a varios
+niveles de concurrencia (un hilo por registro concurrente, como los hilos de
+un worker gthread).
+
+Sin --mongo-uri se usa mongomock detrás de un modelo de servidor: cada
+escritura paga el RTT de red (en paralelo) y un coste fijo de commit más un
+coste por documento que el primario serializa (journal y oplog por
+operación). Con --mongo-uri se mide contra un mongod real.
+
+Uso:
+    python -m benchmarks.bench_group_commit [--concurrency 1 8 32 128] [--mongo-uri URI]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from app import create_app
+from app.config import Config
+from app.extensions import mongo
+from app.models.user import User
+from benchmarks.bench_load import make_user, percentile
+
+
+class ServerModel:
+    """Latencia de las escrituras de un primario con un solo hilo de commit"""
+
+    def __init__(self, rtt_ms, op_us, doc_us):
+        self.rtt = rtt_ms / 1000
+        self.op = op_us / 1_000_000
+        self.doc = doc_us / 1_000_000
+        self.writes = 0
+        self._commit_lock = threading.Lock()
+
+    def write(self, documents):
+        time.sleep(self.rtt / 2)
+        with self._commit_lock:
+            self.writes += 1
+            time.sleep(self.op + self.doc * documents)
+        time.sleep(self.rtt / 2)
+
+
+class ModelCollection:
+    """Colección de mongomock cuyas escrituras pasan por el ServerModel"""
+
+    def __init__(self, collection, server):
+        self._collection = collection
+        self._server = server
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def insert_one(self, document, *args, **kwargs):
+        self._server.write(1)
+        return self._collection.insert_one(document, *args, **kwargs)
+
+    def insert_many(self, documents, *args, **kwargs):
+        self._server.write(len(documents))
+        return self._collection.insert_many(documents, *args, **kwargs)
+
+    def update_one(self, *args, **kwargs):
+        self._server.write(1)
+        return self._collection.update_one(*args, **kwargs)
+
+    def bulk_write(self, requests, *args, **kwargs):
+        self._server.write(len(requests))
+        return self._collection.bulk_write(requests, *args, **kwargs)
+
+
+class ModelDatabase:
+    def __init__(self, database, server):
+        self._database = database
+        self._server = server
+
+    def __getitem__(self, name):
+        return ModelCollection(self._database[name], self._server)
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def build_app(args, group_commit):
+    class BenchConfig(Config):
+        TESTING = True
+        MONGO_URI = args.mongo_uri or Config.MONGO_URI
+        MONGO_ENSURE_INDEXES = False
+        GROUP_COMMIT_ENABLED = group_commit
+        GROUP_COMMIT_WINDOW_MS = args.window_ms
+        GROUP_COMMIT_MAX_DOCS = args.max_docs
+
+    app = create_app(BenchConfig)
+    server = None
+    if args.mongo_uri:
+        mongo.db.users.drop()
+        mongo.db.registration_stats.drop()
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("Instala mongomock o indica --mongo-uri de un mongod local")
+        server = ServerModel(args.rtt_ms, args.op_us, args.doc_us)
+        mongo.cx = mongomock.MongoClient()
+        mongo.db = ModelDatabase(mongo.cx['bench'], server)
+    return app, server
+
+
+def run(app, concurrency, total):
+    """Registrar `total` usuarios con `concurrency` hilos; devuelve (segundos, latencias ms)"""
+    latencies = []
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        with app.app_context():
+            while True:
+                with lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                user = make_user(index, 'Persona')
+                start = time.perf_counter()
+                ok, result = User.create_user(user)
+                elapsed = (time.perf_counter() - start) * 1000
+                if not ok:
+                    raise RuntimeError(result)
+                with lock:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--requests', type=int, default=2000, help='Registros por escenario')
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--max-docs', type=int, default=64)
+    parser.add_argument('--mongo-uri', default=None, help='mongod real en lugar del modelo')
+    parser.add_argument('--rtt-ms', type=float, default=0.5, help='RTT de red del modelo')
+    parser.add_argument('--op-us', type=float, default=200.0, help='Coste serializado por escritura')
+    parser.add_argument('--doc-us', type=float, default=10.0, help='Coste serializado por documento')
+    args = parser.parse_args()
+
+    print(f"{'modo':<14}{'hilos':>6}{'reg/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'escrituras':>12}")
+    for concurrency in args.concurrency:
+        results = {}
+        for group_commit in (False, True):
+            app, server = build_app(args, group_commit)
+            seconds, latencies = run(app, concurrency, args.requests)
+            throughput = len(latencies) / seconds
+            writes = server.writes if server else '-'
+            label = 'group commit' if group_commit else 'insert_one'
+            print(f"{label:<14}{concurrency:>6}{throughput:>10.0f}{statistics.median(latencies):>9.2f}"
+                  f"{percentile(latencies, 0.99):>9.2f}{writes:>12}")
+            results[group_commit] = (throughput, statistics.median(latencies))
+        gain = results[True][0] / results[False][0]
+        cost = results[True][1] - results[False][1]
+        print(f"{'':<14}{'':>6}  throughput x{gain:.2f}, p50 {cost:+.2f} ms\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Throughput de serialización JSON sobre documentos de usuario realistas
+(ObjectId, datetime, Decimal128): proveedor por defecto de Flask con
+conversión manual frente a FastJSONProvider (orjson y fallback stdlib).
+
+Uso:
+    python -m benchmarks.bench_json [--documents N] [--rounds N]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils import json_provider
+from app.utils.json_provider import FastJSONProvider
+
+USER_TYPES = ['Empresa', 'Emprendedor', 'Freelancer', 'Persona']
+COUNTRIES = ['Colombia', 'México', 'Argentina', 'Chile', 'Perú', 'España']
+
+
+def make_users(count):
+    """Documentos como los que devuelve la colección users"""
+    now = datetime.utcnow()
+    users = []
+    for i in range(count):
+        user_type = random.choice(USER_TYPES)
+        user = {
+            '_id': ObjectId(),
+            'name': f"Usuario {i}",
+            'email': f"usuario{i}@example.com",
+            'phone': f"+57 300 {i:07d}",
+            'country': random.choice(COUNTRIES),
+            'userType': user_type,
+            'registrationDate': now - timedelta(minutes=i),
+            'isVerified': bool(i % 2),
+            'credit': Decimal128(f"{i}.50"),
+            'referredBy': ObjectId(),
+        }
+        if user_type == 'Empresa':
+            user.update({'company': f"Empresa {i} SAS", 'automationNeeds': 'Facturación y CRM'})
+        else:
+            user.update({'interestArea': 'IA', 'toolsUsed': 'Zapier, Make',
+                         'projectDescription': 'Automatizar la prospección de clientes ' * 3})
+        users.append(user)
+    return users
+
+
+def manual_convert(user):
+    """Conversión a mano que hacían los modelos antes del proveedor"""
+    user = dict(user)
+    user['_id'] = str(user['_id'])
+    user['referredBy'] = str(user['referredBy'])
+    user['credit'] = str(user['credit'].to_decimal())
+    return user
+
+
+def measure(label, func, users, rounds):
+    func(users)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        payload = func(users)
+    elapsed = (time.perf_counter() - start) / rounds
+    docs_per_second = len(users) / elapsed
+    print(f"{label:<34}{elapsed * 1000:>10.2f} ms{docs_per_second:>14,.0f} docs/s{len(payload):>12,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    users = make_users(args.documents)
+
+    print(f"{args.documents} documentos, {args.rounds} rondas (orjson {'sí' if json_provider.orjson else 'no'})")
+    measure('Flask por defecto + conversión', lambda docs: default.dumps([manual_convert(u) for u in docs]),
+            users, args.rounds)
+    measure('FastJSONProvider', fast.dumps, users, args.rounds)
+
+    encoded = fast.dumps(users)
+    measure('loads por defecto', lambda _: default.loads(encoded) and encoded, users, args.rounds)
+    measure('FastJSONProvider loads', lambda _: fast.loads(encoded) and encoded, users, args.rounds)
+
+    if json_provider.orjson is not None:
+        orjson_module = json_provider.orjson
+        json_provider.orjson = None
+        try:
+            measure('FastJSONProvider (stdlib)', fast.dumps, users, args.rounds)
+        finally:
+            json_provider.orjson = orjson_module
+
+
+if __name__ == '__main__':
+    main()
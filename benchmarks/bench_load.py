@@ -0,0 +1,286 @@
+"""
+Prueba de carga offline de la API: create_app contra un mongod local o
+mongomock en memoria, con un transporte de correo falso de latencia
+configurable. Mide throughput y p50/p95/p99 de /register, /verify-phrase y
+las rutas con token a varios niveles de concurrencia y guarda el resultado
+en JSON para comparar entre commits.
+
+Uso:
+    python -m benchmarks.bench_load [--mongo-uri URI] [--email-latency-ms MS]
+        [--concurrency 1,4,16] [--requests N] [--outbox] [--output PATH]
+        [--compare PATH]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import create_app
+from app.config import BASE_DIR, Config
+from app.extensions import mongo
+from app.utils.auth import generate_token
+from app.utils.email_transport import EmailTransport, set_email_transport
+
+USER_TYPES = ['Empresa', 'Emprendedor', 'Freelancer', 'Persona']
+COUNTRIES = ['Colombia', 'México', 'Argentina', 'Chile', 'Perú', 'España']
+
+BENCH_ADMIN_ID = 'bench-admin'
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+
+
+class FakeEmailTransport(EmailTransport):
+    """
+    Transporte de correo que espera la latencia indicada en lugar de llamar
+    a Resend, para medir la API sin red.
+
+    Con `error_rate` falla esa fracción de envíos y con `down = True` simula
+    una caída: cada envío espera `timeout_ms` y lanza un error.
+    """
+
+    def __init__(self, latency_ms=0.0, error_rate=0.0, timeout_ms=1000.0):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.timeout = timeout_ms / 1000
+        self.down = False
+        self.sent = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _attempt(self, count):
+        with self._lock:
+            self.calls += 1
+        if self.down:
+            time.sleep(self.timeout)
+            raise TimeoutError("Timeout simulado del proveedor de correo")
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise ConnectionError("Error simulado del proveedor de correo")
+        with self._lock:
+            self.sent += count
+
+    def send(self, params):
+        self._attempt(1)
+        return {'id': f"fake-{self.sent}"}
+
+    def send_batch(self, params_list):
+        self._attempt(len(params_list))
+        return {'data': [{'id': f"fake-{i}"} for i in range(len(params_list))]}
+
+    def install(self, app):
+        set_email_transport(app, self)
+
+
+def make_user(index, user_type):
+    """Usuario sintético válido para un userType"""
+    user = {
+        'name': f"Usuario {index}",
+        'email': f"bench{index}@example.com",
+        'phone': f"+57 300 {index:07d}",
+        'country': random.choice(COUNTRIES),
+        'userType': user_type,
+    }
+    if user_type == 'Empresa':
+        user.update(company=f"Empresa {index}", automationNeeds='Facturación y CRM')
+    else:
+        user.update(interestArea='IA', toolsUsed='Zapier, Make', projectDescription='Bot de ventas')
+    return user
+
+
+def build_app(args):
+    """Aplicación de la prueba, sin rate limiting y con el transporte falso"""
+
+    class BenchConfig(Config):
+        TESTING = True
+        MONGO_URI = args.mongo_uri or Config.MONGO_URI
+        MONGO_ENSURE_INDEXES = False
+        RATE_LIMIT_ENABLED = False
+        EMAIL_OUTBOX_ENABLED = args.outbox
+        ADMIN_USER_IDS = [BENCH_ADMIN_ID]
+        SLOW_REQUEST_THRESHOLD_MS = None
+
+    app = create_app(BenchConfig)
+
+    if not args.mongo_uri:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("Instala mongomock o indica --mongo-uri de un mongod local")
+        mongo.cx = mongomock.MongoClient()
+        mongo.db = mongo.cx['bench']
+    else:
+        mongo.db.users.drop()
+        mongo.db.registration_stats.drop()
+
+    return app
+
+
+def percentile(values, fraction):
+    """Percentil por el método del rango más cercano (values ordenados)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+def run_scenario(app, name, make_request, concurrency, total):
+    """
+    Lanzar `total` peticiones repartidas entre `concurrency` hilos
+
+    Args:
+        app (Flask): Aplicación
+        name (str): Nombre del escenario
+        make_request (callable): (client, i) -> Response
+        concurrency (int): Hilos concurrentes (cada uno con su test client)
+        total (int): Peticiones totales
+
+    Returns:
+        dict: Throughput, percentiles en ms y errores
+    """
+    counter = iter(range(total))
+    lock = threading.Lock()
+    latencies, errors = [], 0
+
+    def worker():
+        nonlocal errors
+        client = app.test_client()
+        local, local_errors = [], 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            response = make_request(client, i)
+            local.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+def build_scenarios(app):
+    """Escenarios: nombre -> función (client, i) -> Response"""
+    with app.app_context():
+        admin_token = generate_token(BENCH_ADMIN_ID)
+    headers = {'Authorization': f"Bearer {admin_token}"}
+    phrase = app.config['SECRET_PHRASE']
+    sequence = iter(range(10 ** 12))
+
+    def register(user_type):
+        return lambda client, i: client.post(
+            '/api/users/register', json=make_user(next(sequence), user_type))
+
+    scenarios = {f"register[{user_type}]": register(user_type) for user_type in USER_TYPES}
+    scenarios['verify-phrase'] = lambda client, i: client.post(
+        '/api/users/verify-phrase', json={'secretPhrase': phrase})
+    scenarios['users-list (token)'] = lambda client, i: client.get(
+        '/api/users?limit=50', headers=headers)
+    scenarios['stats (token)'] = lambda client, i: client.get(
+        '/api/users/stats', headers=headers)
+    return scenarios
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path):
+    """Imprimir la variación frente a un resultado anterior"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['scenario'], r['concurrency']): r for r in json.load(f)['results']}
+
+    print(f"\nComparación con {baseline_path}")
+    print(f"{'escenario':<28}{'conc':>6}{'Δ rps':>10}{'Δ p95':>10}{'Δ p99':>10}")
+    for result in results:
+        previous = baseline.get((result['scenario'], result['concurrency']))
+        if not previous:
+            continue
+        deltas = [
+            (result[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+            for key in ('throughput_rps', 'p95_ms', 'p99_ms')
+        ]
+        print(f"{result['scenario']:<28}{result['concurrency']:>6}"
+              + ''.join(f"{delta:>+9.1f}%" for delta in deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mongo-uri', help='mongod local (por defecto mongomock en memoria)')
+    parser.add_argument('--email-latency-ms', type=float, default=50.0,
+                        help='Latencia simulada de cada llamada a Resend')
+    parser.add_argument('--concurrency', default='1,4,16', help='Niveles de concurrencia')
+    parser.add_argument('--requests', type=int, default=500, help='Peticiones por escenario y nivel')
+    parser.add_argument('--outbox', action='store_true', help='Encolar los correos en el outbox')
+    parser.add_argument('--output', help='Fichero JSON de resultados')
+    parser.add_argument('--compare', help='Resultado anterior con el que comparar')
+    args = parser.parse_args()
+
+    transport = FakeEmailTransport(args.email_latency_ms)
+    app = build_app(args)
+    transport.install(app)
+    scenarios = build_scenarios(app)
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    results = []
+    print(f"{'escenario':<28}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}")
+    for name, make_request in scenarios.items():
+        for concurrency in levels:
+            result = run_scenario(app, name, make_request, concurrency, args.requests)
+            results.append(result)
+            print(f"{name:<28}{concurrency:>6}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.2f}"
+                  f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['errors']:>9}")
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'mongo': 'mongod' if args.mongo_uri else 'mongomock',
+        'email_latency_ms': args.email_latency_ms,
+        'outbox': args.outbox,
+        'emails_sent': transport.sent,
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{commit}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Coste del rate limiter en el camino caliente: backend en memoria, obtención
+de la clave y decorador completo (y el backend de MongoDB si se indica URI).
+
+Uso:
+    python -m benchmarks.bench_rate_limit [--iterations N] [--mongo-uri URI]
+"""
+import argparse
+import time
+
+from flask import Flask
+from pymongo import MongoClient
+
+from app.extensions import mongo
+from app.utils.rate_limit import MemoryBackend, MongoBackend, client_ip, rate_limit
+
+
+def measure(label, func, iterations):
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = (time.perf_counter() - start) / iterations * 1_000_000
+    print(f"{label:<40}{elapsed:>10.2f} µs/petición")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100_000)
+    parser.add_argument('--keys', type=int, default=10_000, help='Clientes distintos simulados')
+    parser.add_argument('--mongo-uri', help='MongoDB para medir el backend compartido')
+    args = parser.parse_args()
+
+    memory = MemoryBackend()
+    counter = iter(range(10 ** 12))
+    measure('MemoryBackend.hit', lambda: memory.hit(f"register:{next(counter) % args.keys}", 10, 60),
+            args.iterations)
+
+    app = Flask(__name__)
+    app.config['RATE_LIMITS'] = {'bench': {'limit': 10 ** 9, 'period': 60, 'key': 'ip'}}
+
+    @rate_limit('bench')
+    def limited():
+        return 'ok'
+
+    def unlimited():
+        return 'ok'
+
+    with app.test_request_context('/', environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        measure('client_ip()', client_ip, args.iterations)
+        measure('vista sin limitar', unlimited, args.iterations)
+        measure('vista con @rate_limit (memoria)', limited, args.iterations)
+
+    if args.mongo_uri:
+        client = MongoClient(args.mongo_uri)
+        mongo.db = client.get_default_database('rate_limit_bench')
+        backend = MongoBackend('rate_limits_bench')
+        with app.app_context():
+            measure('MongoBackend.hit', lambda: backend.hit(f"register:{next(counter) % args.keys}", 10, 60),
+                    min(args.iterations, 2000))
+            mongo.db.drop_collection('rate_limits_bench')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Tiempo de arranque de un proceso de la API, en procesos nuevos: importar
+`app`, create_app, warmup (con --mongo-uri) y primera petición. Es lo que
+tarda en estar listo un worker sin preload o un pod recién escalado.
+
+Uso:
+    python -m benchmarks.bench_startup [--runs N] [--mongo-uri URI]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from app.config import BASE_DIR
+
+# Se ejecuta en un intérprete nuevo en cada repetición
+CHILD = r"""
+import json, os, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+warmup = app.warm_up(flask_app) if os.environ.get('MONGO_URI') else 0.0
+warmed = time.perf_counter()
+flask_app.test_client().get('/')
+first_request = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'create_app': created - imported,
+    'warmup': warmup,
+    'first_request': first_request - warmed,
+    'total': first_request - start,
+    'resend_loaded': 'resend' in sys.modules,
+}))
+"""
+
+PHASES = ('import', 'create_app', 'warmup', 'first_request', 'total')
+
+
+def run_once(mongo_uri):
+    env = dict(os.environ)
+    if mongo_uri:
+        env['MONGO_URI'] = mongo_uri
+    else:
+        env.pop('MONGO_URI', None)
+    output = subprocess.check_output([sys.executable, '-c', CHILD], cwd=BASE_DIR, env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--mongo-uri', help='MongoDB para medir también el warmup del pool')
+    args = parser.parse_args()
+
+    runs = [run_once(args.mongo_uri) for _ in range(args.runs)]
+
+    print(f"{'fase':<16}{'mín ms':>10}{'mediana ms':>12}{'máx ms':>10}")
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<16}{min(values):>10.1f}{statistics.median(values):>12.1f}{max(values):>10.1f}")
+    print(f"resend importado al arrancar: {'sí' if any(run['resend_loaded'] for run in runs) else 'no'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Configuración de gunicorn: gunicorn -c gunicorn.conf.py run:app
+import os
+import time
+
+from prometheus_client import multiprocess
+
+# Importar y crear la app una sola vez en el master; los workers la heredan
+# por fork (copy-on-write) y arrancan en milisegundos
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def post_fork(server, worker):
+    """Marcar el inicio del arranque del worker"""
+    worker.boot_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    """
+    Preparar el worker antes de aceptar peticiones: MongoClient propio
+    (no se comparte el del master tras el fork) y warmup del pool.
+    """
+    from app import warm_up
+    from app.utils.db import reconnect_mongo
+    from app.utils.metrics import WORKER_STARTUP_SECONDS
+
+    app = worker.wsgi
+    loaded = time.perf_counter()
+    reconnect_mongo(app)
+    reconnected = time.perf_counter()
+    warmup_seconds = warm_up(app)
+    total = time.perf_counter() - worker.boot_started
+
+    # Con preload 'load' es casi cero; sin preload incluye importar y crear la app
+    WORKER_STARTUP_SECONDS.labels('load').set(loaded - worker.boot_started)
+    WORKER_STARTUP_SECONDS.labels('reconnect').set(reconnected - loaded)
+    WORKER_STARTUP_SECONDS.labels('warmup').set(warmup_seconds)
+    WORKER_STARTUP_SECONDS.labels('total').set(total)
+    worker.log.info(f"Worker {worker.pid} listo en {total * 1000:.0f} ms "
+                    f"(warmup {warmup_seconds * 1000:.0f} ms)")
+
+
+def child_exit(server, worker):
+    """Descartar las métricas de tipo gauge de un worker que terminó"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
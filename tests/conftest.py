@@ -0,0 +1,38 @@
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.extensions import mongo
+
+
+class TestConfig(Config):
+    TESTING = True
+    MONGO_ENSURE_INDEXES = False
+    METRICS_ENABLED = False
+    EMAIL_TRANSPORT = 'capture'
+    RATE_LIMIT_ENABLED = False
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Crear una aplicación de prueba con ajustes sobreescritos"""
+    def factory(**overrides):
+        settings = {'EMAIL_SPOOL_PATH': str(tmp_path / 'email-spool.ndjson')}
+        settings.update(overrides)
+        config = type('OverriddenConfig', (TestConfig,), settings)
+        return create_app(config)
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def db(app):
+    """Base de datos en memoria (mongomock) en lugar de un mongod"""
+    mongomock = pytest.importorskip('mongomock')
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx['test']
+    return mongo.db
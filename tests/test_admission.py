@@ -0,0 +1,119 @@
+import threading
+
+from app.utils.admission import AdaptiveLimiter, get_limiter
+
+
+def make_limiter(**overrides):
+    settings = {
+        'limit': 4, 'min_limit': 2, 'max_limit': 6, 'queue': 0, 'queue_timeout': 0.05,
+        'target_latency': 0.1, 'window': 4, 'backoff': 0.5,
+    }
+    settings.update(overrides)
+    return AdaptiveLimiter('test', **settings)
+
+
+def fill(limiter):
+    for _ in range(limiter.limit):
+        assert limiter.acquire() is None
+
+
+def test_rejects_beyond_the_limit_when_the_queue_is_full():
+    limiter = make_limiter()
+    fill(limiter)
+
+    assert limiter.acquire() == 'queue_full'
+    assert limiter.stats()['in_flight'] == 4
+    assert limiter.shed == 1
+
+
+def test_nowait_rejects_instead_of_queueing():
+    limiter = make_limiter(queue=8)
+    fill(limiter)
+
+    assert limiter.acquire(wait=False) == 'queue_full'
+    assert limiter.waiting == 0
+
+
+def test_queued_request_is_admitted_when_a_slot_frees():
+    limiter = make_limiter(queue=1, queue_timeout=2)
+    fill(limiter)
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(limiter.acquire()))
+    waiter.start()
+    while limiter.waiting == 0:
+        pass
+
+    limiter.release(0.01)
+    waiter.join(2)
+
+    assert result == [None]
+    assert limiter.in_flight == 4
+
+
+def test_queued_request_times_out():
+    limiter = make_limiter(queue=1, queue_timeout=0.01)
+    fill(limiter)
+
+    assert limiter.acquire() == 'timeout'
+    assert limiter.waiting == 0
+
+
+def test_slow_window_cuts_the_limit_multiplicatively():
+    limiter = make_limiter()
+    fill(limiter)
+    for _ in range(4):
+        limiter.release(0.5)
+
+    assert limiter.limit == 2
+
+
+def test_limit_never_drops_below_min_limit():
+    limiter = make_limiter(limit=3, min_limit=2, window=1)
+    for _ in range(3):
+        assert limiter.acquire() is None
+        limiter.release(1.0)
+
+    assert limiter.limit == 2
+
+
+def test_fast_saturated_window_raises_the_limit_by_one():
+    limiter = make_limiter()
+    fill(limiter)
+    for _ in range(4):
+        limiter.release(0.01)
+
+    assert limiter.limit == 5
+
+
+def test_fast_window_below_the_limit_keeps_it():
+    limiter = make_limiter()
+    for _ in range(4):
+        assert limiter.acquire() is None
+        limiter.release(0.01)
+
+    assert limiter.limit == 4
+
+
+def test_limit_never_exceeds_max_limit():
+    limiter = make_limiter(limit=6, max_limit=6)
+    fill(limiter)
+    for _ in range(4):
+        limiter.release(0.01)
+
+    assert limiter.limit == 6
+
+
+def test_full_route_class_answers_503_with_retry_after(make_app):
+    app = make_app(ADMISSION_LIMITS={'default': {'limit': 1, 'min_limit': 1, 'queue': 0}})
+    client = app.test_client()
+    with app.app_context():
+        limiter = get_limiter(app, 'default')
+    assert limiter.acquire() is None
+
+    response = client.get('/api/users/cache-stats')
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    # El health check está exento y sigue respondiendo
+    assert client.get('/').status_code == 200
+    limiter.release(0.01)
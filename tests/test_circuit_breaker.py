@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+
+
+def open_breaker():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0)
+    with pytest.raises(RuntimeError):
+        breaker.call(lambda: (_ for _ in ()).throw(RuntimeError("caído")))
+    assert breaker.state == STATE_OPEN
+    return breaker
+
+
+def test_probe_interrupted_by_a_base_exception_is_released():
+    breaker = open_breaker()
+
+    def cancelled():
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        breaker.call(cancelled)
+    assert breaker.state == STATE_HALF_OPEN
+
+    # La siguiente llamada puede hacer de prueba y cierra el circuito
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == STATE_CLOSED
+
+
+def test_only_one_probe_at_a_time_while_half_open():
+    breaker = open_breaker()
+    breaker.before_call()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok')
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_ignored_errors_do_not_count_as_failures():
+    breaker = CircuitBreaker('test', failure_threshold=2, ignored_errors=(ValueError,))
+
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            breaker.call(lambda: int('x'))
+
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
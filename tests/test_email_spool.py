@@ -0,0 +1,173 @@
+import fcntl
+import json
+
+import pytest
+
+from app.utils.circuit_breaker import CircuitOpenError, STATE_CLOSED, STATE_OPEN
+from app.utils.email_sender import (
+    deliver, get_email_breaker, get_email_spool, replay_spool, send_welcome_emails_batch
+)
+from app.utils.email_spool import EmailSpool, SpoolBusyError
+from app.utils.email_transport import (
+    CaptureTransport, EmailPermanentError, EmailTransportError, raise_for_status, set_email_transport
+)
+
+
+class FlakyTransport(CaptureTransport):
+    """Transporte falso que falla mientras `down` sea True"""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+        self.rejected = set()
+        self.calls = 0
+
+    def send(self, params):
+        self.calls += 1
+        if self.down:
+            raise EmailTransportError("Proveedor caído")
+        if params['to'][0] in self.rejected:
+            raise EmailPermanentError("El proveedor de correo respondió 422: dirección inválida")
+        return super().send(params)
+
+
+def email(index):
+    return {'from': 'a@example.com', 'to': [f"u{index}@example.com"], 'subject': 'Hola', 'html': '<p>Hola</p>'}
+
+
+@pytest.fixture
+def transport(make_app):
+    app = make_app(EMAIL_BREAKER_FAILURE_THRESHOLD=2, EMAIL_BREAKER_RECOVERY_SECONDS=0.05)
+    transport = FlakyTransport()
+    set_email_transport(app, transport)
+    with app.app_context():
+        yield transport
+
+
+def test_breaker_open_spools_and_replay_delivers(transport):
+    transport.down = True
+    for index in range(2):
+        with pytest.raises(EmailTransportError):
+            deliver(email(index))
+    assert get_email_breaker().state == STATE_OPEN
+
+    # Con el circuito abierto el proveedor ni se llama, pero el correo no se pierde
+    with pytest.raises(CircuitOpenError):
+        deliver(email(2))
+    assert transport.calls == 2
+    assert get_email_spool().count() == 3
+
+    transport.down = False
+    get_email_breaker().opened_at -= 1
+    result = replay_spool()
+
+    assert result == {'sent': 3, 'dead': 0, 'requeued': 0, 'error': None}
+    assert [message['to'] for message in transport.messages] == [[f"u{i}@example.com"] for i in range(3)]
+    assert get_email_spool().count() == 0
+    assert get_email_breaker().state == STATE_CLOSED
+
+
+def test_replay_stops_at_first_failure_and_requeues_the_rest(transport):
+    spool = get_email_spool()
+    for index in range(3):
+        spool.append('email', email(index))
+
+    def send(kind, params):
+        if params['to'] == ['u1@example.com']:
+            raise EmailTransportError("Proveedor caído")
+        transport.send(params)
+
+    result = spool.replay(send)
+
+    assert result == {'sent': 1, 'dead': 0, 'requeued': 2, 'error': 'Proveedor caído'}
+    assert spool.count() == 2
+    assert spool.replay(lambda kind, params: transport.send(params))['sent'] == 2
+    assert [message['to'][0] for message in transport.messages] == ['u0@example.com', 'u1@example.com', 'u2@example.com']
+
+
+@pytest.mark.parametrize('status, error', [
+    (422, EmailPermanentError), (400, EmailPermanentError),
+    (408, EmailTransportError), (429, EmailTransportError), (503, EmailTransportError),
+])
+def test_provider_statuses_map_to_permanent_or_transient_errors(status, error):
+    with pytest.raises(error) as raised:
+        raise_for_status(status, 'cuerpo')
+    assert type(raised.value) is error
+
+
+def test_permanent_rejections_neither_open_the_breaker_nor_spool(transport):
+    transport.rejected = {f"u{index}@example.com" for index in range(6)}
+    for index in range(6):
+        with pytest.raises(EmailPermanentError):
+            deliver(email(index))
+
+    assert get_email_breaker().state == STATE_CLOSED
+    assert get_email_spool().count() == 0
+    deliver(email(7))
+    assert len(transport.messages) == 1
+
+
+def test_replay_moves_permanent_rejections_to_dead_letter_and_continues(transport):
+    spool = get_email_spool()
+    for index in range(3):
+        spool.append('email', email(index))
+    transport.rejected = {'u0@example.com'}
+
+    result = replay_spool()
+
+    assert result == {'sent': 2, 'dead': 1, 'requeued': 0, 'error': None}
+    assert spool.count() == 0
+    with open(spool.path + '.dead', encoding='utf-8') as f:
+        assert ['u0@example.com' in line for line in f] == [True]
+    assert get_email_breaker().state == STATE_CLOSED
+
+
+def test_append_racing_a_replay_is_not_lost(tmp_path, monkeypatch):
+    spool = EmailSpool(str(tmp_path / 'spool.ndjson'))
+    spool.append('email', email(0))
+    sent = []
+    real_flock = fcntl.flock
+
+    def flock(f, operation):
+        # El replay renombra y borra el fichero entre el open y el flock del append
+        if operation == fcntl.LOCK_EX and f.mode == 'a' and not sent:
+            spool.replay(lambda kind, params: sent.append(params['to'][0]))
+        real_flock(f, operation)
+
+    monkeypatch.setattr(fcntl, 'flock', flock)
+    spool.append('email', email(1))
+    monkeypatch.undo()
+    spool.replay(lambda kind, params: sent.append(params['to'][0]))
+
+    assert sent == ['u0@example.com', 'u1@example.com']
+
+
+def test_failed_welcome_batch_chunks_are_all_spooled(transport):
+    users = [{'name': f"U{index}", 'email': f"u{index}@example.com"} for index in range(250)]
+    transport.down = True
+
+    assert send_welcome_emails_batch(users) is False
+
+    # Tres lotes: dos fallan y abren el circuito, el tercero se rechaza sin llamar
+    assert transport.calls == 2
+    with open(get_email_spool().path, encoding='utf-8') as f:
+        batches = [json.loads(line) for line in f]
+    assert [(batch['kind'], len(batch['params'])) for batch in batches] == [('batch', 100), ('batch', 100), ('batch', 50)]
+
+
+def test_concurrent_replay_exits_without_sending(tmp_path):
+    spool = EmailSpool(str(tmp_path / 'spool.ndjson'))
+    for index in range(2):
+        spool.append('email', email(index))
+    sent = []
+
+    def send(kind, params):
+        # Un segundo replay (otro proceso) llega mientras este envía
+        with pytest.raises(SpoolBusyError):
+            spool.replay(lambda kind, params: sent.append(('segundo', params['to'][0])))
+        sent.append(('primero', params['to'][0]))
+
+    result = spool.replay(send)
+
+    assert result['sent'] == 2
+    assert sent == [('primero', 'u0@example.com'), ('primero', 'u1@example.com')]
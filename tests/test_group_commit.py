@@ -0,0 +1,109 @@
+import threading
+import time
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.utils.group_commit import GroupCommitter
+
+
+class FakeCollection:
+    """insert_many que asigna _id como pymongo y anota cada llamada"""
+
+    def __init__(self, fail_positions=(), error=None):
+        self.calls = []
+        self.fail_positions = set(fail_positions)
+        self.error = error
+
+    def insert_many(self, documents):
+        self.calls.append(list(documents))
+        if self.error is not None:
+            raise self.error
+        for document in documents:
+            document.setdefault('_id', ObjectId())
+        if self.fail_positions:
+            raise BulkWriteError({'writeErrors': [
+                {'index': position, 'code': 11000, 'errmsg': 'E11000 duplicate key'}
+                for position in sorted(self.fail_positions)
+            ]})
+
+
+def insert_concurrently(committer, count):
+    """Insertar `count` documentos desde hilos que arrancan a la vez; devuelve {posición: resultado}"""
+    results = {}
+    barrier = threading.Barrier(count)
+
+    def worker(position):
+        barrier.wait()
+        try:
+            results[position] = committer.insert({'position': position})
+        except Exception as e:
+            results[position] = e
+
+    threads = [threading.Thread(target=worker, args=(position,)) for position in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_inserts_share_one_insert_many():
+    collection = FakeCollection()
+    flushed = []
+    committer = GroupCommitter(collection.insert_many, window=0.2, max_docs=64, on_flush=flushed.extend)
+
+    results = insert_concurrently(committer, 8)
+
+    assert len(collection.calls) == 1
+    assert len(collection.calls[0]) == 8
+    assert all(isinstance(result, ObjectId) for result in results.values())
+    assert len(set(results.values())) == 8
+    assert len(flushed) == 8
+
+
+def test_full_group_flushes_without_waiting_for_the_window():
+    collection = FakeCollection()
+    committer = GroupCommitter(collection.insert_many, window=5, max_docs=4)
+
+    start = time.monotonic()
+    results = insert_concurrently(committer, 4)
+
+    assert time.monotonic() - start < 2
+    assert [len(call) for call in collection.calls] == [4]
+    assert all(isinstance(result, ObjectId) for result in results.values())
+
+
+def test_a_lone_insert_flushes_after_the_window():
+    collection = FakeCollection()
+    committer = GroupCommitter(collection.insert_many, window=0.01, max_docs=64)
+
+    document = {'name': 'Ana'}
+    assert committer.insert(document) == document['_id']
+    assert collection.calls == [[document]]
+
+
+def test_each_thread_gets_its_own_document_error():
+    # El documento que queda en la posición 1 del grupo falla por clave duplicada
+    collection = FakeCollection(fail_positions=[1])
+    flushed = []
+    committer = GroupCommitter(collection.insert_many, window=0.2, max_docs=3, on_flush=flushed.extend)
+
+    results = insert_concurrently(committer, 3)
+    failed_position = collection.calls[0][1]['position']
+
+    assert isinstance(results[failed_position], DuplicateKeyError)
+    assert all(isinstance(result, ObjectId) for position, result in results.items() if position != failed_position)
+    assert sorted(document['position'] for document in flushed) == sorted(set(range(3)) - {failed_position})
+
+
+def test_group_failure_is_raised_in_every_thread():
+    collection = FakeCollection(error=RuntimeError("Sin conexión"))
+    flushed = []
+    committer = GroupCommitter(collection.insert_many, window=0.2, max_docs=3, on_flush=flushed.extend)
+
+    results = insert_concurrently(committer, 3)
+
+    assert all(isinstance(result, RuntimeError) for result in results.values())
+    assert flushed == []
+
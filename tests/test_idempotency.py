@@ -0,0 +1,84 @@
+import pytest
+from flask import jsonify, request
+
+from app.utils import idempotency
+from app.utils.idempotency import IDEMPOTENCY_HEADER, STATUS_DONE, idempotency_collection, idempotent
+
+
+@pytest.fixture
+def calls(app, db):
+    """Ruta idempotente de prueba que cuenta cuántas veces se ejecuta"""
+    calls = []
+
+    @app.route('/orders', methods=['POST'])
+    @idempotent('orders')
+    def create_order():
+        calls.append(request.get_json())
+        if request.get_json().get('fail'):
+            return jsonify({'message': 'Error interno'}), 500
+        return jsonify({'order': len(calls)}), 201
+
+    return calls
+
+
+def post(client, key, body):
+    return client.post('/orders', json=body, headers={IDEMPOTENCY_HEADER: key})
+
+
+def test_retry_replays_stored_response_without_running_the_view(app, calls):
+    client = app.test_client()
+    first = post(client, 'abc', {'item': 1})
+    retry = post(client, 'abc', {'item': 1})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json() == {'order': 1}
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    assert len(calls) == 1
+    with app.app_context():
+        assert idempotency_collection().find_one({'_id': 'orders:abc'})['status'] == STATUS_DONE
+
+
+def test_replay_from_mongodb_when_the_process_cache_is_cold(app, calls):
+    client = app.test_client()
+    post(client, 'abc', {'item': 1})
+    app.extensions['idempotency_cache'].clear()
+
+    retry = post(client, 'abc', {'item': 1})
+
+    assert retry.get_json() == {'order': 1}
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert len(calls) == 1
+
+
+def test_key_reused_with_another_body_is_rejected(app, calls):
+    client = app.test_client()
+    post(client, 'abc', {'item': 1})
+
+    assert post(client, 'abc', {'item': 2}).status_code == 422
+    assert len(calls) == 1
+
+
+def test_server_errors_release_the_key(app, calls):
+    client = app.test_client()
+    assert post(client, 'abc', {'fail': True}).status_code == 500
+    assert post(client, 'abc', {'fail': True}).status_code == 500
+
+    assert len(calls) == 2
+    with app.app_context():
+        assert idempotency_collection().find_one({'_id': 'orders:abc'}) is None
+
+
+def test_store_failure_still_returns_and_caches_the_response(app, calls, monkeypatch):
+    def broken_store(key, response):
+        raise RuntimeError("MongoDB no disponible")
+
+    monkeypatch.setattr(idempotency, 'store', broken_store)
+    client = app.test_client()
+    first = post(client, 'abc', {'item': 1})
+    retry = post(client, 'abc', {'item': 1})
+
+    assert first.status_code == 201
+    assert first.get_json() == {'order': 1}
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert len(calls) == 1
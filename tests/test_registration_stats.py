@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.registration_stats import RegistrationStats
+from app.utils.auth import generate_token
+
+ADMIN_ID = '65f000000000000000000001'
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(ADMIN_USER_IDS=(ADMIN_ID,))
+
+
+@pytest.fixture
+def admin_client(app, db):
+    with app.app_context():
+        token = generate_token(ADMIN_ID)
+        for day in (16, 17, 18):
+            RegistrationStats.record({'registrationDate': datetime(2026, 10, day, 15),
+                                      'userType': 'Persona', 'country': 'CO'})
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    return client
+
+
+def test_stats_range_is_half_open(admin_client):
+    response = admin_client.get('/api/users/stats?from=2026-10-16&to=2026-10-18')
+
+    assert response.status_code == 200
+    assert response.get_json()['by_day'] == {'2026-10-17': 1, '2026-10-16': 1}
+
+
+@pytest.mark.parametrize('query', ['from=2026-10-17T12:00', 'to=2026-10-18T08:30'])
+def test_stats_rejects_dates_with_a_time(admin_client, query):
+    response = admin_client.get(f"/api/users/stats?{query}")
+
+    assert response.status_code == 400